@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 from pathlib import Path
 import os
+import tempfile
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -48,9 +49,10 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'page.middleware.RequestMetricsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
-    'django.middleware.gzip.GZipMiddleware',
+    'page.middleware.StaticFilesMiddleware',
+    'page.middleware.GZipMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -59,6 +61,12 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Per-route latency / SQL query metrics (Server-Timing header and
+# /api/request-stats/). Off unless REQUEST_METRICS=1; the stats endpoint
+# answers staff users and requests carrying X-Metrics-Token.
+REQUEST_METRICS = os.environ.get('REQUEST_METRICS', '0').lower() in ('1', 'true', 'yes')
+REQUEST_METRICS_TOKEN = os.environ.get('REQUEST_METRICS_TOKEN', '')
+
 ROOT_URLCONF = 'SSSIT.urls'
 
 TEMPLATES = [
@@ -79,17 +87,65 @@ TEMPLATES = [
 
 
 WSGI_APPLICATION = 'SSSIT.wsgi.application'
+ASGI_APPLICATION = 'SSSIT.asgi.application'
+
+# Threads per worker process for the blocking, DB-free parts of the async
+# views (openpyxl, Pillow, upload parsing). See gunicorn.conf.py for how
+# this fits with the worker count.
+ASYNC_OFFLOAD_THREADS = int(os.environ.get('ASYNC_OFFLOAD_THREADS', 4))
+
+# /api/events/ change feed: hours events are kept for clients resuming with
+# Last-Event-ID (run_jobs prunes older ones), and how long one ASGI stream
+# stays open before the client reconnects. Under WSGI streams end at once
+# and clients poll, so they never hold a worker thread.
+CHANGE_FEED_RETENTION_HOURS = int(os.environ.get('CHANGE_FEED_RETENTION_HOURS', 24))
+CHANGE_FEED_STREAM_SECONDS = int(os.environ.get('CHANGE_FEED_STREAM_SECONDS', 25))
+
+# ?updated_since= delta sync: days deletions are remembered. Older cursors
+# get a 410 and resync from scratch; run_jobs prunes expired tombstones.
+TOMBSTONE_RETENTION_DAYS = int(os.environ.get('TOMBSTONE_RETENTION_DAYS', 30))
 
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# SQLite tuning for gunicorn: WAL lets readers run alongside a writer,
+# the busy timeout makes writers queue instead of failing with
+# "database is locked", and IMMEDIATE transactions take the write lock
+# up front so read-then-write blocks (fee postings) cannot deadlock.
+SQLITE_PRAGMAS = {
+    'journal_mode': os.environ.get('SQLITE_JOURNAL_MODE', 'WAL'),
+    'synchronous': os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL'),
+    'mmap_size': int(os.environ.get('SQLITE_MMAP_SIZE', 128 * 1024 * 1024)),
+    'cache_size': int(os.environ.get('SQLITE_CACHE_SIZE', -32000)),  # negative = KiB
+    'temp_store': os.environ.get('SQLITE_TEMP_STORE', 'MEMORY'),
+}
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'NAME': os.environ.get('SQLITE_PATH', BASE_DIR / 'db.sqlite3'),
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 600)),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'timeout': float(os.environ.get('SQLITE_BUSY_TIMEOUT', 20)),
+            'transaction_mode': os.environ.get('SQLITE_TRANSACTION_MODE', 'IMMEDIATE'),
+            'init_command': ';'.join(
+                f'PRAGMA {name}={value}' for name, value in SQLITE_PRAGMAS.items()
+            ),
+        },
+    }
+}
+# Shared by all gunicorn workers on the host, so version bumps made by one
+# worker are seen by the others (a local-memory cache would not be).
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', os.path.join(tempfile.gettempdir(), 'sssit-cache')),
+        'OPTIONS': {'MAX_ENTRIES': int(os.environ.get('CACHE_MAX_ENTRIES', 2000))},
     }
 }
+
 CORS_ALLOW_ALL_ORIGINS = True
 CORS_ALLOW_CREDENTIALS = True
 
@@ -46,10 +46,12 @@ Including another URLconf
 from django.contrib import admin
 from django.views.generic import TemplateView
 from django.urls import path, include, re_path
+from page.media import serve_media
 
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/", include("page.urls")),
+    path("media/<path:path>", serve_media, name="media"),
 ]
 
 # React catch-all — GET only
@@ -60,5 +62,5 @@ def react_view(request):
     return TemplateView.as_view(template_name="index.html")(request)
 
 urlpatterns += [
-    re_path(r"^(?!api/|assets/|admin/).*$", react_view),
+    re_path(r"^(?!api/|assets/|admin/|media/).*$", react_view),
 ]
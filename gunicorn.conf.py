@@ -0,0 +1,72 @@
+"""
+Gunicorn settings. Render starts the app with threaded WSGI workers:
+
+    gunicorn -c gunicorn.conf.py SSSIT.wsgi:application
+
+ASGI is opt-in. Set GUNICORN_WORKER_CLASS=uvicorn_worker.UvicornWorker
+and point gunicorn at SSSIT.asgi:application instead. Every value can be
+overridden from the environment.
+
+Sizing
+------
+gthread: each worker is one process with GUNICORN_THREADS request
+threads. The threads live as long as the worker, so every thread keeps
+its database connection (CONN_MAX_AGE) and the SQLite PRAGMAs are run
+once per thread, not once per request.
+
+uvicorn: each worker is one process with one event loop. Django runs
+every sync view (all the DRF views) in a thread of its own for that
+request (a ThreadSensitiveContext), and async views send their ORM calls
+to that same per-request thread. Because the thread is new for every
+request, so is its database connection: the connection reuse above does
+not apply. CPU work in the async views (openpyxl, Pillow) goes to
+ASYNC_OFFLOAD_THREADS pool threads; because of the GIL, more than 2-4
+per worker adds latency, not throughput.
+
+/api/events/ (the SSE change feed) is the one long-lived endpoint. Under
+gthread an open stream would keep one of the GUNICORN_THREADS busy for its
+whole life, so four open terminals would stall a worker; the feed
+therefore ends each WSGI response after the pending events and clients
+reconnect every few seconds, which costs a thread for a few milliseconds
+per poll. Under uvicorn streams stay open and a waiting stream holds no
+thread, only a per-second database check. Either way GUNICORN_THREADS
+does not need to grow with the number of feed clients.
+
+``python manage.py benchmark_servers`` measures both setups on the
+current machine. On a single core, gthread serves the light endpoints
+faster; uvicorn keeps them responsive while exports run.
+
+Workers
+-------
+About one worker per CPU core plus one, capped by memory: a worker idles
+at roughly 100 MB and an xlsx export or photo re-encode adds up to
+another 100 MB. WEB_MEMORY_MB is the instance's memory (512 on Render's
+free and starter plans). The RUN_JOBS_WORKERS job workers render.yaml
+starts next to gunicorn take their share of it first, so that plan gets
+one web worker and one job worker.
+"""
+import multiprocessing
+import os
+
+# Peak resident memory of one worker, in MB
+WORKER_PEAK_MB = 200
+
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "gthread")
+memory_mb = int(os.environ.get("WEB_MEMORY_MB", 512))
+job_workers = int(os.environ.get("RUN_JOBS_WORKERS", 0))
+workers = int(os.environ.get(
+    "WEB_CONCURRENCY",
+    max(1, min(multiprocessing.cpu_count() + 1, memory_mb // WORKER_PEAK_MB - job_workers)),
+))
+threads = int(os.environ.get("GUNICORN_THREADS", 4))  # gthread only
+
+# Exports of every student can take a while on small instances
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 120))
+graceful_timeout = 30
+keepalive = 5
+
+# Recycle workers now and then so fragmented memory is returned
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", 2000))
+max_requests_jitter = 200
+
+accesslog = "-"
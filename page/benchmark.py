@@ -0,0 +1,249 @@
+"""
+Synthetic data and throwaway databases for the page benchmarks.
+
+Nothing here touches the configured database: ``benchmark_database()``
+creates and migrates a separate test database (in memory for SQLite
+unless a file path is given), points the default connection at it for the duration of the block and
+destroys it afterwards.
+"""
+import random
+import statistics
+import string
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+from django.db import close_old_connections, connection
+from django.test.utils import CaptureQueriesContext
+
+from . import rollups
+from .models import Batch, Break, Course, ExamAttempt, Faculty, FeeReceipt, FeeSummary, Student
+
+COURSES = [
+    "Python", "Java", "C", "C++", "Web Design", "Tally", "MS Office",
+    "Data Science", "React", "Django", "Digital Marketing", "DTP",
+]
+BATCH_TIMES = ["7-8 AM", "8-9 AM", "9-10 AM", "10-11 AM", "11-12 PM", "4-5 PM", "5-6 PM", "6-7 PM"]
+START_DATE = date(2022, 1, 1)
+DAYS = 365 * 3
+
+
+@contextmanager
+def benchmark_database(path=None, verbosity=0):
+    """
+    Run the block against a freshly migrated throwaway database. SQLite
+    test databases live in memory unless a file ``path`` is given, which
+    concurrency tests need so each thread gets a real connection.
+    """
+    old_name = connection.settings_dict["NAME"]
+    if path is not None:
+        connection.settings_dict["TEST"]["NAME"] = str(path)
+    connection.creation.create_test_db(verbosity=verbosity, autoclobber=True, serialize=False)
+    try:
+        yield connection
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=verbosity)
+
+
+def _name(rng, length=7):
+    return rng.choice(string.ascii_uppercase) + "".join(rng.choices(string.ascii_lowercase, k=length - 1))
+
+
+def seed_database(students=5000, receipts_per_student=3, breaks_per_student=1,
+                  faculties=20, batches_per_faculty=50, seed=0, batch_size=1000):
+    """
+    Fill the current database with a reproducible synthetic institute.
+    Returns a dict with the row counts written.
+    """
+    rng = random.Random(seed)
+
+    Course.objects.bulk_create([Course(name=name) for name in COURSES], ignore_conflicts=True)
+
+    faculty_rows = Faculty.objects.bulk_create([
+        Faculty(faculty_name=f"{_name(rng)} {_name(rng, 5)}", batch_details=rng.choice(BATCH_TIMES),
+                subjects=rng.sample(COURSES, 3))
+        for _ in range(faculties)
+    ])
+    faculty_names = [f.faculty_name for f in faculty_rows]
+
+    Batch.objects.bulk_create(
+        [
+            Batch(
+                faculty=faculty,
+                label=f"B{i + 1}",
+                date=START_DATE + timedelta(days=rng.randrange(DAYS)),
+                batch_time=rng.choice(BATCH_TIMES),
+                subject=rng.choice(faculty.subjects),
+            ).parse_batch_time()
+            for faculty in faculty_rows
+            for i in range(batches_per_faculty)
+        ],
+        batch_size=batch_size,
+    )
+
+    Student.objects.bulk_create(
+        [
+            Student(
+                studentname=f"{_name(rng)} {_name(rng, 5)}",
+                regno=1000 + i,
+                father_name=_name(rng),
+                facultyname=rng.choice(faculty_names),
+                batchtime=rng.choice(BATCH_TIMES),
+                course=rng.choice(COURSES),
+                date_of_joining=START_DATE + timedelta(days=rng.randrange(DAYS)),
+                contact=str(rng.randrange(6000000000, 9999999999)),
+                email=f"student{i}@example.com",
+                total_fees=rng.choice([3000, 5000, 8000, 12000]),
+            )
+            for i in range(students)
+        ],
+        batch_size=batch_size,
+    )
+
+    receipts, breaks, attempts = [], [], []
+    for student_id, total_fees, joined, course in Student.objects.values_list(
+        "id", "total_fees", "date_of_joining", "course"
+    ).iterator():
+        instalment = total_fees // max(receipts_per_student + 1, 1)
+        for n in range(receipts_per_student):
+            receipts.append(FeeReceipt(
+                student_id=student_id, receipt_no=f"R{student_id}-{n}", total_fees=total_fees,
+                amount=instalment, date=joined + timedelta(days=30 * n),
+            ))
+        for n in range(breaks_per_student):
+            start = joined + timedelta(days=rng.randrange(20, 200))
+            breaks.append(Break(
+                student_id=student_id, from_date=start,
+                to_date=start + timedelta(days=rng.randrange(3, 30)), reason="Synthetic",
+            ))
+        if rng.random() < 0.5:
+            attempts.append(ExamAttempt(
+                student_id=student_id, course=course, hallticket_no=f"HT{student_id}",
+                exam_date=joined + timedelta(days=90), certificate_status=rng.choice(["", "Yes", "No"]),
+            ))
+
+    FeeReceipt.objects.bulk_create(receipts, batch_size=batch_size)
+    Break.objects.bulk_create(breaks, batch_size=batch_size)
+    ExamAttempt.objects.bulk_create(attempts, batch_size=batch_size)
+    FeeSummary.rebuild_all(batch_size=batch_size)
+    rollups.rebuild()
+
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE")
+
+    return {
+        "students": students,
+        "receipts": len(receipts),
+        "breaks": len(breaks),
+        "exam_attempts": len(attempts),
+        "batches": faculties * batches_per_faculty,
+    }
+
+
+def time_call(func, repeat=5):
+    """Best-of-``repeat`` wall time of ``func()`` in milliseconds."""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        elapsed = (time.perf_counter() - started) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of ``samples`` (``pct`` in 0-100)."""
+    ordered = sorted(samples)
+    rank = max(1, round(pct / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def _consume(response):
+    if response.streaming:
+        return sum(len(chunk) for chunk in response.streaming_content)
+    return len(response.content)
+
+
+def profile_requests(send, repeat):
+    """
+    Call ``send(i)`` (which issues one request and returns the response)
+    ``repeat`` times and summarise latency, SQL queries and response size.
+    Streaming bodies are read to the end so they are timed in full. Peak
+    Python memory comes from one extra traced call, kept out of the
+    timings because tracemalloc slows allocation down.
+    """
+    latencies, queries, statuses = [], [], {}
+    size = 0
+    for i in range(repeat):
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            response = send(i)
+            size = _consume(response)
+            latencies.append((time.perf_counter() - started) * 1000)
+        queries.append(len(captured))
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    tracemalloc.start()
+    try:
+        _consume(send(repeat))
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "requests": repeat,
+        "status": {str(code): count for code, count in sorted(statuses.items())},
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p90_ms": round(percentile(latencies, 90), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+        "mean_ms": round(statistics.fmean(latencies), 3),
+        "queries": max(queries),
+        "peak_kib": round(peak / 1024, 1),
+        "bytes": size,
+    }
+
+
+def stress_fee_postings(writers=8, payments_each=25):
+    """
+    Post fee receipts for one student from ``writers`` threads at once,
+    each thread on its own connection. Every posting is a read-then-write
+    transaction (ledger check, insert, ledger update), the pattern that
+    trips "database is locked" under SQLite's default locking.
+
+    Returns ``{"ok": n, "errors": {message: count}, "seconds": t}``.
+    """
+    student = Student.objects.create(
+        studentname="Stress Test", regno=999999, course="Python",
+        contact="9999999999", total_fees=writers * payments_each,
+    )
+    errors = {}
+    ok = [0]
+    lock = threading.Lock()
+    barrier = threading.Barrier(writers)
+
+    def post():
+        barrier.wait()
+        try:
+            for _ in range(payments_each):
+                try:
+                    FeeReceipt.objects.create(student_id=student.id, amount=1)
+                    with lock:
+                        ok[0] += 1
+                except Exception as exc:
+                    with lock:
+                        message = f"{type(exc).__name__}: {exc}"
+                        errors[message] = errors.get(message, 0) + 1
+        finally:
+            connection.close()
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=post) for _ in range(writers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    close_old_connections()
+
+    return {"ok": ok[0], "errors": errors, "seconds": round(time.perf_counter() - started, 3)}
@@ -0,0 +1,108 @@
+import hashlib
+import secrets
+import threading
+import time
+from collections import Counter
+
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework.response import Response
+
+from .conditional import ConditionalGetMixin
+
+VERSION_KEY = "page:version:%s"
+RESPONSE_KEY = "page:response:%s:%s"
+RESPONSE_TIMEOUT = 24 * 60 * 60
+
+# Per-process hit/miss counters, keyed by model name
+_stats_lock = threading.Lock()
+_hits = Counter()
+_misses = Counter()
+
+
+# -------------------------------------------------------------
+# VERSIONS
+# -------------------------------------------------------------
+def get_version(name):
+    """
+    Current version of ``name``'s data. A missing key (first use, or the
+    entry was culled) restarts from the clock so it can never land on a
+    version some stale cached response was stored under.
+    """
+    key = VERSION_KEY % name
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(name):
+    """
+    Move ``name`` to a new version. The file cache has no atomic ``incr``
+    (it reads, adds and writes back), so two processes bumping together
+    could both write the same number and one bump would be lost. Writing
+    a fresh value instead needs no read: whichever write lands last, the
+    version differs from every earlier one.
+    """
+    cache.set(VERSION_KEY % name, f"{time.time_ns()}-{secrets.token_hex(4)}", timeout=None)
+
+
+def bump_version_on_commit(name):
+    """Bump once the write is committed, so no reader re-caches old rows."""
+    transaction.on_commit(lambda: bump_version(name))
+
+
+def cache_stats():
+    with _stats_lock:
+        names = sorted(set(_hits) | set(_misses))
+        return {
+            name: {"hits": _hits[name], "misses": _misses[name], "version": get_version(name)}
+            for name in names
+        }
+
+
+# -------------------------------------------------------------
+# CACHED RESPONSES
+# -------------------------------------------------------------
+class CachedResponseMixin(ConditionalGetMixin):
+    """
+    Read-through cache for ``list`` / ``retrieve`` of rarely changing
+    reference data.
+
+    Serialized responses are stored under the current version of the
+    model (and of ``cache_models``, for data nested in the payload) and
+    the request path. Save/delete signals bump the version, which orphans
+    every old entry at once. ETags come from the same versions, so a
+    cache hit or a 304 never touches the database.
+    """
+    cache_models = ()
+
+    def get_cache_versions(self):
+        names = (self.queryset.model._meta.model_name,) + tuple(self.cache_models)
+        return [(name, get_version(name)) for name in names]
+
+    def get_change_stamp(self, queryset):
+        return self.get_cache_versions(), None
+
+    def conditional_response(self, request, queryset, respond, variant=()):
+        name = queryset.model._meta.model_name
+
+        def cached_response():
+            digest = hashlib.md5(repr([self.get_cache_versions(), request.get_full_path(), *variant]).encode())
+            key = RESPONSE_KEY % (name, digest.hexdigest())
+
+            data = cache.get(key)
+            if data is not None:
+                with _stats_lock:
+                    _hits[name] += 1
+                return Response(data)
+
+            with _stats_lock:
+                _misses[name] += 1
+            response = respond()
+            if response.status_code == 200:
+                cache.set(key, response.data, RESPONSE_TIMEOUT)
+            return response
+
+        return super().conditional_response(request, queryset, cached_response, variant)
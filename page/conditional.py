@@ -0,0 +1,81 @@
+import hashlib
+from calendar import timegm
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+
+# -------------------------------------------------------------
+# CONDITIONAL GET (ETag / Last-Modified)
+# -------------------------------------------------------------
+class ConditionalGetMixin:
+    """
+    ETag / Last-Modified handling for ``list`` and ``retrieve``.
+
+    The validators come from one aggregate (max ``updated_at`` and row
+    count) over the same filtered queryset the response is built from, so
+    a matching ``If-None-Match`` gets a 304 before anything is serialized.
+    The count catches deletes, which leave no ``updated_at`` behind.
+
+    ``etag_related`` lists relations whose rows show up in the payload
+    (nested breaks, a denormalized ``student_name``...) so changes to them
+    invalidate the response too.
+    """
+    etag_related = ()
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        return self.conditional_response(
+            request, queryset, lambda: super(ConditionalGetMixin, self).list(request, *args, **kwargs)
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup = self.lookup_url_kwarg or self.lookup_field
+        queryset = self.get_queryset().filter(**{self.lookup_field: kwargs[lookup]})
+        return self.conditional_response(
+            request, queryset, lambda: super(ConditionalGetMixin, self).retrieve(request, *args, **kwargs)
+        )
+
+    def get_change_stamp(self, queryset):
+        """``(parts, last_modified)`` describing the current state of ``queryset``."""
+        querysets = [queryset.order_by()]
+        for name in self.etag_related:
+            field = queryset.model._meta.get_field(name)
+            if field.many_to_one:
+                related = field.related_model.objects.filter(pk__in=queryset.values(field.attname))
+            else:
+                related = field.related_model.objects.filter(
+                    **{f"{field.field.name}__in": queryset.values("pk")}
+                )
+            querysets.append(related.order_by())
+
+        parts, last = [], None
+        for qs in querysets:
+            stamp = qs.aggregate(last=Max("updated_at"), count=Count("pk"))
+            parts += [stamp["last"], stamp["count"]]
+            if stamp["last"] is not None and (last is None or stamp["last"] > last):
+                last = stamp["last"]
+        return parts, last
+
+    def conditional_response(self, request, queryset, respond, variant=()):
+        """
+        ``variant`` holds request state that changes the payload without
+        showing in the URL, such as a window defaulting to today.
+        """
+        parts, last = self.get_change_stamp(queryset)
+        key = repr([queryset.model._meta.label, request.get_full_path(), *variant, *parts])
+        etag = '"%s"' % hashlib.md5(key.encode()).hexdigest()
+        last_modified = timegm(last.utctimetuple()) if last else None
+
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = respond()
+
+        if response.status_code in (200, 304):
+            # Browsers must revalidate rather than reuse a heuristic-fresh copy
+            patch_cache_control(response, no_cache=True)
+            response["ETag"] = etag
+            if last_modified is not None:
+                response["Last-Modified"] = http_date(last_modified)
+        return response
@@ -0,0 +1,229 @@
+"""
+Change feed behind ``/api/events/`` (Server-Sent Events).
+
+post_save / post_delete on the page models record compact events in the
+``ChangeEvent`` table, inside the writing transaction, so they appear
+when the write commits::
+
+    id: 118
+    data: {"model":"student","id":42,"op":"update","version":"2025-01-07T10:00:00.123456Z"}
+
+``version`` is the row's ``updated_at`` (null for deletes), so clients
+can ignore events older than their copy. Writes that bypass signals
+(bulk_create, ``update()``) are recorded by their call sites with
+``publish_many``.
+
+The table is shared by every gunicorn worker and by ``run_jobs``, so a
+stream sees writes made in any process. Ids are the event row ids; SQLite
+runs one writer at a time, so they are assigned in commit order. A client
+reconnecting with a ``Last-Event-ID`` older than the retained events
+(``CHANGE_FEED_RETENTION_HOURS``, pruned by ``run_jobs``) or not from this
+feed gets a ``reset`` event instead, and should resync with
+``?updated_since=``.
+
+Serving
+-------
+Under ASGI a stream stays open for ``CHANGE_FEED_STREAM_SECONDS`` and
+checks the table every ``POLL_SECONDS``; waiting holds no thread. Under
+WSGI an open stream would hold one of the worker's GUNICORN_THREADS for
+its whole life, so the stream answers with the pending events and ends
+at once; EventSource reconnects after ``RETRY_MS`` with Last-Event-ID,
+which makes each client one short request every few seconds.
+"""
+import asyncio
+import json
+import time
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.apps import apps
+from django.conf import settings
+from django.db.models import Max, Min
+from django.utils import timezone
+
+# Events kept for resuming clients
+RETENTION = timedelta(hours=getattr(settings, "CHANGE_FEED_RETENTION_HOURS", 24))
+# How often an open (ASGI) stream checks for new events
+POLL_SECONDS = 1.0
+# Comment line sent when nothing happened for this long, so proxies keep
+# the connection open
+HEARTBEAT_SECONDS = 15
+# EventSource reconnect delay asked of clients, in milliseconds
+RETRY_MS = 3000
+# Most events sent in one batch; the rest follow on the next poll
+BATCH_SIZE = 500
+# Bookkeeping tables derived from the other models; never published
+UNPUBLISHED_MODELS = (
+    "tombstone", "changeevent", "feesummary", "enrolmentrollup", "feecollectionrollup", "certificaterollup",
+)
+
+
+def _events():
+    return apps.get_model("page", "ChangeEvent")
+
+
+# -------------------------------------------------------------
+# PUBLISHING
+# -------------------------------------------------------------
+def published_models():
+    """The page models whose saves and deletes go out on the feed."""
+    return [
+        model for model in apps.get_app_config("page").get_models()
+        if model._meta.model_name not in UNPUBLISHED_MODELS
+    ]
+
+
+def _version(value):
+    if value is None:
+        return None
+    if settings.USE_TZ and timezone.is_aware(value):
+        value = value.astimezone(timezone.get_current_timezone())
+    value = value.isoformat()
+    return value[:-6] + "Z" if value.endswith("+00:00") else value
+
+
+def publish(model, pk, op, version=None):
+    _events().objects.create(model=model, object_id=pk, op=op, version=version)
+
+
+def publish_many(model, pks, op="update"):
+    """Events for rows written without signals (``bulk_create``, ``update()``)."""
+    ChangeEvent = _events()
+    name = model._meta.model_name
+    ChangeEvent.objects.bulk_create(
+        [ChangeEvent(model=name, object_id=pk, op=op) for pk in pks], batch_size=BATCH_SIZE
+    )
+
+
+def record_save(sender, instance, created, raw=False, **kwargs):
+    if not raw:
+        publish(sender._meta.model_name, instance.pk, "create" if created else "update",
+                getattr(instance, "updated_at", None))
+
+
+def record_delete(sender, instance, **kwargs):
+    publish(sender._meta.model_name, instance.pk, "delete")
+
+
+def prune(retention=RETENTION):
+    """
+    Delete events older than ``retention``; returns how many went. The
+    newest event is always kept so ids stay comparable after a quiet spell.
+    """
+    deleted, _ = _events().objects.filter(
+        created_at__lt=timezone.now() - retention, id__lt=latest_id()
+    ).delete()
+    return deleted
+
+
+# -------------------------------------------------------------
+# READING
+# -------------------------------------------------------------
+def parse_id(event_id):
+    """Sequence number for a ``Last-Event-ID`` from this feed, or None."""
+    event_id = (event_id or "").strip()
+    return int(event_id) if event_id.isdigit() else None
+
+
+def latest_id():
+    return _events().objects.aggregate(latest=Max("id"))["latest"] or 0
+
+
+def since(sequence, models=None):
+    """
+    ``(events, latest, complete)``: up to ``BATCH_SIZE`` ``(id, event)``
+    pairs after ``sequence`` (only ``models``, when given), the id to resume
+    from, and whether ``sequence`` is still covered (False once events
+    after it were pruned, or for an id the feed never handed out).
+    """
+    ChangeEvent = _events()
+    bounds = ChangeEvent.objects.aggregate(oldest=Min("id"), latest=Max("id"))
+    oldest, latest = bounds["oldest"] or 1, bounds["latest"] or 0
+    if not oldest - 1 <= sequence <= latest:
+        return [], latest, False
+
+    rows = ChangeEvent.objects.filter(id__gt=sequence).order_by("id")
+    if models is not None:
+        rows = rows.filter(model__in=models)
+    rows = list(rows.values_list("id", "model", "object_id", "op", "version")[:BATCH_SIZE])
+    if len(rows) == BATCH_SIZE:
+        latest = rows[-1][0]
+    elif rows:
+        # Committed after the bounds were read
+        latest = max(latest, rows[-1][0])
+    events = [
+        (pk, {"model": model, "id": object_id, "op": op, "version": _version(version)})
+        for pk, model, object_id, op, version in rows
+    ]
+    return events, latest, True
+
+
+# -------------------------------------------------------------
+# SSE STREAMS
+# -------------------------------------------------------------
+def format_event(sequence, event):
+    data = json.dumps(event, separators=(",", ":"))
+    return f"id: {sequence}\ndata: {data}\n\n"
+
+
+def _reset(latest):
+    data = json.dumps({"reason": "Events since your last id are not available; resync with updated_since"})
+    return f"id: {latest}\nevent: reset\ndata: {data}\n\n"
+
+
+def _next(sequence, models):
+    """Lines for the events after ``sequence`` and the id to continue from."""
+    events, latest, complete = since(sequence, models)
+    if not complete:
+        return [_reset(latest)], latest
+    lines = [format_event(pk, event) for pk, event in events]
+    if latest != sequence and (not events or events[-1][0] != latest):
+        # Events for other models moved the cursor; the client keeps it
+        lines.append(f"id: {latest}\n\n")
+    return lines, latest
+
+
+def _start(last_event_id, models):
+    """Opening lines and the id to stream from."""
+    lines = [f"retry: {RETRY_MS}\n\n"]
+    sequence = parse_id(last_event_id)
+    if sequence is not None:
+        more, sequence = _next(sequence, models)
+        return lines + more, sequence
+    latest = latest_id()
+    if last_event_id:
+        lines.append(_reset(latest))
+    else:
+        # Nothing is replayed to new clients; they just get the current id
+        lines.append(f"id: {latest}\n\n")
+    return lines, latest
+
+
+def iter_events(last_event_id, models):
+    """
+    Sync (WSGI) response: the pending events and nothing more. Holding
+    the stream open would tie up a worker thread per client.
+    """
+    lines, _ = _start(last_event_id, models)
+    yield "".join(lines)
+
+
+async def aiter_events(last_event_id, models, duration):
+    """ASGI stream; ends after ``duration`` seconds and the client reconnects."""
+    lines, sequence = await sync_to_async(_start)(last_event_id, models)
+    yield "".join(lines)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + duration
+    quiet_since = time.monotonic()
+    while True:
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            return
+        await asyncio.sleep(min(POLL_SECONDS, remaining))
+        lines, sequence = await sync_to_async(_next)(sequence, models)
+        if lines:
+            quiet_since = time.monotonic()
+            yield "".join(lines)
+        elif time.monotonic() - quiet_since >= HEARTBEAT_SECONDS:
+            quiet_since = time.monotonic()
+            yield ": ping\n\n"
@@ -0,0 +1,107 @@
+import csv
+import tempfile
+
+import openpyxl
+from django.db.models import F
+
+from .filters import filter_due, filter_students_queryset
+from .models import Student
+from .offload import aiter_chunks, run_in_pool
+
+
+# Header shown in the sheet -> Student field (with fee totals annotated)
+EXPORT_COLUMNS = [
+    ("regno", "regno"),
+    ("studentname", "studentname"),
+    ("DOJ", "date_of_joining"),
+    ("course", "course"),
+    ("contact", "contact"),
+    ("email", "email"),
+    ("total_fees", "total_fees"),
+    ("paid_fees", "paid_fees"),
+    ("due_fees", "due_fees"),
+]
+
+EXPORT_HEADERS = ["S.No"] + [header for header, _ in EXPORT_COLUMNS]
+
+CHUNK_SIZE = 2000
+
+
+def export_queryset(params):
+    """Filtered students with fee totals, newest joiners first."""
+    queryset = filter_students_queryset(Student.objects.with_fee_totals(), params)
+    queryset = filter_due(queryset, params)
+    return queryset.order_by(F("date_of_joining").desc(nulls_last=True), "id")
+
+
+def export_rows(params):
+    """
+    Yield one tuple per filtered student (newest joiners first), prefixed
+    with a running serial number. Rows are read in chunks with
+    ``iterator()`` so the full result set is never held in memory.
+    """
+    fields = [field for _, field in EXPORT_COLUMNS]
+    rows = export_queryset(params).values_list(*fields).iterator(chunk_size=CHUNK_SIZE)
+    for serial, row in enumerate(rows, start=1):
+        yield (serial,) + row
+
+
+def new_workbook():
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet("Students")
+    ws.append(EXPORT_HEADERS)
+    return wb, ws
+
+
+def append_rows(ws, rows):
+    for row in rows:
+        ws.append(row)
+
+
+def save_workbook(wb):
+    output = tempfile.TemporaryFile()
+    wb.save(output)
+    output.seek(0)
+    return output
+
+
+def write_xlsx(params):
+    """
+    Write the export with openpyxl's write-only workbook into a temporary
+    file and return it rewound, ready to be streamed.
+    """
+    wb, ws = new_workbook()
+    append_rows(ws, export_rows(params))
+    return save_workbook(wb)
+
+
+async def awrite_xlsx(params):
+    """``write_xlsx`` for async views: rows are read on Django's sync
+    thread, openpyxl runs in the offload pool."""
+    wb, ws = new_workbook()
+    async for rows in aiter_chunks(export_rows(params), CHUNK_SIZE):
+        await run_in_pool(append_rows, ws, rows)
+    return await run_in_pool(save_workbook, wb)
+
+
+class _Echo:
+    """File-like object whose write() just hands the line back."""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(params):
+    """Yield the export as CSV lines, one row at a time."""
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_HEADERS)
+    for row in export_rows(params):
+        yield writer.writerow(row)
+
+
+async def aiter_csv(params):
+    """``iter_csv`` for async views, one chunk of rows per yield."""
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_HEADERS)
+    async for rows in aiter_chunks(export_rows(params), CHUNK_SIZE):
+        yield "".join(writer.writerow(row) for row in rows)
@@ -0,0 +1,254 @@
+"""
+Opt-in fast list responses (``?fast=1``) for the large list endpoints.
+
+``ModelSerializer`` builds a model instance per row and walks every field
+through ``get_attribute`` / ``to_representation``. For serializers made of
+plain column fields (StudentSerializer, FeeReceiptSerializer) the same
+JSON can come straight from ``values_list()`` tuples: ``compile_plan``
+turns the view's serializer into one lookup and one converter per
+column, and the rows are encoded a chunk at a time into a streamed JSON
+array.
+
+The plan is compiled from the serializer instance the view would have
+used, so ``?fields=`` and later serializer changes keep the output
+identical. Serializers with anything the plan cannot reproduce (method
+fields, custom ``to_representation``, nested serializers other than a
+reverse foreign key) make ``compile_plan`` return None and the view falls
+back to the regular path.
+"""
+import json
+from itertools import islice
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+
+from .offload import aiter_chunks, serving_async
+
+# Rows fetched, converted and encoded per streamed block
+CHUNK_SIZE = 500
+
+TEXT_FIELDS = (models.CharField, models.TextField)
+
+
+class RowPlan:
+    """
+    How to build one serializer's output from a ``values_list`` row.
+    ``columns`` holds ``(key, lookup, converter)``; a converter of None
+    passes the database value through, and nested plans are stored with
+    ``lookup`` "pk" and the child ``RowPlan`` plus its foreign key.
+    """
+
+    def __init__(self, model, columns, nested):
+        self.model = model
+        self.columns = columns
+        self.nested = nested
+        self.keys = [key for key, _, _ in columns]
+        self.lookups = ["pk"] + [lookup for _, lookup, _ in columns]
+
+    def rows(self, tuples):
+        """Output dicts for ``tuples`` laid out as ``self.lookups``."""
+        tuples = list(tuples)
+        converters = [converter for _, _, converter in self.columns]
+        if self.nested:
+            pks = [row[0] for row in tuples]
+            for index, (key, _, _) in enumerate(self.columns):
+                if key in self.nested:
+                    plan, fk = self.nested[key]
+                    converters[index] = plan.children(fk, pks).__getitem__
+
+        keys = self.keys
+        return [
+            dict(zip(keys, [
+                value if convert is None or value is None else convert(value)
+                for convert, value in zip(converters, row[1:])
+            ]))
+            for row in tuples
+        ]
+
+    def children(self, fk, parent_pks):
+        """``{parent pk: [child dicts]}`` with the related model's default ordering."""
+        related = self.model._default_manager.filter(**{f"{fk}__in": parent_pks})
+        ordering = list(related.query.order_by or self.model._meta.ordering) + ["pk"]
+        grouped = {pk: [] for pk in parent_pks}
+        tuples = list(related.order_by(*ordering).values_list(fk, *self.lookups))
+        for parent, item in zip((row[0] for row in tuples), self.rows(row[1:] for row in tuples)):
+            grouped[parent].append(item)
+        return grouped
+
+    def iter_json(self, queryset, chunk_size=CHUNK_SIZE):
+        """Yield ``queryset`` as a JSON array, one encoded block per chunk of rows."""
+        tuples = queryset.prefetch_related(None).values_list(*self.lookups).iterator(chunk_size=chunk_size)
+        return self.encode_chunks(iter(lambda: list(islice(tuples, chunk_size)), []))
+
+    def encode_chunks(self, chunks):
+        """JSON array blocks for an iterable of ``values_list`` row lists."""
+        separator = b"["
+        for chunk in chunks:
+            yield separator + encode(self.rows(chunk))[1:-1]
+            separator = b","
+        yield b"[]" if separator == b"[" else b"]"
+
+
+def encode(data):
+    """JSON bytes exactly as DRF's JSONRenderer writes them."""
+    text = json.dumps(
+        data,
+        ensure_ascii=not api_settings.UNICODE_JSON,
+        allow_nan=not api_settings.STRICT_JSON,
+        separators=(",", ":") if api_settings.COMPACT_JSON else None,
+    )
+    return text.replace("\u2028", "\\u2028").replace("\u2029", "\\u2029").encode()
+
+
+# -------------------------------------------------------------
+# COLUMN CONVERTERS
+# -------------------------------------------------------------
+def _file_url(model_field, field, request):
+    storage = model_field.storage
+    use_url = getattr(field, "use_url", api_settings.UPLOADED_FILES_USE_URL)
+
+    def convert(name):
+        if not name:
+            return None
+        if not use_url:
+            return name
+        url = storage.url(name)
+        return request.build_absolute_uri(url) if request is not None else url
+    return convert
+
+
+def _datetime(field):
+    output_format = getattr(field, "format", api_settings.DATETIME_FORMAT)
+    if output_format is None:
+        return None
+    if output_format.lower() != ISO_8601:
+        return field.to_representation
+    tz = getattr(field, "timezone", None) or (timezone.get_current_timezone() if settings.USE_TZ else None)
+
+    def convert(value):
+        if tz is not None and timezone.is_aware(value):
+            value = value.astimezone(tz)
+        value = value.isoformat()
+        return value[:-6] + "Z" if value.endswith("+00:00") else value
+    return convert
+
+
+def _date(field):
+    output_format = getattr(field, "format", api_settings.DATE_FORMAT)
+    if output_format is None:
+        return None
+    if output_format.lower() != ISO_8601:
+        return field.to_representation
+    return lambda value: value.isoformat()
+
+
+def _column(model, field, request):
+    """``(lookup, converter)`` reproducing ``field``, or None when unsupported."""
+    names = field.source.split(".")
+    if field.source == "*" or len(names) > 2:
+        return None
+    try:
+        model_field = model._meta.get_field(names[0])
+        if len(names) == 2:
+            # One hop over a foreign key, e.g. ``student.studentname``
+            if not model_field.many_to_one:
+                return None
+            model_field = model_field.related_model._meta.get_field(names[1])
+    except FieldDoesNotExist:
+        return None
+    if not model_field.concrete:
+        return None
+    lookup = "__".join(names)
+
+    if isinstance(field, serializers.PrimaryKeyRelatedField):
+        if field.pk_field is not None or not model_field.many_to_one:
+            return None
+        return lookup, None
+    if isinstance(field, serializers.FileField):
+        return lookup, _file_url(model_field, field, request)
+    if isinstance(field, serializers.DateTimeField):
+        return lookup, _datetime(field)
+    if isinstance(field, serializers.DateField):
+        return lookup, _date(field)
+    if isinstance(field, serializers.IntegerField):
+        return lookup, str if getattr(field, "coerce_to_string", False) else None
+    if isinstance(field, serializers.CharField):
+        return lookup, None if isinstance(model_field, TEXT_FIELDS) else str
+    return None
+
+
+def compile_plan(serializer, request=None):
+    """``RowPlan`` producing ``serializer``'s output (a ModelSerializer instance), or None."""
+    if type(serializer).to_representation is not serializers.Serializer.to_representation:
+        return None
+    model = serializer.Meta.model
+
+    columns, nested = [], {}
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        if isinstance(field, serializers.ListSerializer):
+            try:
+                relation = model._meta.get_field(field.source)
+            except FieldDoesNotExist:
+                return None
+            if not relation.one_to_many or relation.concrete:
+                return None
+            child = compile_plan(field.child, request)
+            if child is None:
+                return None
+            nested[name] = (child, relation.field.name)
+            columns.append((name, "pk", None))
+            continue
+        if isinstance(field, serializers.BaseSerializer):
+            return None
+        column = _column(model, field, request)
+        if column is None:
+            return None
+        columns.append((name, *column))
+    return RowPlan(model, columns, nested)
+
+
+async def _aiter_blocks(blocks):
+    async for group in aiter_chunks(blocks, size=1):
+        yield group[0]
+
+
+# -------------------------------------------------------------
+# VIEWSET MIXIN
+# -------------------------------------------------------------
+class FastListMixin:
+    """
+    ``list`` with ``?fast=1`` streams rows built by ``compile_plan``
+    instead of serializing model instances. Paginated requests, non-JSON
+    renderers and serializers the plan cannot reproduce take the regular
+    path, so the flag is always safe to send.
+    """
+    fast_list_param = "fast"
+
+    def list(self, request, *args, **kwargs):
+        if request.query_params.get(self.fast_list_param) in ("1", "true", "True"):
+            response = self.fast_list(request)
+            if response is not None:
+                return response
+        return super().list(request, *args, **kwargs)
+
+    def fast_list(self, request):
+        if getattr(request, "accepted_renderer", None) is None or request.accepted_renderer.format != "json":
+            return None
+        paginator = self.paginator
+        if paginator is not None and getattr(paginator, "is_requested", lambda request: True)(request):
+            return None
+        plan = compile_plan(self.get_serializer(), request)
+        if plan is None:
+            return None
+
+        blocks = plan.iter_json(self.filter_queryset(self.get_queryset()))
+        if serving_async(request):
+            blocks = _aiter_blocks(blocks)
+        return StreamingHttpResponse(blocks, content_type="application/json")
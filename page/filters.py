@@ -0,0 +1,145 @@
+from django.db.models import Q
+from django.utils.dateparse import parse_date
+from rest_framework.exceptions import ValidationError
+
+from .models import ExamAttempt
+
+
+def date_param(params, name):
+    """
+    ``params[name]`` as a date, None when absent. Malformed dates raise
+    ValidationError (``{"error": ...}``), which DRF views answer with a
+    400; plain Django views catch it.
+    """
+    value = params.get(name)
+    if not value:
+        return None
+    try:
+        day = parse_date(str(value))
+    except ValueError:
+        day = None
+    if day is None:
+        raise ValidationError({"error": f"{name} must be YYYY-MM-DD"})
+    return day
+
+
+def number_param(params, name):
+    """
+    ``params[name]`` as an int, None when absent. Anything but digits
+    raises ValidationError (``{"error": ...}``) like ``date_param``.
+    """
+    value = params.get(name)
+    if value in (None, ""):
+        return None
+    if not str(value).isdigit():
+        raise ValidationError({"error": f"{name} must be a number"})
+    return int(value)
+
+
+# -------------------------------------------------------------
+# STUDENT FILTERS
+# -------------------------------------------------------------
+def filter_students_queryset(queryset, params):
+    """
+    Apply the shared student query-string filters to ``queryset``.
+
+    Supported parameters:
+        regno              exact register number
+        course             case-insensitive course name
+        start / end        date_of_joining range (either bound optional)
+        facultyname        case-insensitive faculty name
+        batchtime          exact batch time
+        certificate_status has an exam with this certificate status
+        exam_course        has an exam attempt for this course
+        q                  name or regno prefix
+        on_break           on a break on this date (YYYY-MM-DD)
+        active_on          enrolled and not on a break on this date
+    """
+    regno = number_param(params, "regno")
+    if regno is not None:
+        queryset = queryset.filter(regno=regno)
+
+    course = params.get("course")
+    if course:
+        queryset = queryset.filter(course__iexact=course)
+
+    start = date_param(params, "start")
+    if start:
+        queryset = queryset.filter(date_of_joining__gte=start)
+
+    end = date_param(params, "end")
+    if end:
+        queryset = queryset.filter(date_of_joining__lte=end)
+
+    facultyname = params.get("facultyname")
+    if facultyname:
+        queryset = queryset.filter(facultyname__iexact=facultyname)
+
+    batchtime = params.get("batchtime")
+    if batchtime:
+        queryset = queryset.filter(batchtime=batchtime)
+
+    cert_status = params.get("certificate_status")
+    exam_course = params.get("exam_course")
+    if cert_status or exam_course:
+        attempts = ExamAttempt.objects.all()
+        if cert_status:
+            attempts = attempts.filter(certificate_status=cert_status)
+        if exam_course:
+            attempts = attempts.filter(course=exam_course)
+        queryset = queryset.filter(pk__in=attempts.values("student_id"))
+
+    q = (params.get("q") or "").strip()
+    if q:
+        match = Q(studentname__istartswith=q)
+        if q.isdigit():
+            match |= Q(regno__startswith=q)
+        queryset = queryset.filter(match)
+
+    on_break = date_param(params, "on_break")
+    if on_break:
+        queryset = queryset.on_break(on_break)
+
+    active_on = date_param(params, "active_on")
+    if active_on:
+        queryset = queryset.active_on(active_on)
+
+    return queryset
+
+
+def filter_due(queryset, params):
+    """
+    With ``due=true``, keep only students with an outstanding balance.
+    ``queryset`` must be annotated with ``Student.objects.with_fee_totals()``.
+    """
+    if params.get("due") in ("1", "true", "True", True):
+        queryset = queryset.filter(due_fees__gt=0)
+    return queryset
+
+
+# -------------------------------------------------------------
+# EXAM ATTEMPT FILTERS
+# -------------------------------------------------------------
+def filter_exam_attempts(queryset, params):
+    """
+    Supported parameters: student, regno, course, certificate_status,
+    issued_status, exam_start / exam_end (exam_date range).
+    """
+    for param, lookup in (("student", "student_id"), ("regno", "student__regno")):
+        value = number_param(params, param)
+        if value is not None:
+            queryset = queryset.filter(**{lookup: value})
+
+    for param in ("course", "certificate_status", "issued_status"):
+        value = params.get(param)
+        if value not in (None, ""):
+            queryset = queryset.filter(**{param: value})
+
+    exam_start = date_param(params, "exam_start")
+    if exam_start:
+        queryset = queryset.filter(exam_date__gte=exam_start)
+
+    exam_end = date_param(params, "exam_end")
+    if exam_end:
+        queryset = queryset.filter(exam_date__lte=exam_end)
+    return queryset
@@ -0,0 +1,83 @@
+"""
+Student photo processing: bounded size, no EXIF, small web-friendly
+variants. Uploads from CameraCapture are full-resolution frames, so every
+photo is re-encoded once on upload and list views hand out thumbnails.
+"""
+import hashlib
+import io
+
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps, features
+
+MAX_SIZE = 1280
+VARIANT_SIZES = {
+    "medium": 480,
+    "small": 160,
+}
+QUALITY = 82
+
+if features.check("webp"):
+    FORMAT, EXTENSION = "WEBP", "webp"
+else:
+    FORMAT, EXTENSION = "JPEG", "jpg"
+
+
+def _encode(image, size):
+    copy = image.copy()
+    copy.thumbnail((size, size), Image.LANCZOS)
+    buffer = io.BytesIO()
+    # Saving without exif= drops all metadata
+    if FORMAT == "WEBP":
+        copy.save(buffer, FORMAT, quality=QUALITY, method=4)
+    else:
+        copy.save(buffer, FORMAT, quality=QUALITY, optimize=True, progressive=True)
+    return buffer.getvalue()
+
+
+def encode_variants(data):
+    """
+    Re-encode raw image bytes into the stored original and its variants.
+
+    Returns ``{"image": (name, bytes), "medium": ..., "small": ...}``. Names
+    are derived from a hash of the processed original, so a changed photo
+    always gets new URLs and the files can be cached forever. Pure
+    function of ``data``: safe to run in a worker process.
+    """
+    with Image.open(io.BytesIO(data)) as source:
+        image = ImageOps.exif_transpose(source)
+        if image.mode not in ("RGB", "RGBA") or (image.mode == "RGBA" and FORMAT == "JPEG"):
+            image = image.convert("RGB")
+
+        original = _encode(image, MAX_SIZE)
+        digest = hashlib.sha256(original).hexdigest()[:16]
+
+        encoded = {"image": (f"{digest}.{EXTENSION}", original)}
+        for variant, size in VARIANT_SIZES.items():
+            encoded[variant] = (f"{digest}_{variant}.{EXTENSION}", _encode(image, size))
+    return encoded
+
+
+def apply_variants(student, encoded):
+    """Point ``student``'s image fields at freshly encoded files (saved with the model)."""
+    student._image_processed = True
+    name, data = encoded["image"]
+    student.image = ContentFile(data, name=name)
+    for variant in VARIANT_SIZES:
+        name, data = encoded[variant]
+        setattr(student, f"image_{variant}", ContentFile(data, name=name))
+
+
+def process_upload(student):
+    """
+    Replace a just-uploaded ``student.image`` with the processed original
+    and attach its variants. Files Pillow cannot decode are left untouched.
+    """
+    upload = student.image
+    upload.seek(0)
+    try:
+        encoded = encode_variants(upload.read())
+    except (OSError, ValueError, Image.DecompressionBombError):
+        upload.seek(0)
+        return False
+    apply_variants(student, encoded)
+    return True
@@ -0,0 +1,213 @@
+import codecs
+import csv
+import io
+import zipfile
+from datetime import datetime
+from itertools import islice
+
+import openpyxl
+from django.db import transaction
+from openpyxl.utils.exceptions import InvalidFileException
+
+from . import events, rollups
+from .models import ExamAttempt, Student
+from .offload import run_db, run_in_pool
+from .serializers import StudentSerializer
+
+BATCH_SIZE = 500
+# Bytes decoded at a time when checking a CSV's encoding
+ENCODING_CHECK_CHUNK = 64 * 1024
+
+
+class ImportFileError(ValueError):
+    """The upload cannot be read as a CSV or XLSX file at all."""
+
+
+class UploadRows:
+    """
+    ``(row_number, dict)`` iterator over an upload. ``total`` estimates
+    the data rows for progress reports (None when the file does not say):
+    the sheet's dimensions for XLSX, the line count for CSV.
+    """
+
+    def __init__(self, rows, total):
+        self._rows = rows
+        self.total = total
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self._rows)
+
+
+def read_rows(upload):
+    """
+    ``UploadRows`` for an uploaded CSV or XLSX file. The first row holds
+    the column names; row numbers match the sheet. Unreadable files (a
+    CSV that is not UTF-8, a corrupt or renamed workbook) raise
+    ImportFileError here, before any row is imported.
+    """
+    name = (upload.name or "").lower()
+
+    if name.endswith((".xlsx", ".xlsm")):
+        try:
+            wb = openpyxl.load_workbook(upload, read_only=True, data_only=True)
+        except (zipfile.BadZipFile, InvalidFileException, KeyError, OSError):
+            raise ImportFileError("The file is not a valid XLSX workbook")
+        max_row = wb.active.max_row
+        return UploadRows(_xlsx_rows(wb), max_row - 1 if max_row else None)
+
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    lines, last = 0, b""
+    try:
+        for chunk in iter(lambda: upload.read(ENCODING_CHECK_CHUNK), b""):
+            decoder.decode(chunk)
+            lines += chunk.count(b"\n")
+            last = chunk
+        decoder.decode(b"", final=True)
+    except UnicodeDecodeError:
+        raise ImportFileError("CSV files must be UTF-8 encoded (in Excel: Save As > CSV UTF-8)")
+    upload.seek(0)
+    if last and not last.endswith(b"\n"):
+        lines += 1
+    return UploadRows(_csv_rows(upload), max(lines - 1, 0))
+
+
+def _xlsx_rows(wb):
+    try:
+        rows = wb.active.iter_rows(values_only=True)
+        headers = [str(h).strip() if h is not None else "" for h in next(rows, [])]
+        for number, values in enumerate(rows, start=2):
+            if any(v not in (None, "") for v in values):
+                yield number, dict(zip(headers, values))
+    finally:
+        wb.close()
+
+
+def _csv_rows(upload):
+    text = io.TextIOWrapper(upload, encoding="utf-8-sig", newline="")
+    reader = csv.DictReader(text)
+    for number, row in enumerate(reader, start=2):
+        yield number, {(k or "").strip(): v for k, v in row.items()}
+
+
+def _clean(row):
+    """Drop blank cells and turn spreadsheet datetimes into dates."""
+    cleaned = {}
+    for key, value in row.items():
+        if not key or value is None:
+            continue
+        if isinstance(value, str):
+            value = value.strip()
+            if not value:
+                continue
+        elif isinstance(value, datetime):
+            value = value.date()
+        cleaned[key] = value
+    return cleaned
+
+
+class StudentImport:
+    """
+    Validate and insert students in batches.
+
+    Field validation runs through StudentSerializer with its per-row regno
+    query switched off; regno conflicts are instead checked with one query
+    per batch (plus the rows already seen in this file), and valid rows are
+    written with ``bulk_create``. ``arun`` is the async view variant: file
+    parsing and validation run in the offload pool, only the regno check
+    and inserts use the database thread.
+    """
+
+    def __init__(self, dry_run=False, batch_size=BATCH_SIZE, on_batch=None):
+        self.dry_run = dry_run
+        self.batch_size = batch_size
+        # Called with the importer after every batch (job progress)
+        self.on_batch = on_batch
+        self.total = 0
+        self.created = 0
+        self.errors = []
+        self._names_by_regno = {}
+
+    def run(self, rows):
+        rows = iter(rows)
+        while True:
+            batch = list(islice(rows, self.batch_size))
+            if not batch:
+                break
+            self._store_batch(self._validate_batch(batch))
+            if self.on_batch is not None:
+                self.on_batch(self)
+        return self.report()
+
+    async def arun(self, rows):
+        rows = iter(rows)
+        while True:
+            batch = await run_in_pool(lambda: list(islice(rows, self.batch_size)))
+            if not batch:
+                break
+            valid = await run_in_pool(self._validate_batch, batch)
+            await run_db(self._store_batch, valid)
+        return self.report()
+
+    def report(self):
+        """Counts so far; a dry run creates nothing and reports ``would_create`` instead."""
+        report = {
+            "dry_run": self.dry_run,
+            "total": self.total,
+            "created": self.created,
+            "failed": len(self.errors),
+            "errors": self.errors,
+        }
+        if self.dry_run:
+            report["created"], report["would_create"] = 0, self.created
+        return report
+
+    def _validate_batch(self, batch):
+        """Serializer validation only; never touches the database."""
+        valid = []
+        for number, row in batch:
+            self.total += 1
+            serializer = StudentSerializer(data=_clean(row), context={"skip_regno_check": True})
+            if serializer.is_valid():
+                valid.append((number, serializer.validated_data))
+            else:
+                self.errors.append({"row": number, "errors": serializer.errors})
+        return valid
+
+    def _store_batch(self, valid):
+        regnos = {data["regno"] for _, data in valid} - set(self._names_by_regno)
+        for regno, name in Student.objects.filter(regno__in=regnos).values_list("regno", "studentname"):
+            self._names_by_regno.setdefault(regno, set()).add((name or "").strip().lower())
+
+        students = []
+        for number, data in valid:
+            name = data["studentname"].strip().lower()
+            known = self._names_by_regno.setdefault(data["regno"], set())
+            if known and name not in known:
+                self.errors.append({
+                    "row": number,
+                    "errors": {"regno": ["❌ This regno already belongs to another student."]},
+                })
+                continue
+            known.add(name)
+            students.append(Student(**data))
+
+        if not self.dry_run and students:
+            with transaction.atomic():
+                Student.objects.bulk_create(students)
+                rollups.record_students(students)
+                events.publish_many(Student, (student.pk for student in students), "create")
+                self._create_exam_attempts(students)
+        self.created += len(students)
+
+    def _create_exam_attempts(self, students):
+        attempts = [
+            attempt
+            for student in students if student.Exam_Course
+            for attempt in student.build_exam_attempts()
+        ]
+        attempts = ExamAttempt.objects.bulk_create(attempts)
+        rollups.record_exam_attempts(attempts)
+        events.publish_many(ExamAttempt, (attempt.pk for attempt in attempts), "create")
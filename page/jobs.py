@@ -0,0 +1,228 @@
+"""
+Database-backed background jobs; no broker needed.
+
+Requests queue a ``Job`` row and return straight away; ``manage.py
+run_jobs`` worker processes claim queued rows one at a time, run the
+handler registered for the job's kind and store its result (and an
+artifact file for exports). Clients poll ``/api/jobs/<id>/`` and fetch
+the artifact from ``/api/jobs/<id>/download/``.
+
+Claiming is a conditional UPDATE inside an IMMEDIATE transaction, so any
+number of worker processes can share the queue without taking the same
+job twice. Jobs left "running" by a worker that died are put back in the
+queue by the other workers (``requeue_stale``, every REQUEUE_INTERVAL);
+the same housekeeping pass prunes expired delta-sync tombstones.
+
+render.yaml starts ``run_jobs`` next to gunicorn on the web instance:
+the SQLite database and the media files are local to that instance, so a
+separate worker service could not see them.
+"""
+import csv
+import logging
+import os
+import tempfile
+import time
+from datetime import timedelta
+
+from django.core.files import File
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import events
+from .exports import (
+    CHUNK_SIZE, EXPORT_COLUMNS, EXPORT_HEADERS, append_rows, new_workbook, save_workbook, export_queryset
+)
+from .images import apply_variants, encode_variants
+from .imports import StudentImport, read_rows
+from .models import FeeSummary, Job, Student
+from .sync import prune_tombstones
+
+logger = logging.getLogger(__name__)
+
+# Jobs still "running" this long after their last progress update are
+# assumed to belong to a worker that died
+STALE_AFTER = timedelta(hours=1)
+# How often each worker looks for such jobs
+REQUEUE_INTERVAL = 5 * 60
+
+
+# -------------------------------------------------------------
+# HANDLERS
+# -------------------------------------------------------------
+def run_export(job):
+    """``params``: the export_excel filters plus ``format`` (xlsx or csv)."""
+    params = job.params
+    fmt = "csv" if params.get("format") == "csv" else "xlsx"
+    queryset = export_queryset(params)
+    total = queryset.count()
+    fields = [field for _, field in EXPORT_COLUMNS]
+
+    def rows():
+        for serial, row in enumerate(queryset.values_list(*fields).iterator(chunk_size=CHUNK_SIZE), start=1):
+            if serial % CHUNK_SIZE == 0:
+                job.set_progress(90 * serial / total, f"{serial} of {total} students")
+            yield (serial,) + row
+
+    if fmt == "csv":
+        output = tempfile.TemporaryFile("w+", encoding="utf-8", newline="")
+        writer = csv.writer(output)
+        writer.writerow(EXPORT_HEADERS)
+        writer.writerows(rows())
+        output.seek(0)
+    else:
+        wb, ws = new_workbook()
+        append_rows(ws, rows())
+        output = save_workbook(wb)
+
+    with output:
+        job.artifact.save(f"Filtered_Students_Report_{job.pk}.{fmt}", File(output), save=False)
+    return {"rows": total, "format": fmt}
+
+
+def run_import(job):
+    """Bulk student import from ``input_file``; ``params``: ``dry_run``."""
+    with job.input_file.open("rb") as upload:
+        rows = read_rows(upload)
+
+        def report(importer):
+            if not rows.total:
+                job.set_progress(0, f"{importer.total} rows processed")
+                return
+            # The total is an estimate (quoted line breaks, blank sheet rows)
+            job.set_progress(min(99, 100 * importer.total / rows.total),
+                             f"{importer.total} of {rows.total} rows processed")
+
+        importer = StudentImport(dry_run=bool(job.params.get("dry_run")), on_batch=report)
+        return importer.run(rows)
+
+
+def run_photos(job):
+    """
+    Re-encode student photos and build their variants. ``params``:
+    ``student_ids`` (default: every student with a photo but no variants).
+    """
+    students = Student.objects.exclude(Q(image="") | Q(image__isnull=True))
+    if job.params.get("student_ids"):
+        students = students.filter(pk__in=job.params["student_ids"])
+    else:
+        students = students.filter(Q(image_small="") | Q(image_small__isnull=True))
+
+    ids = list(students.values_list("id", flat=True))
+    failed = []
+    for done, student in enumerate(Student.objects.filter(pk__in=ids).only("id", "image"), start=1):
+        try:
+            with student.image.open("rb") as fh:
+                encoded = encode_variants(fh.read())
+        except Exception as exc:  # one bad photo should not fail the batch
+            failed.append({"student": student.id, "error": f"{type(exc).__name__}: {exc}"})
+        else:
+            apply_variants(student, encoded)
+            student.save(update_fields=["image", "image_medium", "image_small", "updated_at"])
+        job.set_progress(100 * done / len(ids), f"{done} of {len(ids)} photos")
+    return {"processed": len(ids) - len(failed), "failed": failed}
+
+
+def run_fee_rebuild(job):
+    """Recompute every FeeSummary from the receipts."""
+    FeeSummary.rebuild_all()
+    return {"students": Student.objects.count()}
+
+
+HANDLERS = {
+    "export": run_export,
+    "import_students": run_import,
+    "process_photos": run_photos,
+    "rebuild_fee_summaries": run_fee_rebuild,
+}
+
+
+# -------------------------------------------------------------
+# QUEUE
+# -------------------------------------------------------------
+def enqueue(kind, params=None, input_file=None):
+    if kind not in HANDLERS:
+        raise ValueError(f"Unknown job kind: {kind}")
+    return Job.objects.create(kind=kind, params=params or {}, input_file=input_file)
+
+
+def claim_next(worker):
+    """Take the oldest queued job for ``worker``, or return None."""
+    with transaction.atomic():
+        job = Job.objects.select_for_update(skip_locked=True).filter(status=Job.QUEUED).order_by("id").first()
+        if job is None:
+            return None
+        now = timezone.now()
+        claimed = Job.objects.filter(pk=job.pk, status=Job.QUEUED).update(
+            status=Job.RUNNING, worker=worker, started_at=now, updated_at=now,
+        )
+    if not claimed:
+        return None
+    job.status, job.worker, job.started_at = Job.RUNNING, worker, now
+    return job
+
+
+def run_job(job):
+    """Run a claimed job and record how it ended."""
+    try:
+        result = HANDLERS[job.kind](job)
+    except Exception as exc:
+        logger.exception("Job %s failed", job.pk)
+        job.status = Job.FAILED
+        job.message = f"{type(exc).__name__}: {exc}"[:300]
+        job.result = None
+    else:
+        job.status = Job.DONE
+        job.progress = 100
+        job.result = result
+    job.finished_at = timezone.now()
+    job.save(update_fields=["status", "progress", "message", "result", "artifact", "finished_at", "updated_at"])
+    return job
+
+
+def requeue_stale(older_than=STALE_AFTER):
+    """Put jobs orphaned by a dead worker back in the queue."""
+    return Job.objects.filter(status=Job.RUNNING, updated_at__lt=timezone.now() - older_than).update(
+        status=Job.QUEUED, worker="", started_at=None, updated_at=timezone.now(),
+    )
+
+
+def purge(older_than):
+    """Delete finished jobs (and their files) older than ``older_than``."""
+    old = Job.objects.filter(status__in=[Job.DONE, Job.FAILED], finished_at__lt=timezone.now() - older_than)
+    count = 0
+    for job in old.iterator():
+        for field in (job.input_file, job.artifact):
+            if field:
+                field.delete(save=False)
+        job.delete()
+        count += 1
+    return count
+
+
+def work(worker=None, poll_interval=1.0, once=False, should_stop=lambda: False):
+    """
+    Worker loop: run queued jobs until ``should_stop()``; with ``once``,
+    return as soon as the queue is empty. Returns the number of jobs run.
+    """
+    worker = worker or f"{os.uname().nodename}:{os.getpid()}"
+    count = 0
+    next_requeue = time.monotonic() + REQUEUE_INTERVAL
+    while not should_stop():
+        close_old_connections()
+        if time.monotonic() >= next_requeue:
+            requeued = requeue_stale()
+            if requeued:
+                logger.warning("Requeued %s stale jobs", requeued)
+            prune_tombstones()
+            events.prune()
+            next_requeue = time.monotonic() + REQUEUE_INTERVAL
+        job = claim_next(worker)
+        if job is None:
+            if once:
+                break
+            time.sleep(poll_interval)
+            continue
+        run_job(job)
+        count += 1
+    return count
@@ -0,0 +1,76 @@
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from page.images import apply_variants, encode_variants
+from page.models import Student
+
+
+def _encode(student_id, data):
+    try:
+        return student_id, encode_variants(data), None
+    except Exception as exc:  # reported, not fatal for the whole run
+        return student_id, None, f"{type(exc).__name__}: {exc}"
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-encode existing student photos and generate their thumbnail "
+        "variants. Pillow work runs in a process pool; file and database "
+        "I/O stays in this process."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+        parser.add_argument("--all", action="store_true", help="Also redo students that already have variants")
+        parser.add_argument(
+            "--delete-originals", action="store_true",
+            help="Remove the raw uploaded file once its processed copy is saved",
+        )
+
+    def handle(self, *args, **options):
+        students = Student.objects.exclude(Q(image="") | Q(image__isnull=True))
+        if not options["all"]:
+            students = students.filter(Q(image_small="") | Q(image_small__isnull=True))
+
+        self.done = self.failed = 0
+        # Keep only a few photos per worker in flight so memory stays bounded
+        max_pending = options["workers"] * 4
+        pending = set()
+
+        with ProcessPoolExecutor(max_workers=options["workers"]) as pool:
+            for student in students.only("id", "image").iterator():
+                try:
+                    with student.image.open("rb") as fh:
+                        data = fh.read()
+                except OSError as exc:
+                    self.failed += 1
+                    self.stderr.write(f"student {student.id}: cannot read {student.image.name}: {exc}")
+                    continue
+
+                pending.add(pool.submit(_encode, student.id, data))
+                if len(pending) >= max_pending:
+                    finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    self.store(finished, options["delete_originals"])
+
+            self.store(pending, options["delete_originals"])
+
+        self.stdout.write(self.style.SUCCESS(f"Processed {self.done} photos, {self.failed} failed"))
+
+    def store(self, futures, delete_originals):
+        for future in futures:
+            student_id, encoded, error = future.result()
+            if error:
+                self.failed += 1
+                self.stderr.write(f"student {student_id}: {error}")
+                continue
+
+            student = Student.objects.only("id", "image").get(pk=student_id)
+            old_name = student.image.name
+            apply_variants(student, encoded)
+            student.save(update_fields=["image", "image_medium", "image_small", "updated_at"])
+            if delete_originals and old_name != student.image.name:
+                student.image.storage.delete(old_name)
+            self.done += 1
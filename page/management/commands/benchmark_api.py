@@ -0,0 +1,144 @@
+import json
+import platform
+import subprocess
+from datetime import datetime, timezone
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+
+from page.benchmark import benchmark_database, profile_requests, seed_database
+from page.models import Student
+
+# Compared against --compare; latency noise below this is ignored
+MIN_REGRESSION_MS = 1.0
+
+
+def scenarios(client, student_ids):
+    """
+    ``(name, heavy, send)`` triples; ``send(i)`` issues the i-th request.
+    Heavy scenarios touch every student and run --heavy-repeat times.
+    """
+    def pick(i):
+        return student_ids[(i * 7919) % len(student_ids)]
+
+    return [
+        ("students list (full)", True, lambda i: client.get("/api/students/")),
+        ("students list (full, fast)", True, lambda i: client.get("/api/students/?fast=1")),
+        ("students list (page of 50)", False, lambda i: client.get("/api/students/?page_size=50")),
+        ("students list (fields, page of 50)", False,
+         lambda i: client.get("/api/students/?page_size=50&fields=regno,studentname,course")),
+        ("students filtered by course", False,
+         lambda i: client.get("/api/students/?course=Python&page_size=50")),
+        ("student detail", False, lambda i: client.get(f"/api/students/{pick(i)}/")),
+        ("student search", False, lambda i: client.get("/api/students/search/?q=ka")),
+        ("fee summary", False, lambda i: client.get("/api/fees/summary/")),
+        ("fee posting", False,
+         lambda i: client.post("/api/fees/", {"student": pick(i), "amount": 1}, content_type="application/json")),
+        ("update_exam_course", False, lambda i: client.patch(
+            f"/api/students/{pick(i)}/update_exam_course/",
+            {"course": "Benchmark", "hallticket_no": f"BENCH{i}", "Exam_Date": "2025-01-10"},
+            content_type="application/json",
+        )),
+        ("export csv", True, lambda i: client.get("/api/export-excel/?format=csv")),
+        ("export xlsx", True, lambda i: client.get("/api/export-excel/")),
+    ]
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def regressions(baseline, current, threshold):
+    """Human readable list of scenarios that got slower or chattier."""
+    found = []
+    for name, now in current.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        if now["queries"] > before["queries"]:
+            found.append(f"{name}: queries {before['queries']} -> {now['queries']}")
+        limit = before["p50_ms"] * (1 + threshold / 100)
+        if now["p50_ms"] > limit and now["p50_ms"] - before["p50_ms"] > MIN_REGRESSION_MS:
+            found.append(f"{name}: p50 {before['p50_ms']} ms -> {now['p50_ms']} ms")
+    return found
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway database and drive the page API through the Django "
+        "test client, recording latency percentiles, query counts and peak "
+        "memory per endpoint. Results can be written as JSON and compared "
+        "with an earlier run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--students", type=int, default=5000)
+        parser.add_argument("--receipts", type=int, default=3, help="Receipts per student")
+        parser.add_argument("--breaks", type=int, default=1, help="Breaks per student")
+        parser.add_argument("--faculties", type=int, default=20)
+        parser.add_argument("--batches", type=int, default=50, help="Batches per faculty")
+        parser.add_argument("--repeat", type=int, default=50)
+        parser.add_argument("--heavy-repeat", type=int, default=5)
+        parser.add_argument("--only", help="Comma separated substrings of scenario names to run")
+        parser.add_argument("--json", dest="json_path", help="Write the results to this file")
+        parser.add_argument("--compare", help="Earlier --json output to compare against")
+        parser.add_argument("--threshold", type=float, default=20.0,
+                            help="Allowed p50 slowdown in percent before --compare fails")
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options["compare"]:
+            with open(options["compare"]) as fh:
+                baseline = json.load(fh)["results"]
+
+        only = [part.strip() for part in (options["only"] or "").split(",") if part.strip()]
+        results = {}
+
+        with benchmark_database():
+            counts = seed_database(
+                students=options["students"], receipts_per_student=options["receipts"],
+                breaks_per_student=options["breaks"], faculties=options["faculties"],
+                batches_per_faculty=options["batches"],
+            )
+            self.stdout.write(f"Seeded: {counts}")
+
+            client = Client(HTTP_HOST="localhost")
+            student_ids = list(Student.objects.values_list("id", flat=True))
+            for name, heavy, send in scenarios(client, student_ids):
+                if only and not any(part in name for part in only):
+                    continue
+                repeat = options["heavy_repeat"] if heavy else options["repeat"]
+                results[name] = stats = profile_requests(send, repeat)
+                self.stdout.write(
+                    f"{name:<36} p50 {stats['p50_ms']:>9.3f}  p90 {stats['p90_ms']:>9.3f}  "
+                    f"p99 {stats['p99_ms']:>9.3f} ms  {stats['queries']:>3} queries  "
+                    f"{stats['peak_kib']:>9.1f} KiB peak  {stats['status']}"
+                )
+
+        if options["json_path"]:
+            report = {
+                "meta": {
+                    "revision": git_revision(),
+                    "recorded_at": datetime.now(timezone.utc).isoformat(),
+                    "python": platform.python_version(),
+                    "django": django.get_version(),
+                    "seeded": counts,
+                    "repeat": options["repeat"],
+                    "heavy_repeat": options["heavy_repeat"],
+                },
+                "results": results,
+            }
+            with open(options["json_path"], "w") as fh:
+                json.dump(report, fh, indent=2)
+
+        if baseline is not None:
+            found = regressions(baseline, results, options["threshold"])
+            if found:
+                raise CommandError("Regressions against %s:\n  %s" % (options["compare"], "\n  ".join(found)))
+            self.stdout.write(self.style.SUCCESS(f"No regressions against {options['compare']}"))
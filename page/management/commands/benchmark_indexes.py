@@ -0,0 +1,77 @@
+import json
+from datetime import date
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from page.benchmark import benchmark_database, seed_database, time_call
+from page.models import Batch, Break, FeeReceipt, Student
+
+
+INDEXED_MODELS = [Student, FeeReceipt, Break, Batch]
+
+
+def hot_queries():
+    """(label, queryset) pairs mirroring the lookups the API performs."""
+    regno = Student.objects.order_by("-id").values_list("regno", flat=True).first()
+    student_id = Student.objects.order_by("-id").values_list("id", flat=True).first()
+    faculty_id = Batch.objects.values_list("faculty_id", flat=True).first()
+    on_date = date(2023, 6, 15)
+
+    return [
+        ("student by regno", Student.objects.filter(regno=regno)),
+        ("students by course + joining range", Student.objects.filter(
+            course__iexact="python", date_of_joining__range=[date(2023, 1, 1), date(2023, 3, 31)])),
+        ("student name prefix", Student.objects.filter(studentname__istartswith="ka")),
+        ("receipts of a student by date", FeeReceipt.objects.filter(student_id=student_id).order_by("-date")),
+        ("breaks covering a date", Break.objects.overlapping(on_date)),
+        ("batches of a faculty from a date", Batch.objects.filter(faculty_id=faculty_id, date__gte=on_date)),
+    ]
+
+
+def measure(repeat):
+    results = {}
+    for label, queryset in hot_queries():
+        results[label] = {
+            "plan": queryset.explain(),
+            "ms": round(time_call(lambda qs=queryset: list(qs.all()), repeat=repeat), 3),
+        }
+    return results
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway database and compare query plans and timings of the "
+        "hot lookups with and without the page indexes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--students", type=int, default=20000)
+        parser.add_argument("--receipts", type=int, default=4, help="Receipts per student")
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--json", dest="json_path", help="Also write the results to this file")
+
+    def handle(self, *args, **options):
+        with benchmark_database():
+            counts = seed_database(students=options["students"], receipts_per_student=options["receipts"])
+            self.stdout.write(f"Seeded: {counts}")
+
+            after = measure(options["repeat"])
+
+            with connection.schema_editor() as editor:
+                for model in INDEXED_MODELS:
+                    for index in model._meta.indexes:
+                        editor.remove_index(model, index)
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE")
+
+            before = measure(options["repeat"])
+
+        for label in after:
+            self.stdout.write(self.style.MIGRATE_HEADING(label))
+            self.stdout.write(f"  before {before[label]['ms']:>9.3f} ms  {before[label]['plan']}")
+            self.stdout.write(f"  after  {after[label]['ms']:>9.3f} ms  {after[label]['plan']}")
+
+        if options["json_path"]:
+            with open(options["json_path"], "w") as fh:
+                json.dump({"seeded": counts, "before": before, "after": after}, fh, indent=2)
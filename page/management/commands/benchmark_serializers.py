@@ -0,0 +1,91 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+
+from page.benchmark import benchmark_database, seed_database, time_call
+from page.fastlist import CHUNK_SIZE, compile_plan
+from page.models import FeeReceipt, Student
+from page.serializers import FeeReceiptSerializer, StudentSerializer
+
+# (name, list URL, serializer, queryset, serializer kwargs) compared
+SCENARIOS = [
+    ("students (full)", "/api/students/", StudentSerializer,
+     lambda: Student.objects.prefetch_related("breaks").order_by("id"), {}),
+    ("students (fields=regno,studentname,course)", "/api/students/?fields=regno,studentname,course",
+     StudentSerializer, lambda: Student.objects.order_by("id"),
+     {"fields": {"id", "regno", "studentname", "course"}}),
+    ("fee receipts", "/api/fees/", FeeReceiptSerializer, lambda: FeeReceipt.objects.all(), {}),
+]
+
+
+def _read(response):
+    if response.streaming:
+        return b"".join(response.streaming_content)
+    return response.content
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare rows per second of the regular DRF serializers with the "
+        "?fast=1 values_list path on a seeded throwaway database, both for "
+        "serialization alone and end to end through the list endpoints."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--students", type=int, default=5000)
+        parser.add_argument("--repeat", type=int, default=3, help="Best of this many runs is reported")
+        parser.add_argument("--json", dest="json_path", help="Write the results to this file")
+
+    def handle(self, *args, **options):
+        repeat = options["repeat"]
+        results = {}
+        with benchmark_database():
+            counts = seed_database(students=options["students"])
+            self.stdout.write(f"Seeded: {counts}")
+            client = Client(HTTP_HOST="localhost")
+            request = APIRequestFactory().get("/", HTTP_HOST="localhost")
+
+            for name, url, serializer_class, queryset, kwargs in SCENARIOS:
+                serializer = serializer_class(context={"request": request}, **kwargs)
+                plan = compile_plan(serializer, request)
+                if plan is None:
+                    raise CommandError(f"{name}: serializer has no fast plan")
+
+                # Serialization only: both sides start from rows already in memory
+                instances = list(queryset())
+                rows = len(instances)
+                tuples = list(queryset().prefetch_related(None).values_list(*plan.lookups))
+                regular_ms = time_call(lambda: JSONRenderer().render(
+                    serializer_class(instances, many=True, context={"request": request}, **kwargs).data
+                ), repeat)
+                chunks = [tuples[i:i + CHUNK_SIZE] for i in range(0, rows, CHUNK_SIZE)]
+                # Nested breaks are looked up per chunk, so that query is timed too
+                fast_ms = time_call(lambda: b"".join(plan.encode_chunks(chunks)), repeat)
+
+                # End to end: query, serialize and read the whole body
+                http_regular_ms = time_call(lambda: _read(client.get(url)), repeat)
+                separator = "&" if "?" in url else "?"
+                http_fast_ms = time_call(lambda: _read(client.get(f"{url}{separator}fast=1")), repeat)
+                if _read(client.get(url)) != _read(client.get(f"{url}{separator}fast=1")):
+                    raise CommandError(f"{name}: fast output differs from the serializer's")
+
+                results[name] = stats = {
+                    "rows": rows,
+                    "serialize_rows_per_s": {"regular": round(rows / regular_ms * 1000),
+                                             "fast": round(rows / fast_ms * 1000)},
+                    "http_rows_per_s": {"regular": round(rows / http_regular_ms * 1000),
+                                        "fast": round(rows / http_fast_ms * 1000)},
+                }
+                for stage in ("serialize", "http"):
+                    speeds = stats[f"{stage}_rows_per_s"]
+                    self.stdout.write(
+                        f"{name:<44} {stage:<9} regular {speeds['regular']:>9} rows/s  "
+                        f"fast {speeds['fast']:>9} rows/s  x{speeds['fast'] / speeds['regular']:.1f}"
+                    )
+
+        if options["json_path"]:
+            with open(options["json_path"], "w") as fh:
+                json.dump({"seeded": counts, "repeat": repeat, "results": results}, fh, indent=2)
@@ -0,0 +1,172 @@
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from page.benchmark import benchmark_database, percentile, seed_database
+from page.models import Student
+
+# (name, gunicorn arguments) of the setups compared; the first one is how
+# render.yaml used to start the app
+SERVERS = [
+    ("wsgi sync", ["SSSIT.wsgi:application", "--worker-class", "sync"]),
+    ("wsgi gthread", ["SSSIT.wsgi:application", "--worker-class", "gthread"]),
+    ("asgi uvicorn", ["SSSIT.asgi:application", "--worker-class", "uvicorn_worker.UvicornWorker"]),
+]
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def fetch(url):
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(url, timeout=120) as response:
+            while response.read(64 * 1024):
+                pass
+            ok = response.status == 200
+    except (OSError, urllib.error.HTTPError):
+        ok = False
+    return ok, (time.perf_counter() - started) * 1000
+
+
+def drive(base_url, light_paths, heavy_paths, light_clients, heavy_clients, seconds):
+    """
+    Run ``light_clients`` threads cycling through ``light_paths`` next to
+    ``heavy_clients`` threads cycling through ``heavy_paths`` for
+    ``seconds``, and summarise each group.
+    """
+    deadline = time.monotonic() + seconds
+    results = {"light": [], "heavy": []}
+    errors = {"light": 0, "heavy": 0}
+    lock = threading.Lock()
+
+    def client(kind, paths, offset):
+        i = offset
+        while time.monotonic() < deadline:
+            ok, ms = fetch(base_url + paths[i % len(paths)])
+            i += 1
+            with lock:
+                if ok:
+                    results[kind].append(ms)
+                else:
+                    errors[kind] += 1
+
+    threads = [threading.Thread(target=client, args=("light", light_paths, n)) for n in range(light_clients)]
+    threads += [threading.Thread(target=client, args=("heavy", heavy_paths, n)) for n in range(heavy_clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    summary = {}
+    for kind, latencies in results.items():
+        summary[kind] = {
+            "requests": len(latencies),
+            "errors": errors[kind],
+            "per_second": round(len(latencies) / seconds, 2),
+            "p50_ms": round(percentile(latencies, 50), 2) if latencies else None,
+            "p99_ms": round(percentile(latencies, 99), 2) if latencies else None,
+        }
+    return summary
+
+
+class Command(BaseCommand):
+    help = (
+        "Start the app under gunicorn with sync, gthread and uvicorn workers "
+        "against a seeded throwaway SQLite file and compare throughput and "
+        "latency of light requests while exports run alongside them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--students", type=int, default=5000)
+        parser.add_argument("--workers", type=int, default=2)
+        parser.add_argument("--threads", type=int, default=4, help="gthread threads per worker")
+        parser.add_argument("--light-clients", type=int, default=8)
+        parser.add_argument("--heavy-clients", type=int, default=2)
+        parser.add_argument("--seconds", type=float, default=15)
+        parser.add_argument("--only", help="Comma separated server names to run (e.g. 'wsgi sync,asgi uvicorn')")
+        parser.add_argument("--json", dest="json_path", help="Write the results to this file")
+
+    def handle(self, *args, **options):
+        only = {name.strip() for name in (options["only"] or "").split(",") if name.strip()}
+        servers = [(name, argv) for name, argv in SERVERS if not only or name in only]
+        if not servers:
+            raise CommandError("No server matches --only")
+
+        report = {}
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = Path(tmp) / "servers.sqlite3"
+            with benchmark_database(path=db_path):
+                counts = seed_database(students=options["students"])
+                self.stdout.write(f"Seeded: {counts}")
+                ids = list(Student.objects.order_by("?").values_list("id", flat=True)[:200])
+
+                env = dict(
+                    os.environ,
+                    DJANGO_SETTINGS_MODULE="SSSIT.settings",
+                    SQLITE_PATH=str(db_path),
+                    CACHE_LOCATION=str(Path(tmp) / "cache"),
+                    REQUEST_METRICS="0",
+                )
+                light = [f"/api/students/{pk}/" for pk in ids] + ["/api/students/?page_size=50", "/api/courses/"]
+                heavy = ["/api/export-excel/", "/api/export-excel/?format=csv"]
+
+                for name, argv in servers:
+                    report[name] = self.run_server(name, argv, env, light, heavy, options)
+                report["meta"] = {"seeded": counts, **{k: options[k] for k in (
+                    "workers", "threads", "light_clients", "heavy_clients", "seconds")}}
+
+        if options["json_path"]:
+            with open(options["json_path"], "w") as fh:
+                json.dump(report, fh, indent=2)
+
+    def run_server(self, name, argv, env, light, heavy, options):
+        port = free_port()
+        command = [
+            sys.executable, "-m", "gunicorn", *argv,
+            "--bind", f"127.0.0.1:{port}",
+            "--workers", str(options["workers"]),
+            "--threads", str(options["threads"]),
+            "--timeout", "300",
+        ]
+        server = subprocess.Popen(
+            command, cwd=settings.BASE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        base_url = f"http://127.0.0.1:{port}"
+        try:
+            for _ in range(100):
+                if fetch(base_url + "/api/courses/")[0]:
+                    break
+                if server.poll() is not None:
+                    raise CommandError(f"{name}: gunicorn exited with {server.returncode}")
+                time.sleep(0.2)
+            else:
+                raise CommandError(f"{name}: server did not come up")
+
+            summary = drive(base_url, light, heavy, options["light_clients"],
+                            options["heavy_clients"], options["seconds"])
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+        for kind in ("light", "heavy"):
+            stats = summary[kind]
+            self.stdout.write(
+                f"{name:<14} {kind:<6} {stats['per_second']:>8.2f} req/s  p50 {stats['p50_ms']} ms  "
+                f"p99 {stats['p99_ms']} ms  errors {stats['errors']}"
+            )
+        return summary
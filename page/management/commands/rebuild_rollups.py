@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from page import rollups
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the dashboard rollups (enrolment, fee collections, "
+        "certificates) from the student, receipt and exam tables. Needed "
+        "only after writes that bypass the ORM signals, such as raw SQL or "
+        "bulk_create outside the import paths."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=rollups.CHUNK_SIZE,
+                            help="Primary-key range aggregated per query")
+
+    def handle(self, *args, **options):
+        counts = rollups.rebuild(chunk_size=options["chunk_size"])
+        self.stdout.write(self.style.SUCCESS(
+            "Rebuilt rollups: " + ", ".join(f"{name} {count} rows" for name, count in counts.items())
+        ))
@@ -0,0 +1,71 @@
+import multiprocessing
+import os
+import signal
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from page import events, jobs
+from page.sync import prune_tombstones
+
+
+def _work(poll_interval, stop):
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    jobs.work(poll_interval=poll_interval, should_stop=stop.is_set)
+
+
+class Command(BaseCommand):
+    help = (
+        "Run background jobs (exports, imports, photo processing, fee "
+        "rebuilds) queued through /api/jobs/. Starts one worker process per "
+        "core by default; --once drains the queue in this process and exits."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+        parser.add_argument("--poll", type=float, default=1.0, help="Seconds between polls of an empty queue")
+        parser.add_argument("--once", action="store_true", help="Run queued jobs in this process, then exit")
+        parser.add_argument("--purge-days", type=int, default=7,
+                            help="Delete finished jobs and their files after this many days (0 keeps them)")
+
+    def handle(self, *args, **options):
+        requeued = jobs.requeue_stale()
+        if requeued:
+            self.stdout.write(f"Requeued {requeued} stale jobs")
+        if options["purge_days"]:
+            purged = jobs.purge(timedelta(days=options["purge_days"]))
+            if purged:
+                self.stdout.write(f"Purged {purged} old jobs")
+        pruned = prune_tombstones()
+        if pruned:
+            self.stdout.write(f"Pruned {pruned} expired tombstones")
+        pruned = events.prune()
+        if pruned:
+            self.stdout.write(f"Pruned {pruned} old change events")
+
+        if options["once"]:
+            count = jobs.work(once=True)
+            self.stdout.write(self.style.SUCCESS(f"Ran {count} jobs"))
+            return
+
+        # Forked workers must not share the parent's database connection
+        connections.close_all()
+        context = multiprocessing.get_context("fork")
+        stop = context.Event()
+        processes = [
+            context.Process(target=_work, args=(options["poll"], stop), name=f"job-worker-{n}")
+            for n in range(options["workers"])
+        ]
+        for process in processes:
+            process.start()
+        self.stdout.write(f"Started {len(processes)} job workers")
+
+        def shutdown(signum, frame):
+            # Workers finish the job in hand, then exit
+            stop.set()
+
+        signal.signal(signal.SIGTERM, shutdown)
+        signal.signal(signal.SIGINT, shutdown)
+        for process in processes:
+            process.join()
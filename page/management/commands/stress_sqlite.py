@@ -0,0 +1,42 @@
+import json
+import tempfile
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from page.benchmark import benchmark_database, stress_fee_postings
+
+
+class Command(BaseCommand):
+    help = (
+        "Hammer a throwaway file-backed SQLite database with concurrent fee "
+        "postings and report how many failed. --bare uses the DATABASES "
+        "settings from before the tuning (no WAL, default 5 s busy timeout, "
+        "DEFERRED transactions) for comparison."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--writers", type=int, default=8)
+        parser.add_argument("--payments", type=int, default=25, help="Payments per writer")
+        parser.add_argument("--bare", action="store_true", help="Use the pre-tuning DATABASES settings")
+
+    def handle(self, *args, **options):
+        if options["bare"]:
+            # The DATABASES entry before the tuning: Django's defaults, i.e.
+            # rollback journal, Python's 5 s busy timeout, DEFERRED transactions
+            connection.close()
+            connection.settings_dict["OPTIONS"] = {}
+            connection.settings_dict["CONN_MAX_AGE"] = 0
+
+        with tempfile.TemporaryDirectory() as tmp:
+            with benchmark_database(path=Path(tmp) / "stress.sqlite3"):
+                with connection.cursor() as cursor:
+                    cursor.execute("PRAGMA journal_mode")
+                    journal_mode = cursor.fetchone()[0]
+                result = stress_fee_postings(options["writers"], options["payments"])
+
+        result["journal_mode"] = journal_mode
+        self.stdout.write(json.dumps(result, indent=2))
+        if result["errors"]:
+            self.stderr.write(self.style.ERROR(f"{sum(result['errors'].values())} postings failed"))
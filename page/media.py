@@ -0,0 +1,143 @@
+"""
+Production serving for uploaded student photos.
+
+Processed photos are named after a hash of their content (see
+``page.images``), so they never change under the same URL and can be
+cached by browsers for a year. Everything else gets a strong ETag and
+must be revalidated. Full responses go through ``FileResponse`` so the
+WSGI server's ``wsgi.file_wrapper`` (sendfile) can send the file without
+copying it through Python.
+"""
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotAllowed, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.http import http_date, parse_http_date_safe
+
+SERVED_DIRS = ("student_images",)
+HASHED_NAME = re.compile(r"^[0-9a-f]{16}(_[a-z]+)?\.[a-z0-9]+$")
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "public, no-cache"
+RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+CHUNK_SIZE = 64 * 1024
+
+
+def _etag(name, stat):
+    if HASHED_NAME.match(name):
+        return '"%s"' % os.path.splitext(name)[0]
+    return '"%x-%x"' % (stat.st_size, stat.st_mtime_ns)
+
+
+def _resolve(path):
+    """Real path of ``path`` if it lies inside one of ``SERVED_DIRS``, else None."""
+    root = os.path.realpath(settings.MEDIA_ROOT)
+    try:
+        full_path = os.path.realpath(safe_join(root, path))
+    except (ValueError, SuspiciousFileOperation):
+        return None
+    for directory in SERVED_DIRS:
+        served = os.path.join(root, directory)
+        if full_path.startswith(served + os.sep):
+            return full_path
+    return None
+
+
+def _parse_range(match, size):
+    """``(start, end)`` (inclusive) for a satisfiable single byte range, else None."""
+    if size == 0:
+        return None
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    elif last:
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        return None
+    if start > end or start >= size:
+        return None
+    return start, end
+
+
+def _read_range(fh, start, length):
+    try:
+        fh.seek(start)
+        while length > 0:
+            chunk = fh.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+    finally:
+        fh.close()
+
+
+def serve_media(request, path):
+    if request.method not in ("GET", "HEAD"):
+        return HttpResponseNotAllowed(["GET", "HEAD"])
+
+    # Check the resolved path, not the URL: "student_images/../jobs/..."
+    # must not reach import uploads or exports
+    full_path = _resolve(path)
+    if full_path is None:
+        raise Http404("Not found")
+    try:
+        stat = os.stat(full_path)
+    except OSError:
+        raise Http404("Not found")
+    if not os.path.isfile(full_path):
+        raise Http404("Not found")
+
+    name = os.path.basename(full_path)
+    etag = _etag(name, stat)
+    last_modified = int(stat.st_mtime)
+    headers = {
+        "ETag": etag,
+        "Last-Modified": http_date(last_modified),
+        "Cache-Control": IMMUTABLE if HASHED_NAME.match(name) else REVALIDATE,
+        "Accept-Ranges": "bytes",
+    }
+
+    if_none_match = request.headers.get("If-None-Match")
+    if if_none_match is not None:
+        not_modified = etag in [tag.strip() for tag in if_none_match.split(",")] or if_none_match.strip() == "*"
+    else:
+        since = parse_http_date_safe(request.headers.get("If-Modified-Since", ""))
+        not_modified = since is not None and last_modified <= since
+    if not_modified:
+        response = HttpResponse(status=304)
+        for key, value in headers.items():
+            response[key] = value
+        return response
+
+    content_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+    size = stat.st_size
+
+    # Multi-range and malformed headers are ignored (full 200), as RFC 9110 allows
+    byte_range = None
+    match = RANGE.match(request.headers.get("Range", "").strip())
+    if match and request.headers.get("If-Range", etag) == etag:
+        byte_range = _parse_range(match, size)
+        if byte_range is None:
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{size}"
+            return response
+
+    if byte_range is None:
+        response = FileResponse(open(full_path, "rb"), content_type=content_type)
+    else:
+        start, end = byte_range
+        length = end - start + 1
+        response = StreamingHttpResponse(
+            _read_range(open(full_path, "rb"), start, length), status=206, content_type=content_type
+        )
+        response["Content-Length"] = str(length)
+        response["Content-Range"] = f"bytes {start}-{end}/{size}"
+
+    for key, value in headers.items():
+        response[key] = value
+    return response
@@ -0,0 +1,186 @@
+"""
+Per-route request metrics, kept in memory by each worker process.
+
+``RequestMetricsMiddleware`` (page.middleware) times every request, counts
+its SQL queries and their database time through a connection execute
+wrapper, and spots duplicate queries: the same SQL run again with
+different parameters is the signature of an N+1 loop. Totals are grouped
+by HTTP method and resolved URL name and read back with ``snapshot()``.
+
+Connections are per thread, and under ASGI a request's queries run on a
+thread other than the middleware's. So every connection carries the same
+``record_queries`` wrapper, attached when a request starts on its thread,
+and the wrapper looks up the current request's recorder in a contextvar,
+which ``sync_to_async`` carries over to that thread.
+"""
+import hmac
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.signals import request_started
+from django.db import connections
+
+# Upper bounds (ms) of the latency histogram buckets
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+# One SQL statement repeated this often in a request counts as an N+1
+N_PLUS_ONE_THRESHOLD = 5
+# Repeated statements remembered per route
+WORST_QUERIES_KEPT = 5
+
+
+_current_recorder = ContextVar("page_query_recorder", default=None)
+
+
+def record_queries(execute, sql, params, many, context):
+    """Execute wrapper passing queries to the current context's recorder, if any."""
+    recorder = _current_recorder.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+    return recorder(execute, sql, params, many, context)
+
+
+def attach_wrappers(**kwargs):
+    """Put ``record_queries`` on this thread's connections (a request_started receiver)."""
+    for connection in connections.all():
+        if record_queries not in connection.execute_wrappers:
+            connection.execute_wrappers.append(record_queries)
+
+
+def watch_connections():
+    request_started.connect(attach_wrappers, dispatch_uid="page_metrics_attach_wrappers")
+
+
+class QueryRecorder:
+    """Execute wrapper collecting count, time and shape of a request's queries."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.statements = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - started
+            self.count += 1
+            self.statements[sql] += 1
+
+    @contextmanager
+    def installed(self):
+        """Record the queries run in this context, on this thread or on threads it hands work to."""
+        attach_wrappers()
+        token = _current_recorder.set(self)
+        try:
+            yield self
+        finally:
+            _current_recorder.reset(token)
+
+    @property
+    def duplicates(self):
+        return self.count - len(self.statements)
+
+    def repeated(self):
+        """``(sql, times)`` for statements run at least N_PLUS_ONE_THRESHOLD times."""
+        return [(sql, n) for sql, n in self.statements.most_common() if n >= N_PLUS_ONE_THRESHOLD]
+
+    def server_timing(self, wall_seconds):
+        return 'app;dur=%.1f, db;dur=%.1f;desc="%d queries, %d duplicate"' % (
+            wall_seconds * 1000, self.seconds * 1000, self.count, self.duplicates,
+        )
+
+
+class RouteStats:
+    def __init__(self):
+        self.requests = 0
+        self.wall_ms = 0.0
+        self.max_ms = 0.0
+        self.db_ms = 0.0
+        self.queries = 0
+        self.max_queries = 0
+        self.duplicates = 0
+        self.n_plus_one = 0
+        self.bytes = 0
+        self.histogram = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.worst = {}
+
+    def add(self, wall_ms, recorder, size):
+        self.requests += 1
+        self.wall_ms += wall_ms
+        self.max_ms = max(self.max_ms, wall_ms)
+        self.db_ms += recorder.seconds * 1000
+        self.queries += recorder.count
+        self.max_queries = max(self.max_queries, recorder.count)
+        self.duplicates += recorder.duplicates
+        self.bytes += size or 0
+
+        bucket = next((i for i, bound in enumerate(LATENCY_BUCKETS_MS) if wall_ms <= bound), -1)
+        self.histogram[bucket] += 1
+
+        repeated = recorder.repeated()
+        if repeated:
+            self.n_plus_one += 1
+            for sql, times in repeated:
+                self.worst[sql] = max(self.worst.get(sql, 0), times)
+            if len(self.worst) > WORST_QUERIES_KEPT:
+                keep = sorted(self.worst.items(), key=lambda item: -item[1])[:WORST_QUERIES_KEPT]
+                self.worst = dict(keep)
+
+    def as_dict(self):
+        n = self.requests or 1
+        labels = [f"le_{bound}ms" for bound in LATENCY_BUCKETS_MS] + ["inf"]
+        return {
+            "requests": self.requests,
+            "mean_ms": round(self.wall_ms / n, 2),
+            "max_ms": round(self.max_ms, 2),
+            "mean_db_ms": round(self.db_ms / n, 2),
+            "mean_queries": round(self.queries / n, 2),
+            "max_queries": self.max_queries,
+            "duplicate_queries": self.duplicates,
+            "n_plus_one_requests": self.n_plus_one,
+            "mean_bytes": round(self.bytes / n),
+            "histogram": dict(zip(labels, self.histogram)),
+            "repeated_sql": [
+                {"sql": sql[:300], "max_times": times}
+                for sql, times in sorted(self.worst.items(), key=lambda item: -item[1])
+            ],
+        }
+
+
+_lock = threading.Lock()
+_routes = {}
+
+
+def route_name(request):
+    match = getattr(request, "resolver_match", None)
+    return f"{request.method} {match.view_name if match else '<unresolved>'}"
+
+
+def record(route, wall_ms, recorder, size):
+    with _lock:
+        _routes.setdefault(route, RouteStats()).add(wall_ms, recorder, size)
+
+
+def snapshot():
+    with _lock:
+        return {route: stats.as_dict() for route, stats in sorted(_routes.items())}
+
+
+def reset():
+    with _lock:
+        _routes.clear()
+
+
+def can_view_stats(request):
+    """Staff users, or callers sending ``X-Metrics-Token: <REQUEST_METRICS_TOKEN>``."""
+    token = getattr(settings, "REQUEST_METRICS_TOKEN", "")
+    sent = request.headers.get("X-Metrics-Token", "")
+    if token and sent and hmac.compare_digest(sent, token):
+        return True
+    user = getattr(request, "user", None)
+    return bool(user and user.is_staff)
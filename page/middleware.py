@@ -0,0 +1,134 @@
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.middleware.gzip import GZipMiddleware as DjangoGZipMiddleware
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from . import metrics
+from .offload import aiter_file, run_in_pool
+
+# Bodies that are already compressed; gzipping them only burns CPU and
+# strips Content-Length (which also defeats sendfile)
+PRECOMPRESSED_TYPES = (
+    "image/",
+    "application/zip",
+    "application/vnd.openxmlformats-officedocument.",
+)
+
+
+# Server-Sent Events must reach the client event by event
+UNCOMPRESSED_TYPES = PRECOMPRESSED_TYPES + ("text/event-stream",)
+
+
+class GZipMiddleware(DjangoGZipMiddleware):
+    """Django's GZipMiddleware, minus precompressed types, event streams and partial content."""
+
+    def process_response(self, request, response):
+        if response.status_code == 206 or response.get("Content-Type", "").startswith(UNCOMPRESSED_TYPES):
+            return response
+        return super().process_response(request, response)
+
+
+class StaticFilesMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoise that also runs natively in the ASGI stack. The stock
+    middleware is sync-only, which would push every request below it,
+    async views included, onto a sync thread. Here only
+    actual static files leave the event loop: they are opened in the
+    offload pool and streamed with an async iterator.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, settings=settings):
+        super().__init__(get_response, settings=settings)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is None:
+            return await self.get_response(request)
+
+        response = await run_in_pool(self.serve, static_file, request)
+        if response.file_to_stream is not None:
+            response.streaming_content = aiter_file(response.file_to_stream)
+        return response
+
+
+class RequestMetricsMiddleware:
+    """
+    Opt-in (``REQUEST_METRICS``) timing of every request: adds a
+    ``Server-Timing`` header and feeds the per-route totals in
+    ``page.metrics``. Streaming responses are recorded once their body has
+    been sent, including the queries run while streaming. Works in both
+    the WSGI and ASGI stacks without forcing async views onto a thread.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, "REQUEST_METRICS", False):
+            raise MiddlewareNotUsed
+        metrics.watch_connections()
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        recorder = metrics.QueryRecorder()
+        started = time.perf_counter()
+        with recorder.installed():
+            response = self.get_response(request)
+        return self._finish(request, response, started, recorder)
+
+    async def __acall__(self, request):
+        recorder = metrics.QueryRecorder()
+        started = time.perf_counter()
+        with recorder.installed():
+            response = await self.get_response(request)
+        return self._finish(request, response, started, recorder)
+
+    def _finish(self, request, response, started, recorder):
+        elapsed = time.perf_counter() - started
+        response["Server-Timing"] = recorder.server_timing(elapsed)
+        route = metrics.route_name(request)
+        if not response.streaming:
+            metrics.record(route, elapsed * 1000, recorder, len(response.content))
+        elif response.is_async:
+            response.streaming_content = self._atrack(response.streaming_content, route, started, recorder)
+        else:
+            response.streaming_content = self._track(response.streaming_content, route, started, recorder)
+        return response
+
+    def _track(self, content, route, started, recorder):
+        size = 0
+        try:
+            with recorder.installed():
+                for chunk in content:
+                    size += len(chunk)
+                    yield chunk
+        finally:
+            metrics.record(route, (time.perf_counter() - started) * 1000, recorder, size)
+
+    async def _atrack(self, content, route, started, recorder):
+        size = 0
+        try:
+            with recorder.installed():
+                async for chunk in content:
+                    size += len(chunk)
+                    yield chunk
+        finally:
+            metrics.record(route, (time.perf_counter() - started) * 1000, recorder, size)
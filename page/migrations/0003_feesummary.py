@@ -0,0 +1,55 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:59
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def backfill_fee_summaries(apps, schema_editor):
+    Student = apps.get_model('page', 'Student')
+    FeeReceipt = apps.get_model('page', 'FeeReceipt')
+    FeeSummary = apps.get_model('page', 'FeeSummary')
+
+    latest = FeeReceipt.objects.filter(student=OuterRef('pk')).order_by('-date', '-id')
+    students = Student.objects.annotate(
+        paid=Coalesce(Sum('receipts__amount'), 0),
+        last_receipt_id=Subquery(latest.values('id')[:1]),
+    ).values_list('id', 'total_fees', 'paid', 'last_receipt_id')
+
+    FeeSummary.objects.bulk_create(
+        [
+            FeeSummary(
+                student_id=student_id,
+                total_fees=total_fees,
+                paid_fees=paid,
+                due_fees=max(total_fees - paid, 0),
+                last_receipt_id=last_receipt_id,
+            )
+            for student_id, total_fees, paid, last_receipt_id in students.iterator()
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('page', '0002_student_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeeSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_fees', models.PositiveIntegerField(default=0)),
+                ('paid_fees', models.PositiveIntegerField(default=0)),
+                ('due_fees', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('last_receipt', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='page.feereceipt')),
+                ('student', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='fee_summary', to='page.student')),
+            ],
+        ),
+        migrations.RunPython(backfill_fee_summaries, migrations.RunPython.noop),
+    ]
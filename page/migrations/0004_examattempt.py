@@ -0,0 +1,78 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.utils.dateparse import parse_date
+
+# ExamAttempt field -> legacy comma-separated Student column
+EXAM_COLUMNS = [
+    ('course', 'Exam_Course'),
+    ('hallticket_no', 'hallticket_no'),
+    ('exam_date', 'Exam_Date'),
+    ('certificate_status', 'Certificate_status'),
+    ('issued_status', 'Issued_status'),
+]
+
+
+def _parse_date(value):
+    try:
+        return parse_date(value) if value else None
+    except ValueError:
+        return None
+
+
+def split_exam_columns(apps, schema_editor):
+    Student = apps.get_model('page', 'Student')
+    ExamAttempt = apps.get_model('page', 'ExamAttempt')
+
+    students = Student.objects.exclude(Exam_Course__isnull=True).exclude(Exam_Course='')
+    attempts = []
+    for student in students.only('id', *[column for _, column in EXAM_COLUMNS]).iterator():
+        columns = {
+            field: (getattr(student, column) or '').split(',')
+            for field, column in EXAM_COLUMNS
+        }
+        length = max(len(values) for values in columns.values())
+
+        seen = set()
+        for i in range(length):
+            row = {
+                field: (values[i] if i < len(values) else '').strip()
+                for field, values in columns.items()
+            }
+            if not row['course'] or row['course'] in seen:
+                continue
+            seen.add(row['course'])
+            row['exam_date'] = _parse_date(row['exam_date'])
+            attempts.append(ExamAttempt(student_id=student.id, position=len(seen) - 1, **row))
+
+    ExamAttempt.objects.bulk_create(attempts, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('page', '0003_feesummary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExamAttempt',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveSmallIntegerField(default=0)),
+                ('course', models.CharField(max_length=100)),
+                ('hallticket_no', models.CharField(blank=True, default='', max_length=50)),
+                ('exam_date', models.DateField(blank=True, null=True)),
+                ('certificate_status', models.CharField(blank=True, default='', max_length=20)),
+                ('issued_status', models.CharField(blank=True, default='', max_length=30)),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='exam_attempts', to='page.student')),
+            ],
+            options={
+                'ordering': ['student', 'position'],
+                'indexes': [models.Index(fields=['course', 'exam_date'], name='examattempt_course_date_idx'), models.Index(fields=['exam_date'], name='examattempt_exam_date_idx'), models.Index(fields=['certificate_status', 'course'], name='examattempt_cert_status_idx')],
+                'constraints': [models.UniqueConstraint(fields=('student', 'course'), name='unique_exam_attempt_per_course')],
+            },
+        ),
+        migrations.RunPython(split_exam_columns, migrations.RunPython.noop),
+    ]
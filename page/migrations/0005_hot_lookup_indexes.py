@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:02
+
+import django.db.models.functions.comparison
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('page', '0004_examattempt'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='batch',
+            index=models.Index(fields=['faculty', 'date'], name='batch_faculty_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='break',
+            index=models.Index(fields=['student', 'from_date'], name='break_student_from_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='break',
+            index=models.Index(fields=['from_date', 'to_date'], name='break_from_to_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='feereceipt',
+            index=models.Index(fields=['student', 'date'], name='feereceipt_student_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(fields=['regno'], name='student_regno_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(fields=['date_of_joining'], name='student_doj_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(django.db.models.functions.comparison.Collate('course', 'nocase'), models.F('date_of_joining'), name='student_course_doj_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(django.db.models.functions.comparison.Collate('studentname', 'nocase'), name='student_name_nocase_idx'),
+        ),
+    ]
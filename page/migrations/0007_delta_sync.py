@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:07
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('page', '0006_change_tracking'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(max_length=50)),
+                ('object_id', models.BigIntegerField()),
+                ('deleted_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='batch',
+            index=models.Index(fields=['updated_at'], name='batch_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='break',
+            index=models.Index(fields=['updated_at'], name='break_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='feereceipt',
+            index=models.Index(fields=['updated_at'], name='feereceipt_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(fields=['updated_at'], name='student_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tombstone',
+            index=models.Index(fields=['model', 'deleted_at'], name='tombstone_model_deleted_idx'),
+        ),
+    ]
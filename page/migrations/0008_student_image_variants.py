@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('page', '0007_delta_sync'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='student',
+            name='image_medium',
+            field=models.ImageField(blank=True, editable=False, null=True, upload_to='student_images/'),
+        ),
+        migrations.AddField(
+            model_name='student',
+            name='image_small',
+            field=models.ImageField(blank=True, editable=False, null=True, upload_to='student_images/'),
+        ),
+    ]
@@ -0,0 +1,61 @@
+from django.db import migrations
+
+COLUMNS = ["studentname", "father_name", "regno", "contact", "email", "course"]
+
+
+def _values(prefix):
+    return ", ".join(f"{prefix}.{column}" for column in COLUMNS)
+
+
+FORWARD = [
+    # External content: the index stores tokens only, rows are read back
+    # from page_student. prefix= keeps 2- and 3-letter typeahead cheap.
+    "CREATE VIRTUAL TABLE page_student_fts USING fts5("
+    f"{', '.join(COLUMNS)}, content='page_student', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+
+    "CREATE TRIGGER page_student_fts_insert AFTER INSERT ON page_student BEGIN "
+    f"INSERT INTO page_student_fts(rowid, {', '.join(COLUMNS)}) VALUES (new.id, {_values('new')}); "
+    "END",
+
+    "CREATE TRIGGER page_student_fts_delete AFTER DELETE ON page_student BEGIN "
+    f"INSERT INTO page_student_fts(page_student_fts, rowid, {', '.join(COLUMNS)}) "
+    f"VALUES ('delete', old.id, {_values('old')}); "
+    "END",
+
+    f"CREATE TRIGGER page_student_fts_update AFTER UPDATE OF {', '.join(COLUMNS)} ON page_student BEGIN "
+    f"INSERT INTO page_student_fts(page_student_fts, rowid, {', '.join(COLUMNS)}) "
+    f"VALUES ('delete', old.id, {_values('old')}); "
+    f"INSERT INTO page_student_fts(rowid, {', '.join(COLUMNS)}) VALUES (new.id, {_values('new')}); "
+    "END",
+
+    "INSERT INTO page_student_fts(page_student_fts) VALUES ('rebuild')",
+]
+
+BACKWARD = [
+    "DROP TRIGGER IF EXISTS page_student_fts_update",
+    "DROP TRIGGER IF EXISTS page_student_fts_delete",
+    "DROP TRIGGER IF EXISTS page_student_fts_insert",
+    "DROP TABLE IF EXISTS page_student_fts",
+]
+
+
+def _run(statements):
+    def run(apps, schema_editor):
+        # FTS5 is SQLite only; other backends use the ORM fallback in page.search
+        if schema_editor.connection.vendor != "sqlite":
+            return
+        for sql in statements:
+            schema_editor.execute(sql)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('page', '0008_student_image_variants'),
+    ]
+
+    operations = [
+        migrations.RunPython(_run(FORWARD), _run(BACKWARD)),
+    ]
@@ -0,0 +1,79 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:27
+
+import re
+from datetime import time
+
+from django.db import migrations, models
+
+# Frozen copy of page.timeslots.parse_time_slot as of this migration
+_CLOCK = r'(\d{1,2})(?:[:.](\d{2}))?\s*(AM|PM)?'
+_SLOT = re.compile(rf'^{_CLOCK}(?:\s*(?:-|–|TO)\s*{_CLOCK})?$')
+
+
+def _to_24h(hour, minute, meridiem):
+    if meridiem == 'AM':
+        hour = 0 if hour == 12 else hour
+    elif meridiem == 'PM':
+        hour = hour if hour == 12 else hour + 12
+    elif 1 <= hour <= 6:
+        hour += 12
+    if hour > 23 or minute > 59:
+        raise ValueError
+    return hour * 60 + minute
+
+
+def _parse_time_slot(text):
+    match = _SLOT.match((text or '').strip().upper())
+    if not match:
+        return None, None
+    h1, m1, mer1, h2, m2, mer2 = match.groups()
+    try:
+        if h2 is None:
+            start = _to_24h(int(h1), int(m1 or 0), mer1)
+            end = min(start + 60, 24 * 60 - 1)
+        else:
+            end = _to_24h(int(h2), int(m2 or 0), mer2)
+            start = _to_24h(int(h1), int(m1 or 0), mer1 or mer2)
+            if mer1 is None and mer2 is not None and start >= end:
+                start = _to_24h(int(h1), int(m1 or 0), 'AM' if mer2 == 'PM' else 'PM')
+    except ValueError:
+        return None, None
+    if not start < end <= 24 * 60:
+        return None, None
+    end = min(end, 24 * 60 - 1)
+    return time(start // 60, start % 60), time(end // 60, end % 60)
+
+
+def parse_batch_times(apps, schema_editor):
+    Batch = apps.get_model('page', 'Batch')
+    batches = []
+    for batch in Batch.objects.only('id', 'batch_time').iterator():
+        batch.start_time, batch.end_time = _parse_time_slot(batch.batch_time)
+        if batch.start_time is not None:
+            batches.append(batch)
+    Batch.objects.bulk_update(batches, ['start_time', 'end_time'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('page', '0010_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='batch',
+            name='end_time',
+            field=models.TimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='batch',
+            name='start_time',
+            field=models.TimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='batch',
+            index=models.Index(fields=['date', 'start_time', 'end_time'], name='batch_date_slot_idx'),
+        ),
+        migrations.RunPython(parse_batch_times, migrations.RunPython.noop),
+    ]
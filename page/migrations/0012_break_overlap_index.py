@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('page', '0011_batch_time_slots'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='break',
+            name='break_from_to_idx',
+        ),
+        migrations.AddIndex(
+            model_name='break',
+            index=models.Index(fields=['to_date', 'from_date', 'student'], name='break_to_from_idx'),
+        ),
+    ]
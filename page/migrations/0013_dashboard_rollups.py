@@ -0,0 +1,85 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:31
+
+from collections import Counter
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def fill_rollups(apps, schema_editor):
+    Student = apps.get_model('page', 'Student')
+    FeeReceipt = apps.get_model('page', 'FeeReceipt')
+    ExamAttempt = apps.get_model('page', 'ExamAttempt')
+
+    enrolment = Counter()
+    for row in Student.objects.values('course', 'date_of_joining').annotate(n=Count('id')):
+        joined = row['date_of_joining']
+        enrolment[row['course'], joined.replace(day=1) if joined else None] += row['n']
+    EnrolmentRollup = apps.get_model('page', 'EnrolmentRollup')
+    EnrolmentRollup.objects.bulk_create(
+        [EnrolmentRollup(course=course, month=month, students=n)
+         for (course, month), n in enrolment.items()],
+        batch_size=500,
+    )
+
+    FeeCollectionRollup = apps.get_model('page', 'FeeCollectionRollup')
+    FeeCollectionRollup.objects.bulk_create(
+        [FeeCollectionRollup(date=row['date'], course=row['student__course'], receipts=row['n'], amount=row['total'] or 0)
+         for row in FeeReceipt.objects.values('date', 'student__course').annotate(n=Count('id'), total=Sum('amount'))],
+        batch_size=500,
+    )
+
+    CertificateRollup = apps.get_model('page', 'CertificateRollup')
+    CertificateRollup.objects.bulk_create(
+        [CertificateRollup(course=row['course'], certificate_status=row['certificate_status'], attempts=row['n'])
+         for row in ExamAttempt.objects.values('course', 'certificate_status').annotate(n=Count('id'))],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('page', '0012_break_overlap_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CertificateRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('course', models.CharField(max_length=100)),
+                ('certificate_status', models.CharField(blank=True, default='', max_length=20)),
+                ('attempts', models.IntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('course', 'certificate_status'), name='unique_certificate_rollup')],
+            },
+        ),
+        migrations.CreateModel(
+            name='EnrolmentRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('course', models.CharField(max_length=500)),
+                ('month', models.DateField(blank=True, null=True)),
+                ('students', models.IntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('course', 'month'), name='unique_enrolment_rollup')],
+            },
+        ),
+        migrations.CreateModel(
+            name='FeeCollectionRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('course', models.CharField(max_length=500)),
+                ('receipts', models.IntegerField(default=0)),
+                ('amount', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('date', 'course'), name='unique_fee_collection_rollup')],
+            },
+        ),
+        migrations.RunPython(fill_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:07
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def merge_duplicate_rows(apps, schema_editor):
+    """Fold rows without a month that concurrent first writes duplicated."""
+    EnrolmentRollup = apps.get_model('page', 'EnrolmentRollup')
+    duplicated = (
+        EnrolmentRollup.objects.filter(month__isnull=True)
+        .values('course').annotate(n=Count('id'), students=Sum('students')).filter(n__gt=1)
+    )
+    for row in duplicated:
+        rows = EnrolmentRollup.objects.filter(course=row['course'], month__isnull=True).order_by('id')
+        keep = rows.first()
+        rows.exclude(pk=keep.pk).delete()
+        EnrolmentRollup.objects.filter(pk=keep.pk).update(students=row['students'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('page', '0014_change_events'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_rows, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='enrolmentrollup',
+            constraint=models.UniqueConstraint(condition=models.Q(('month__isnull', True)), fields=('course',), name='unique_enrolment_rollup_no_month'),
+        ),
+    ]
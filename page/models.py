@@ -1,19 +1,73 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Collate, Greatest
+from django.utils import timezone
+from django.utils.dateparse import parse_date
 from django.core.validators import (
     MinValueValidator, MaxValueValidator, RegexValidator, EmailValidator
 )
 from datetime import date
 
+from . import events
+from .images import process_upload
+from .timeslots import parse_time_slot
+
 class Course(models.Model):
     name = models.CharField(max_length=100, unique=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def str(self):
         return self.name
     
 
+class StudentQuerySet(models.QuerySet):
+    def with_fee_totals(self):
+        """
+        Annotate ``paid_fees`` and ``due_fees`` from the FeeSummary ledger
+        (a single LEFT JOIN, no per-student receipt scan).
+        """
+        return self.annotate(
+            paid_fees=Coalesce(F("fee_summary__paid_fees"), 0),
+            due_fees=Greatest(F("total_fees") - Coalesce(F("fee_summary__paid_fees"), 0), 0),
+            last_payment_date=F("fee_summary__last_receipt__date"),
+        )
+
+    def enrolled_by(self, day):
+        """Students who had joined by ``day`` (or whose joining date is unknown)."""
+        return self.filter(Q(date_of_joining__isnull=True) | Q(date_of_joining__lte=day))
+
+    def on_break(self, start, end=None):
+        """Students with a break overlapping ``start``-``end`` (one day when ``end`` is omitted)."""
+        return self.filter(pk__in=Break.objects.overlapping(start, end).values("student_id"))
+
+    def active_on(self, start, end=None):
+        """Enrolled students with no break overlapping ``start``-``end``."""
+        end = end or start
+        return self.enrolled_by(end).exclude(pk__in=Break.objects.overlapping(start, end).values("student_id"))
+
+    def attendance_counts(self, start, end=None):
+        """
+        Enrolled / active / on-break counts per (course, batchtime) for
+        ``start``-``end``, in a single grouped query. The on-break set is
+        an IN subquery over ``break_to_from_idx``.
+        """
+        end = end or start
+        on_break = Q(pk__in=Break.objects.overlapping(start, end).values("student_id"))
+        return list(
+            self.enrolled_by(end)
+            .order_by()
+            .values("course", "batchtime")
+            .annotate(enrolled=Count("id"), on_break=Count("id", filter=on_break))
+            .annotate(active=F("enrolled") - F("on_break"))
+            .order_by("course", "batchtime")
+        )
+
+
 class Student(models.Model):
     # Basic Details
     image = models.ImageField(upload_to='student_images/', null=True, blank=True)
+    image_medium = models.ImageField(upload_to='student_images/', null=True, blank=True, editable=False)
+    image_small = models.ImageField(upload_to='student_images/', null=True, blank=True, editable=False)
     studentname = models.CharField(
         max_length=50,
         validators=[RegexValidator(r'^[A-Za-z ]+$', 'Only letters and spaces are allowed.')]
@@ -71,9 +125,167 @@ class Student(models.Model):
     total_fees = models.PositiveIntegerField(default=0)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = StudentQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['regno'], name='student_regno_idx'),
+            models.Index(fields=['date_of_joining'], name='student_doj_idx'),
+            # NOCASE collation lets SQLite serve course__iexact / istartswith
+            # (compiled to LIKE) from the index
+            models.Index(Collate('course', 'nocase'), F('date_of_joining'), name='student_course_doj_idx'),
+            models.Index(Collate('studentname', 'nocase'), name='student_name_nocase_idx'),
+            models.Index(fields=['updated_at'], name='student_updated_idx'),
+        ]
+
     def str(self):
         return f"{self.studentname} ({self.regno})"
-    
+
+    def save(self, *args, **kwargs):
+        # Fresh uploads are downscaled, stripped and given thumbnails
+        if self.image and not self.image._committed and not getattr(self, "_image_processed", False):
+            process_upload(self)
+        elif not self.image:
+            self.image_medium = self.image_small = None
+
+        super().save(*args, **kwargs)
+        self._image_processed = False
+
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None or "total_fees" in update_fields:
+            # Keep the fee ledger in step with a changed course fee
+            FeeSummary.objects.filter(student=self).update(
+                total_fees=self.total_fees,
+                due_fees=Greatest(Value(self.total_fees) - F("paid_fees"), 0),
+                updated_at=timezone.now(),
+            )
+
+    def parse_exam_columns(self):
+        """
+        Split the legacy comma-separated exam columns into one dict per
+        course, padding short columns with "" the way the old update did.
+        """
+        columns = {
+            field: (getattr(self, column) or "").split(",") if getattr(self, column) else []
+            for field, column in EXAM_COLUMNS
+        }
+        length = max(len(values) for values in columns.values())
+
+        rows, seen = [], set()
+        for i in range(length):
+            row = {
+                field: (values[i] if i < len(values) else "").strip()
+                for field, values in columns.items()
+            }
+            if not row["course"] or row["course"] in seen:
+                continue
+            seen.add(row["course"])
+            rows.append(row)
+        return rows
+
+    def build_exam_attempts(self):
+        """Unsaved ExamAttempt rows parsed from the legacy columns."""
+        attempts = []
+        for position, row in enumerate(self.parse_exam_columns()):
+            row["exam_date"] = ExamAttempt.parse_exam_date(row["exam_date"])
+            attempts.append(ExamAttempt(student=self, position=position, **row))
+        return attempts
+
+    def sync_exam_attempts(self):
+        """
+        Replace this student's ExamAttempt rows with the legacy columns;
+        returns the new rows, or [] when the rows already match them.
+        """
+        attempts = self.build_exam_attempts()
+        current = self.exam_attempts.order_by("position", "id")
+        if [attempt.exam_values() for attempt in current] == [attempt.exam_values() for attempt in attempts]:
+            return []
+        self.exam_attempts.all().delete()
+        return ExamAttempt.objects.bulk_create(attempts)
+
+    def sync_exam_columns(self):
+        """Rewrite the legacy comma-separated columns from ExamAttempt rows."""
+        attempts = list(self.exam_attempts.order_by("position", "id"))
+        for field, column in EXAM_COLUMNS:
+            values = [attempt.column_value(field) for attempt in attempts]
+            setattr(self, column, ",".join(values))
+        self.save(update_fields=[column for _, column in EXAM_COLUMNS] + ["updated_at"])
+
+    @classmethod
+    def bulk_sync_exam_columns(cls, student_ids):
+        """``sync_exam_columns`` for many students: two reads and one bulk_update."""
+        attempts = {}
+        for attempt in ExamAttempt.objects.filter(student_id__in=student_ids).order_by("position", "id"):
+            attempts.setdefault(attempt.student_id, []).append(attempt)
+
+        columns = [column for _, column in EXAM_COLUMNS]
+        students = list(cls.objects.filter(pk__in=student_ids).only("id", *columns))
+        now = timezone.now()
+        for student in students:
+            rows = attempts.get(student.id, [])
+            for field, column in EXAM_COLUMNS:
+                setattr(student, column, ",".join(attempt.column_value(field) for attempt in rows))
+            student.updated_at = now
+        cls.objects.bulk_update(students, columns + ["updated_at"], batch_size=500)
+
+
+# ExamAttempt field -> legacy comma-separated Student column
+EXAM_COLUMNS = [
+    ("course", "Exam_Course"),
+    ("hallticket_no", "hallticket_no"),
+    ("exam_date", "Exam_Date"),
+    ("certificate_status", "Certificate_status"),
+    ("issued_status", "Issued_status"),
+]
+
+
+class ExamAttempt(models.Model):
+    """
+    One exam a student has registered for. The comma-separated exam
+    columns on Student are kept as a read-only projection of these rows
+    for older clients.
+    """
+    student = models.ForeignKey(Student, related_name='exam_attempts', on_delete=models.CASCADE)
+    position = models.PositiveSmallIntegerField(default=0)
+    course = models.CharField(max_length=100)
+    hallticket_no = models.CharField(max_length=50, blank=True, default="")
+    exam_date = models.DateField(null=True, blank=True)
+    certificate_status = models.CharField(max_length=20, blank=True, default="")
+    issued_status = models.CharField(max_length=30, blank=True, default="")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['student', 'position']
+        constraints = [
+            models.UniqueConstraint(fields=['student', 'course'], name='unique_exam_attempt_per_course'),
+        ]
+        indexes = [
+            models.Index(fields=['course', 'exam_date'], name='examattempt_course_date_idx'),
+            models.Index(fields=['exam_date'], name='examattempt_exam_date_idx'),
+            models.Index(fields=['certificate_status', 'course'], name='examattempt_cert_status_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.student_id} — {self.course}"
+
+    @staticmethod
+    def parse_exam_date(value):
+        """ISO date string -> date; blank or unparsable values become None."""
+        try:
+            return parse_date(value) if value else None
+        except ValueError:
+            return None
+
+    def exam_values(self):
+        """The values the legacy exam columns hold for this attempt."""
+        return tuple(getattr(self, field) for field, _ in EXAM_COLUMNS)
+
+    def column_value(self, field):
+        value = getattr(self, field)
+        if value is None:
+            return ""
+        return value.isoformat() if field == "exam_date" else value
+
 
 class Faculty(models.Model):
     faculty_name = models.CharField(
@@ -87,6 +299,7 @@ class Faculty(models.Model):
         null=True
     )
     subjects = models.JSONField(default=list, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def str(self):
         return f"{self.faculty_name} ({self.batch_details})"
@@ -98,19 +311,58 @@ class Batch(models.Model):
     date = models.DateField()
     batch_time = models.CharField(max_length=20, null=True, blank=True)
     subject = models.CharField(max_length=100, blank=True, null=True)
+    # Parsed from batch_time on save; null when it cannot be read
+    start_time = models.TimeField(null=True, blank=True, editable=False)
+    end_time = models.TimeField(null=True, blank=True, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['faculty', 'date'], name='batch_faculty_date_idx'),
+            models.Index(fields=['updated_at'], name='batch_updated_idx'),
+            # Range lookups for the timetable ("who is busy on <date> between ...")
+            models.Index(fields=['date', 'start_time', 'end_time'], name='batch_date_slot_idx'),
+        ]
 
     def str(self):
         return f"{self.faculty.faculty_name} — {self.label}"
 
+    def parse_batch_time(self):
+        self.start_time, self.end_time = parse_time_slot(self.batch_time)
+        return self
+
+    def save(self, *args, **kwargs):
+        self.parse_batch_time()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "batch_time" in update_fields:
+            kwargs["update_fields"] = set(update_fields) | {"start_time", "end_time"}
+        super().save(*args, **kwargs)
+
+
+class BreakQuerySet(models.QuerySet):
+    def overlapping(self, start, end=None):
+        """Breaks covering any day of ``start``-``end`` (inclusive)."""
+        return self.filter(from_date__lte=end or start, to_date__gte=start)
+
 
 class Break(models.Model):
     student = models.ForeignKey(Student, related_name='breaks', on_delete=models.CASCADE)
     from_date = models.DateField()
     to_date = models.DateField()
     reason = models.TextField(blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = BreakQuerySet.as_manager()
 
     class Meta:
         ordering = ['-from_date']
+        indexes = [
+            models.Index(fields=['student', 'from_date'], name='break_student_from_idx'),
+            # Overlap lookups ("on break on day D") bound to_date from below;
+            # most breaks have ended, so this range stays short
+            models.Index(fields=['to_date', 'from_date', 'student'], name='break_to_from_idx'),
+            models.Index(fields=['updated_at'], name='break_updated_idx'),
+        ]
 
     def str(self):
         return f"{self.student.studentname} ({self.from_date} - {self.to_date})"
@@ -130,68 +382,304 @@ class FeeReceipt(models.Model):
     amount = models.PositiveIntegerField(validators=[MinValueValidator(0)])
 
     date = models.DateField(default=date.today)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def _str_(self):
         return f"Receipt {self.receipt_no} - {self.student.studentname}"
 
     class Meta:
         ordering = ['-date']
+        indexes = [
+            models.Index(fields=['student', 'date'], name='feereceipt_student_date_idx'),
+            models.Index(fields=['updated_at'], name='feereceipt_updated_idx'),
+        ]
 
     def save(self, *args, **kwargs):
+        with transaction.atomic():
+            summary = FeeSummary.for_student(self.student)
+            self.total_fees = self.student.total_fees
+
+            # Previous amount (and owner, in case the receipt was moved)
+            old = None
+            if self.pk:
+                old = FeeReceipt.objects.filter(pk=self.pk).values("student_id", "amount").first()
+
+            old_amount = 0
+            if old and old["student_id"] == self.student_id:
+                old_amount = old["amount"]
+
+            already_paid = summary.paid_fees - old_amount
+
+            # Validation — now uses updated total_fees
+            if already_paid + self.amount > self.total_fees:
+                remaining = self.total_fees - already_paid
+                raise ValueError(
+                    f"Payment Error: You are trying to pay {self.amount}, "
+                    f"but only {remaining} is remaining."
+                )
+
+            self.paid_fees = already_paid + self.amount
+            self.due_fees = max(self.total_fees - self.paid_fees, 0)
+
+            super().save(*args, **kwargs)
+
+            summary.apply_payment(self.amount - old_amount, last_receipt=self._latest_for(summary))
+            if old and old["student_id"] != self.student_id:
+                latest = FeeReceipt.objects.filter(student_id=old["student_id"]).order_by("-date", "-id")
+                FeeSummary.objects.filter(student_id=old["student_id"]).update(
+                    paid_fees=F("paid_fees") - old["amount"],
+                    due_fees=Greatest(F("total_fees") - F("paid_fees") + old["amount"], 0),
+                    last_receipt=Subquery(latest.values("id")[:1]),
+                    updated_at=timezone.now(),
+                )
+
+    def _latest_for(self, summary):
+        """
+        The student's latest receipt (by date, then id) once this one is
+        saved, as ``delete`` orders them. Backdated receipts keep the
+        current latest; only a latest receipt moved back in time re-queries.
+        """
+        current = summary.last_receipt
+        if current is None or (self.date, self.pk) >= (current.date, current.pk):
+            return self
+        if current.pk == self.pk:
+            return FeeReceipt.objects.filter(student=self.student).order_by("-date", "-id").first()
+        return current
 
-        
-        self.total_fees = self.student.total_fees
-
-        # Previous amount
-        if self.pk:
-            old = FeeReceipt.objects.get(pk=self.pk)
-            old_amount = old.amount
-        else:
-            old_amount = 0  
-
-        old_receipts = FeeReceipt.objects.filter(student=self.student).exclude(pk=self.pk)
-        already_paid = sum(r.amount for r in old_receipts)
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            student = self.student
+            summary = FeeSummary.for_student(student)
+            result = super().delete(*args, **kwargs)
+
+            total_paid = summary.paid_fees - self.amount
+            latest = FeeReceipt.objects.filter(student=student).order_by("-date", "-id").first()
+            summary.apply_payment(-self.amount, last_receipt=latest)
+
+            siblings = FeeReceipt.objects.filter(student=student)
+            siblings.update(
+                paid_fees=total_paid,
+                due_fees=Greatest(F("total_fees") - total_paid, 0),
+                updated_at=timezone.now(),
+            )
+            events.publish_many(FeeReceipt, siblings.values_list("pk", flat=True))
+        return result
+
+
+class FeeSummary(models.Model):
+    """
+    Running fee totals for one student, kept in step with FeeReceipt
+    saves and deletes so payments never re-sum the receipt history.
+    """
+    student = models.OneToOneField(
+        Student, on_delete=models.CASCADE, related_name='fee_summary'
+    )
+    total_fees = models.PositiveIntegerField(default=0)
+    paid_fees = models.PositiveIntegerField(default=0)
+    due_fees = models.PositiveIntegerField(default=0)
+    last_receipt = models.ForeignKey(
+        FeeReceipt, on_delete=models.SET_NULL, null=True, blank=True, related_name='+'
+    )
+    updated_at = models.DateTimeField(auto_now=True)
 
-        # Validation — now uses updated total_fees
-        if already_paid + self.amount > self.total_fees:
-            remaining = self.total_fees - already_paid
-            raise ValueError(
-                f"Payment Error: You are trying to pay {self.amount}, "
-                f"but only {remaining} is remaining."
-            )        
+    def __str__(self):
+        return f"{self.student_id}: paid {self.paid_fees} / {self.total_fees}"
+
+    @classmethod
+    def for_student(cls, student):
+        """
+        Locked summary row for ``student``. Created from the existing
+        receipts the first time it is needed.
+        """
+        summary = cls.objects.select_for_update(of=("self",)).select_related("last_receipt").filter(student=student).first()
+        if summary is not None:
+            summary.student = student
+            return summary
+
+        paid = student.receipts.aggregate(total=Sum("amount"))["total"] or 0
+        return cls.objects.create(
+            student=student,
+            total_fees=student.total_fees,
+            paid_fees=paid,
+            due_fees=max(student.total_fees - paid, 0),
+            last_receipt=student.receipts.order_by("-date", "-id").first(),
+        )
+
+    @classmethod
+    def rebuild_all(cls, batch_size=500):
+        """
+        Recompute every summary from the receipts with one aggregate query.
+        Used after receipts are written in bulk (which skips save()).
+        """
+        latest = FeeReceipt.objects.filter(student=OuterRef("pk")).order_by("-date", "-id")
+        students = Student.objects.annotate(
+            paid=Coalesce(Sum("receipts__amount"), 0),
+            last_receipt_id=Subquery(latest.values("id")[:1]),
+        ).values_list("id", "total_fees", "paid", "last_receipt_id")
+
+        with transaction.atomic():
+            cls.objects.all().delete()
+            cls.objects.bulk_create(
+                (
+                    cls(
+                        student_id=student_id,
+                        total_fees=total_fees,
+                        paid_fees=paid,
+                        due_fees=max(total_fees - paid, 0),
+                        last_receipt_id=last_receipt_id,
+                    )
+                    for student_id, total_fees, paid, last_receipt_id in students.iterator()
+                ),
+                batch_size=batch_size,
+            )
+
+    def apply_payment(self, delta, last_receipt=None):
+        """Add ``delta`` to the paid total in a single UPDATE."""
+        total_fees = self.student.total_fees
+        FeeSummary.objects.filter(pk=self.pk).update(
+            total_fees=total_fees,
+            paid_fees=F("paid_fees") + delta,
+            due_fees=Greatest(Value(total_fees) - F("paid_fees") - delta, 0),
+            last_receipt=last_receipt,
+            updated_at=timezone.now(),
+        )
+        self.total_fees = total_fees
+        self.paid_fees += delta
+        self.due_fees = max(total_fees - self.paid_fees, 0)
+        self.last_receipt = last_receipt
+
+
+class Tombstone(models.Model):
+    """
+    Marker left behind when a row is deleted, so delta-sync clients can
+    drop it from their local copy. Written from post_delete signals.
+    """
+    model = models.CharField(max_length=50)
+    object_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now)
 
-        super().save(*args, **kwargs)
+    class Meta:
+        indexes = [
+            models.Index(fields=['model', 'deleted_at'], name='tombstone_model_deleted_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.model} #{self.object_id} deleted {self.deleted_at}"
+
+
+class ChangeEvent(models.Model):
+    """
+    One write to a published model, for the ``/api/events/`` feed.
+    Inserted in the writing transaction, so every process (web workers
+    and run_jobs) sees the same events once they commit; the id is the
+    SSE event id. See ``page.events``.
+    """
+    model = models.CharField(max_length=50)
+    object_id = models.BigIntegerField()
+    op = models.CharField(max_length=10)
+    # The row's updated_at after the write; null for deletes
+    version = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
 
-        # Recalculate totals
-        all_receipts = FeeReceipt.objects.filter(student=self.student)
-        total_paid = sum(r.amount for r in all_receipts)
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at'], name='changeevent_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"#{self.pk} {self.op} {self.model} #{self.object_id}"
+
+
+class Job(models.Model):
+    """
+    A unit of background work (export, import, photo processing, fee
+    rebuild) queued in the database and picked up by ``run_jobs`` workers.
+    See ``page.jobs`` for the handlers.
+    """
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    STATUS_CHOICES = [(QUEUED, "Queued"), (RUNNING, "Running"), (DONE, "Done"), (FAILED, "Failed")]
+    KIND_CHOICES = [
+        ("export", "Student export (xlsx / csv)"),
+        ("import_students", "Bulk student import"),
+        ("process_photos", "Student photo processing"),
+        ("rebuild_fee_summaries", "Fee totals recalculation"),
+    ]
+
+    kind = models.CharField(max_length=50, choices=KIND_CHOICES)
+    params = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    progress = models.PositiveSmallIntegerField(default=0)
+    message = models.CharField(max_length=300, blank=True, default="")
+    result = models.JSONField(null=True, blank=True)
+
+    input_file = models.FileField(upload_to='jobs/input/', null=True, blank=True)
+    artifact = models.FileField(upload_to='jobs/output/', null=True, blank=True)
+
+    worker = models.CharField(max_length=100, blank=True, default="")
+    created_at = models.DateTimeField(default=timezone.now)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
-        self.paid_fees = total_paid
-        self.due_fees = max(self.total_fees - total_paid, 0)
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'id'], name='job_status_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} #{self.pk} ({self.status})"
+
+    def set_progress(self, progress, message=None):
+        """Record progress (0-100) with a single UPDATE; safe to call often."""
+        self.progress = max(0, min(int(progress), 100))
+        fields = {"progress": self.progress, "updated_at": timezone.now()}
+        if message is not None:
+            self.message = fields["message"] = message[:300]
+        Job.objects.filter(pk=self.pk).update(**fields)
+
+
+# -------------------------------------------------------------
+# DASHBOARD ROLLUPS (maintained by page.rollups)
+# -------------------------------------------------------------
+class EnrolmentRollup(models.Model):
+    """Students per course and joining month (null month: joining date unknown)."""
+    course = models.CharField(max_length=500)
+    month = models.DateField(null=True, blank=True)
+    students = models.IntegerField(default=0)
 
-        super().save(update_fields=["paid_fees", "due_fees"])
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['course', 'month'], name='unique_enrolment_rollup'),
+            # NULLs are distinct in unique indexes, so the rows without a
+            # month need their own
+            models.UniqueConstraint(fields=['course'], condition=Q(month__isnull=True),
+                                    name='unique_enrolment_rollup_no_month'),
+        ]
 
-    def delete(self, *args, **kwargs):
-        student = self.student
-        super().delete(*args, **kwargs)
 
-        receipts = FeeReceipt.objects.filter(student=student)
-        total_paid = sum(r.amount for r in receipts)
+class FeeCollectionRollup(models.Model):
+    """Receipts and amount collected per day and student course."""
+    date = models.DateField()
+    course = models.CharField(max_length=500)
+    receipts = models.IntegerField(default=0)
+    amount = models.BigIntegerField(default=0)
 
-        for r in receipts:
-            r.paid_fees = total_paid
-            r.due_fees = max(r.total_fees - total_paid, 0)
-            r.save(update_fields=["paid_fees", "due_fees"])
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'course'], name='unique_fee_collection_rollup'),
+        ]
 
-    
-    def delete(self, *args, **kwargs):
-        student = self.student
-        super().delete(*args, **kwargs)
 
-        receipts = FeeReceipt.objects.filter(student=student)
-        total_paid = sum(r.amount for r in receipts)
+class CertificateRollup(models.Model):
+    """Exam attempts per exam course and certificate status."""
+    course = models.CharField(max_length=100)
+    certificate_status = models.CharField(max_length=20, blank=True, default="")
+    attempts = models.IntegerField(default=0)
 
-        for r in receipts:
-            r.paid_fees = total_paid
-            r.due_fees = max(r.total_fees - total_paid, 0)
-            r.save(update_fields=["paid_fees", "due_fees"])
\ No newline at end of file
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['course', 'certificate_status'], name='unique_certificate_rollup'),
+        ]
@@ -0,0 +1,92 @@
+"""
+Helpers for the async views (export, bulk import, photo upload).
+
+Under an ASGI server the event loop must never block, so those views
+split their work in two:
+
+* ORM calls go through ``run_db`` (``sync_to_async`` with
+  ``thread_sensitive=True``). Django's ASGIHandler gives each request its
+  own ThreadSensitiveContext, so all of a request's ORM calls run on one
+  thread with one connection and transactions and tests behave as
+  usual.
+* CPU-bound work that never touches the database (openpyxl, Pillow,
+  parsing uploads, serializer validation) goes through ``run_in_pool``,
+  a per-process thread pool of ``ASYNC_OFFLOAD_THREADS`` threads.
+"""
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, "ASYNC_OFFLOAD_THREADS", 4), thread_name_prefix="page-offload"
+            )
+        return _executor
+
+
+async def run_in_pool(func, *args, **kwargs):
+    """Run DB-free blocking ``func`` in the offload pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), functools.partial(func, *args, **kwargs))
+
+
+async def run_db(func, *args, **kwargs):
+    """Run ``func`` (which may use the ORM) on Django's sync thread."""
+    return await sync_to_async(func, thread_sensitive=True)(*args, **kwargs)
+
+
+def _take(iterator, size):
+    return list(islice(iterator, size))
+
+
+async def aiter_chunks(iterable, size=500, db=True):
+    """
+    Async iterator over lists of up to ``size`` items from a sync iterable.
+    Database-backed iterables (``db=True``) are advanced on Django's sync
+    thread so their cursor never changes connection.
+    """
+    iterator = iter(iterable)
+    run = run_db if db else run_in_pool
+    try:
+        while True:
+            chunk = await run(_take, iterator, size)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        close = getattr(iterator, "close", None)
+        if close is not None:
+            await run(close)
+
+
+async def aiter_file(fh, block_size=64 * 1024):
+    """Async iterator over a binary file's blocks; closes the file at the end."""
+    try:
+        while True:
+            block = await run_in_pool(fh.read, block_size)
+            if not block:
+                break
+            yield block
+    finally:
+        await run_in_pool(fh.close)
+
+
+def serving_async(request):
+    """
+    True when the request came in through ASGI (stream with async
+    iterators). Accepts DRF requests as well as Django ones.
+    """
+    return isinstance(getattr(request, "_request", request), ASGIRequest)
@@ -0,0 +1,25 @@
+from rest_framework.pagination import CursorPagination
+
+
+# -------------------------------------------------------------
+# OPT-IN CURSOR PAGINATION
+# -------------------------------------------------------------
+class OptionalCursorPagination(CursorPagination):
+    """
+    Keyset pagination that only kicks in when the client asks for it
+    with ``?cursor=`` or ``?page_size=``. Plain list requests keep
+    returning a bare JSON array so existing screens keep working.
+    """
+    ordering = "id"
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 500
+
+    def is_requested(self, request):
+        params = request.query_params
+        return self.cursor_query_param in params or self.page_size_query_param in params
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not self.is_requested(request):
+            return None
+        return super().paginate_queryset(queryset, request, view)
@@ -0,0 +1,322 @@
+"""
+Dashboard rollups behind ``/api/stats/``: enrolment per course and
+joining month, fee collections per day and course, and exam attempts per
+course and certificate status.
+
+The rollup rows are adjusted by deltas, never recounted: signal handlers
+cover ORM saves and deletes of Student, FeeReceipt and ExamAttempt
+(cascades included), and the bulk paths that skip signals call
+``record_students`` / ``record_exam_attempts`` / ``move_certificates``.
+``rebuild`` (``manage.py rebuild_rollups``) recomputes everything from
+scratch in primary-key chunks after raw bulk writes.
+"""
+from collections import Counter
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Max, Min, QuerySet, Sum
+
+from .models import (
+    CertificateRollup, EnrolmentRollup, ExamAttempt, FeeCollectionRollup, FeeReceipt, Student
+)
+
+CHUNK_SIZE = 5000
+
+# Columns whose old values are read before a save changes a rollup key
+TRACKED_FIELDS = {
+    Student: ("course", "date_of_joining"),
+    FeeReceipt: ("student_id", "date", "amount"),
+    ExamAttempt: ("course", "certificate_status"),
+}
+
+
+def month_of(day):
+    return day.replace(day=1) if day else None
+
+
+class RollupDelta:
+    """Pending +/- adjustments, written by ``apply`` with one UPDATE per touched row."""
+
+    def __init__(self):
+        self.enrolment = Counter()
+        self.receipts = Counter()
+        self.amount = Counter()
+        self.certificates = Counter()
+
+    def student(self, course, joined, sign=1):
+        self.enrolment[course, month_of(joined)] += sign
+
+    def receipt(self, day, course, amount, count=1, sign=1):
+        self.receipts[day, course] += sign * count
+        self.amount[day, course] += sign * amount
+
+    def attempt(self, course, status, sign=1):
+        self.certificates[course, status or ""] += sign
+
+    def apply(self):
+        bumps = [
+            (EnrolmentRollup, {"course": course, "month": month}, {"students": n})
+            for (course, month), n in self.enrolment.items() if n
+        ]
+        bumps += [
+            (FeeCollectionRollup, {"date": day, "course": course},
+             {"receipts": self.receipts[day, course], "amount": self.amount[day, course]})
+            for day, course in self.receipts.keys() | self.amount.keys()
+            if self.receipts[day, course] or self.amount[day, course]
+        ]
+        bumps += [
+            (CertificateRollup, {"course": course, "certificate_status": status}, {"attempts": n})
+            for (course, status), n in self.certificates.items() if n
+        ]
+        if len(bumps) == 1:
+            _bump(*bumps[0])
+        elif bumps:
+            with transaction.atomic():
+                for bump in bumps:
+                    _bump(*bump)
+
+
+def _bump(model, key, deltas):
+    changes = {field: F(field) + delta for field, delta in deltas.items()}
+    if model.objects.filter(**key).update(**changes):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**key, **deltas)
+    except IntegrityError:
+        # Another writer created the row first
+        model.objects.filter(**key).update(**changes)
+
+
+def _cascade_course(receipt, origin):
+    """
+    Course of ``receipt``'s student when deleting that student (or a
+    queryset of students) cascaded to the receipt; None otherwise. A
+    queryset's courses are read once, not once per receipt.
+    """
+    if isinstance(origin, Student):
+        return (origin.course or "") if origin.pk == receipt.student_id else None
+    if isinstance(origin, QuerySet) and origin.model is Student:
+        courses = getattr(origin, "_rollup_courses", None)
+        if courses is None:
+            courses = origin._rollup_courses = dict(origin.values_list("pk", "course"))
+        course = courses.get(receipt.student_id)
+        return None if course is None else course or ""
+    return None
+
+
+def _student_course(receipt, student_id=None):
+    if student_id is None and FeeReceipt.student.is_cached(receipt):
+        return receipt.student.course
+    course = Student.objects.filter(pk=student_id or receipt.student_id).values_list("course", flat=True).first()
+    return course or ""
+
+
+# -------------------------------------------------------------
+# BULK PATHS
+# -------------------------------------------------------------
+def record_students(students, sign=1):
+    delta = RollupDelta()
+    for student in students:
+        delta.student(student.course, student.date_of_joining, sign)
+    delta.apply()
+
+
+def record_exam_attempts(attempts, sign=1):
+    delta = RollupDelta()
+    for attempt in attempts:
+        delta.attempt(attempt.course, attempt.certificate_status, sign)
+    delta.apply()
+
+
+def move_certificates(changes):
+    """Apply ``(course, old_status, new_status)`` changes made with update()/bulk_update()."""
+    delta = RollupDelta()
+    for course, old, new in changes:
+        delta.attempt(course, old, -1)
+        delta.attempt(course, new)
+    delta.apply()
+
+
+# -------------------------------------------------------------
+# SIGNAL HANDLERS
+# -------------------------------------------------------------
+def remember_old_values(sender, instance, update_fields=None, **kwargs):
+    fields = TRACKED_FIELDS[sender]
+    instance._rollup_old = None
+    if instance.pk is None or instance._state.adding:
+        return
+    if update_fields is not None and not {f.removesuffix("_id") for f in fields} & {
+        f.removesuffix("_id") for f in update_fields
+    }:
+        return
+    instance._rollup_old = sender.objects.filter(pk=instance.pk).values(*fields).first()
+
+
+def student_saved(sender, instance, created, **kwargs):
+    old = getattr(instance, "_rollup_old", None)
+    delta = RollupDelta()
+    if created:
+        delta.student(instance.course, instance.date_of_joining)
+    elif old and (old["course"], old["date_of_joining"]) != (instance.course, instance.date_of_joining):
+        delta.student(old["course"], old["date_of_joining"], -1)
+        delta.student(instance.course, instance.date_of_joining)
+        if old["course"] != instance.course:
+            # Collections are reported under the student's current course
+            for row in instance.receipts.order_by().values("date").annotate(n=Count("id"), total=Sum("amount")):
+                delta.receipt(row["date"], old["course"], row["total"], row["n"], -1)
+                delta.receipt(row["date"], instance.course, row["total"], row["n"])
+    delta.apply()
+
+
+def student_deleted(sender, instance, **kwargs):
+    record_students([instance], -1)
+
+
+def receipt_saved(sender, instance, created, **kwargs):
+    old = getattr(instance, "_rollup_old", None)
+    delta = RollupDelta()
+    if old and (old["student_id"], old["date"], old["amount"]) == (instance.student_id, instance.date, instance.amount):
+        return
+    if old:
+        course = _student_course(instance, old["student_id"])
+        delta.receipt(old["date"], course, old["amount"], sign=-1)
+    if created or old:
+        delta.receipt(instance.date, _student_course(instance), instance.amount)
+    delta.apply()
+
+
+def receipt_deleted(sender, instance, origin=None, **kwargs):
+    course = _cascade_course(instance, origin)
+    if course is None:
+        course = _student_course(instance)
+    delta = RollupDelta()
+    delta.receipt(instance.date, course, instance.amount, sign=-1)
+    delta.apply()
+
+
+def exam_attempt_saved(sender, instance, created, **kwargs):
+    old = getattr(instance, "_rollup_old", None)
+    if old and (old["course"], old["certificate_status"]) == (instance.course, instance.certificate_status):
+        return
+    delta = RollupDelta()
+    if old:
+        delta.attempt(old["course"], old["certificate_status"], -1)
+    if created or old:
+        delta.attempt(instance.course, instance.certificate_status)
+    delta.apply()
+
+
+def exam_attempt_deleted(sender, instance, **kwargs):
+    record_exam_attempts([instance], -1)
+
+
+# -------------------------------------------------------------
+# REBUILD
+# -------------------------------------------------------------
+def _chunked_counts(queryset, keys, chunk_size, **aggregates):
+    """Grouped ``aggregates`` per ``keys`` over ``queryset``, one pk range at a time."""
+    totals = {name: Counter() for name in aggregates}
+    bounds = queryset.aggregate(low=Min("pk"), high=Max("pk"))
+    if bounds["low"] is None:
+        return totals
+    for low in range(bounds["low"], bounds["high"] + 1, chunk_size):
+        rows = (
+            queryset.filter(pk__gte=low, pk__lt=low + chunk_size)
+            .order_by().values(*keys).annotate(**aggregates)
+        )
+        for row in rows:
+            key = tuple(row[k] for k in keys)
+            for name in aggregates:
+                totals[name][key] += row[name] or 0
+    return totals
+
+
+def rebuild(chunk_size=CHUNK_SIZE):
+    """Recompute every rollup from the source tables. Returns the row counts written."""
+    enrolment = _chunked_counts(Student.objects.all(), ("course", "date_of_joining"), chunk_size,
+                                students=Count("id"))["students"]
+    fees = _chunked_counts(FeeReceipt.objects.all(), ("date", "student__course"), chunk_size,
+                           receipts=Count("id"), amount=Sum("amount"))
+    certificates = _chunked_counts(ExamAttempt.objects.all(), ("course", "certificate_status"), chunk_size,
+                                   attempts=Count("id"))["attempts"]
+
+    by_month = Counter()
+    for (course, joined), students in enrolment.items():
+        by_month[course, month_of(joined)] += students
+
+    with transaction.atomic():
+        EnrolmentRollup.objects.all().delete()
+        FeeCollectionRollup.objects.all().delete()
+        CertificateRollup.objects.all().delete()
+        EnrolmentRollup.objects.bulk_create(
+            [EnrolmentRollup(course=course, month=month, students=n) for (course, month), n in by_month.items()],
+            batch_size=500,
+        )
+        FeeCollectionRollup.objects.bulk_create(
+            [
+                FeeCollectionRollup(date=day, course=course, receipts=n, amount=fees["amount"][day, course])
+                for (day, course), n in fees["receipts"].items()
+            ],
+            batch_size=500,
+        )
+        CertificateRollup.objects.bulk_create(
+            [
+                CertificateRollup(course=course, certificate_status=status, attempts=n)
+                for (course, status), n in certificates.items()
+            ],
+            batch_size=500,
+        )
+    return {"enrolment": len(by_month), "fee_collections": len(fees["receipts"]),
+            "certificates": len(certificates)}
+
+
+# -------------------------------------------------------------
+# DASHBOARD
+# -------------------------------------------------------------
+def dashboard_stats(start=None, end=None):
+    """
+    Everything ``/api/stats/`` returns, read from the rollup tables only.
+    ``start`` / ``end`` bound the joining months and collection days.
+    """
+    enrolment = EnrolmentRollup.objects.filter(students__gt=0)
+    fees = FeeCollectionRollup.objects.exclude(receipts=0, amount=0)
+    if start:
+        enrolment = enrolment.filter(month__gte=month_of(start))
+        fees = fees.filter(date__gte=start)
+    if end:
+        enrolment = enrolment.filter(month__lte=end)
+        fees = fees.filter(date__lte=end)
+    certificates = CertificateRollup.objects.filter(attempts__gt=0)
+
+    by_course = list(enrolment.values("course").annotate(students=Sum("students")).order_by("course"))
+    by_month = [
+        {"month": row["month"].strftime("%Y-%m") if row["month"] else None, "students": row["students"]}
+        for row in enrolment.values("month").annotate(students=Sum("students")).order_by(F("month").asc(nulls_first=True))
+    ]
+    fee_totals = fees.aggregate(receipts=Sum("receipts"), amount=Sum("amount"))
+    return {
+        "enrolment": {
+            "students": sum(row["students"] for row in by_course),
+            "by_course": by_course,
+            "by_month": by_month,
+        },
+        "fees": {
+            "receipts": fee_totals["receipts"] or 0,
+            "amount": fee_totals["amount"] or 0,
+            "by_course": list(
+                fees.values("course").annotate(receipts=Sum("receipts"), amount=Sum("amount")).order_by("course")
+            ),
+            "by_day": [
+                {"date": row["date"].isoformat(), "receipts": row["receipts"], "amount": row["amount"]}
+                for row in fees.values("date").annotate(receipts=Sum("receipts"), amount=Sum("amount")).order_by("date")
+            ],
+        },
+        "certificates": {
+            "by_status": list(
+                certificates.values("certificate_status").annotate(attempts=Sum("attempts"))
+                .order_by("certificate_status")
+            ),
+            "by_course": list(certificates.values("course", "certificate_status", "attempts")
+                              .order_by("course", "certificate_status")),
+        },
+    }
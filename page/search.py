@@ -0,0 +1,91 @@
+"""
+Typeahead search over students.
+
+On SQLite the lookup goes through ``page_student_fts``, an FTS5 index
+(external content over ``page_student``) that triggers keep in sync, so
+ORM saves, ``bulk_create`` and ``.update()`` are all covered. Every typed
+word becomes a quoted prefix term and results are ranked with bm25, so
+"ra ku" finds "Ravi Kumar" before a father name or course match. Other
+databases fall back to a plain prefix filter.
+"""
+import re
+
+from django.core.files.storage import default_storage
+from django.db import connection
+from django.db.models import Q
+
+from .models import Student
+
+FTS_TABLE = "page_student_fts"
+# Same order as the FTS5 columns (bm25 weights are positional);
+# name and regno hits rank first
+SEARCH_COLUMNS = [
+    ("studentname", 10.0),
+    ("father_name", 2.0),
+    ("regno", 10.0),
+    ("contact", 4.0),
+    ("email", 3.0),
+    ("course", 1.0),
+]
+RESULT_FIELDS = ["id", "regno", "studentname", "father_name", "course", "contact", "email", "image_small"]
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 50
+TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+def match_expression(text):
+    """FTS5 query for ``text``: every word as a quoted prefix term, or None."""
+    tokens = TOKEN.findall(text or "")
+    if not tokens:
+        return None
+    return " ".join('"%s"*' % token for token in tokens[:8])
+
+
+def _fts_search(expression, limit):
+    weights = ", ".join(str(weight) for _, weight in SEARCH_COLUMNS)
+    columns = ", ".join(f"s.{name}" for name in RESULT_FIELDS)
+    sql = (
+        f"SELECT {columns} FROM {FTS_TABLE} "
+        f"JOIN page_student s ON s.id = {FTS_TABLE}.rowid "
+        f"WHERE {FTS_TABLE} MATCH %s "
+        f"ORDER BY bm25({FTS_TABLE}, {weights}), s.id "
+        f"LIMIT %s"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [expression, limit])
+        return [dict(zip(RESULT_FIELDS, row)) for row in cursor.fetchall()]
+
+
+def _orm_search(text, limit):
+    condition = Q()
+    for token in TOKEN.findall(text)[:8]:
+        condition &= (
+            Q(studentname__istartswith=token) | Q(studentname__icontains=f" {token}")
+            | Q(father_name__istartswith=token) | Q(regno__startswith=token)
+            | Q(contact__contains=token) | Q(email__istartswith=token) | Q(course__istartswith=token)
+        )
+    return list(Student.objects.filter(condition).order_by("id").values(*RESULT_FIELDS)[:limit])
+
+
+def search_students(text, limit=DEFAULT_LIMIT):
+    """Up to ``limit`` best matches for ``text`` as plain dicts."""
+    expression = match_expression(text)
+    if expression is None:
+        return []
+    limit = max(1, min(int(limit), MAX_LIMIT))
+
+    if connection.vendor == "sqlite":
+        results = _fts_search(expression, limit)
+    else:
+        results = _orm_search(text, limit)
+
+    for row in results:
+        row["image_small"] = default_storage.url(row["image_small"]) if row["image_small"] else None
+    return results
+
+
+def rebuild_index():
+    """Re-read every student into the FTS index (after restores or raw imports)."""
+    if connection.vendor == "sqlite":
+        with connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
@@ -1,5 +1,28 @@
+from django.db.models import Sum
+from django.urls import reverse
 from rest_framework import serializers
-from .models import Student, Faculty, Batch, Course, Break, FeeReceipt
+from .models import (
+    Student, Faculty, Batch, Course, Break, FeeReceipt, FeeSummary, ExamAttempt, Job, EXAM_COLUMNS
+)
+from . import events, rollups
+
+
+# -------------------------------------------------------------
+# DYNAMIC FIELDS
+# -------------------------------------------------------------
+class DynamicFieldsModelSerializer(serializers.ModelSerializer):
+    """
+    ModelSerializer that takes an optional ``fields`` argument listing
+    which fields to keep; everything else is dropped before serializing.
+    """
+
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
 
 
 # -------------------------------------------------------------
@@ -16,7 +39,7 @@ class BreakSerializer(serializers.ModelSerializer):
 # -------------------------------------------------------------
 # STUDENT SERIALIZER
 # -------------------------------------------------------------
-class StudentSerializer(serializers.ModelSerializer):
+class StudentSerializer(DynamicFieldsModelSerializer):
     id = serializers.IntegerField(read_only=True)
     breaks = BreakSerializer(many=True, read_only=True)
 
@@ -34,21 +57,48 @@ class StudentSerializer(serializers.ModelSerializer):
         studentname = data.get('studentname')
 
         # If either field is missing from incoming data (partial update), skip this check.
-        if regno is None or studentname is None:
+        # Bulk imports check regnos for a whole batch at once instead.
+        if regno is None or studentname is None or self.context.get("skip_regno_check"):
             return data
 
-        existing = Student.objects.filter(regno=regno)
-        if not existing.exists():
+        existing = list(Student.objects.filter(regno=regno).values_list("studentname", flat=True))
+        if not existing:
             return data
 
         # Compare case-insensitively and defend against None values on existing records
-        if any((s.studentname or "").strip().lower() == studentname.strip().lower() for s in existing):
+        if any((name or "").strip().lower() == studentname.strip().lower() for name in existing):
             return data
 
         raise serializers.ValidationError({
             "regno": "❌ This regno already belongs to another student."
         })
 
+    def _sync_exam_attempts(self, instance, validated_data):
+        # Older clients still write the comma-separated exam columns directly
+        if any(column in validated_data for _, column in EXAM_COLUMNS):
+            attempts = instance.sync_exam_attempts()
+            rollups.record_exam_attempts(attempts)
+            events.publish_many(ExamAttempt, (attempt.pk for attempt in attempts), "create")
+        return instance
+
+    def create(self, validated_data):
+        return self._sync_exam_attempts(super().create(validated_data), validated_data)
+
+    def update(self, instance, validated_data):
+        return self._sync_exam_attempts(super().update(instance, validated_data), validated_data)
+
+
+# -------------------------------------------------------------
+# EXAM ATTEMPT SERIALIZER
+# -------------------------------------------------------------
+class ExamAttemptSerializer(serializers.ModelSerializer):
+    regno = serializers.IntegerField(source='student.regno', read_only=True)
+    student_name = serializers.CharField(source='student.studentname', read_only=True)
+
+    class Meta:
+        model = ExamAttempt
+        fields = '__all__'
+
 
 # -------------------------------------------------------------
 # FACULTY SERIALIZER
@@ -67,7 +117,8 @@ class BatchSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Batch
-        fields = ["id", "faculty", "faculty_name", "label", "date", "batch_time", "subject"]
+        fields = ["id", "faculty", "faculty_name", "label", "date", "batch_time", "subject", "start_time", "end_time"]
+        read_only_fields = ["start_time", "end_time"]
 
 
 # -------------------------------------------------------------
@@ -100,11 +151,13 @@ class FeeReceiptSerializer(serializers.ModelSerializer):
         if amount is None:
             raise serializers.ValidationError({"amount": "Amount is required"})
 
-        qs = FeeReceipt.objects.filter(student=student)
-        if self.instance:
-            qs = qs.exclude(pk=self.instance.pk)
-
-        existing_paid = sum(r.amount for r in qs)
+        summary = FeeSummary.objects.filter(student=student).first()
+        if summary is not None:
+            existing_paid = summary.paid_fees
+        else:
+            existing_paid = student.receipts.aggregate(total=Sum("amount"))["total"] or 0
+        if self.instance and self.instance.student_id == student.pk:
+            existing_paid -= self.instance.amount
         total_fees = student.total_fees
 
         remaining = total_fees - existing_paid
@@ -114,3 +167,36 @@ class FeeReceiptSerializer(serializers.ModelSerializer):
             )
 
         return data
+
+
+# -------------------------------------------------------------
+# JOB SERIALIZER
+# -------------------------------------------------------------
+class JobSerializer(serializers.ModelSerializer):
+    download_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Job
+        fields = [
+            "id", "kind", "params", "input_file", "status", "progress", "message", "result",
+            "created_at", "started_at", "finished_at", "download_url",
+        ]
+        read_only_fields = [
+            "status", "progress", "message", "result", "created_at", "started_at", "finished_at",
+        ]
+        extra_kwargs = {"input_file": {"write_only": True}}
+
+    def get_download_url(self, job):
+        if job.status == Job.DONE and job.artifact:
+            return reverse("job-download", args=[job.pk])
+        return None
+
+    def validate_params(self, value):
+        if not isinstance(value, dict):
+            raise serializers.ValidationError("params must be an object")
+        return value
+
+    def validate(self, data):
+        if data.get("kind") == "import_students" and not data.get("input_file"):
+            raise serializers.ValidationError({"input_file": "An import needs a CSV or XLSX file"})
+        return data
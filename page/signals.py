@@ -0,0 +1,52 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+
+from . import events, rollups
+from .cache import bump_version_on_commit
+from .models import Batch, Break, Course, ExamAttempt, Faculty, FeeReceipt, Student, Tombstone
+
+# Models whose deletions are reported to delta-sync clients
+TRACKED_MODELS = (Student, Faculty, Batch, Course, Break, FeeReceipt, ExamAttempt)
+
+
+def record_tombstone(sender, instance, **kwargs):
+    Tombstone.objects.create(model=sender._meta.model_name, object_id=instance.pk)
+
+
+# Connected per model (not globally) so unrelated models keep Django's
+# fast-delete path
+for model in TRACKED_MODELS:
+    post_delete.connect(record_tombstone, sender=model, dispatch_uid=f"tombstone_{model._meta.model_name}")
+
+
+# Reference data served from the versioned response cache
+CACHED_MODELS = (Course, Faculty, Batch)
+
+
+def invalidate_cached_responses(sender, **kwargs):
+    bump_version_on_commit(sender._meta.model_name)
+
+
+for model in CACHED_MODELS:
+    post_save.connect(invalidate_cached_responses, sender=model, dispatch_uid=f"cache_save_{model._meta.model_name}")
+    post_delete.connect(invalidate_cached_responses, sender=model, dispatch_uid=f"cache_delete_{model._meta.model_name}")
+
+
+# Dashboard rollups, adjusted by deltas as their source rows change
+ROLLUP_HANDLERS = (
+    (Student, rollups.student_saved, rollups.student_deleted),
+    (FeeReceipt, rollups.receipt_saved, rollups.receipt_deleted),
+    (ExamAttempt, rollups.exam_attempt_saved, rollups.exam_attempt_deleted),
+)
+
+for model, saved, deleted in ROLLUP_HANDLERS:
+    name = model._meta.model_name
+    pre_save.connect(rollups.remember_old_values, sender=model, dispatch_uid=f"rollup_old_{name}")
+    post_save.connect(saved, sender=model, dispatch_uid=f"rollup_save_{name}")
+    post_delete.connect(deleted, sender=model, dispatch_uid=f"rollup_delete_{name}")
+
+
+# Change feed (/api/events/)
+for model in events.published_models():
+    name = model._meta.model_name
+    post_save.connect(events.record_save, sender=model, dispatch_uid=f"events_save_{name}")
+    post_delete.connect(events.record_delete, sender=model, dispatch_uid=f"events_delete_{name}")
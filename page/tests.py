@@ -1,3 +1,1459 @@
-from django.test import TestCase
+import io
+import json
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
 
-# Create your tests here.
+import openpyxl
+from PIL import Image
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from .models import Student, Batch, Break, ChangeEvent, Course, ExamAttempt, Faculty, FeeReceipt, FeeSummary, Job, Tombstone
+
+
+def make_student(**kwargs):
+    data = {
+        "studentname": "Test Student",
+        "regno": 1,
+        "course": "Python",
+        "contact": "9876543210",
+    }
+    data.update(kwargs)
+    return Student.objects.create(**data)
+
+
+class StudentListTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        make_student(studentname="Anu", regno=101, course="Python",
+                     facultyname="Ravi", date_of_joining=date(2025, 1, 10))
+        make_student(studentname="Bala", regno=102, course="Java",
+                     facultyname="Ravi", date_of_joining=date(2025, 3, 5))
+        make_student(studentname="Chitra", regno=205, course="python",
+                     facultyname="Kumar", date_of_joining=date(2025, 6, 1))
+
+    def test_plain_list_is_not_paginated(self):
+        res = self.client.get("/api/students/")
+        self.assertEqual(res.status_code, 200)
+        self.assertIsInstance(res.json(), list)
+        self.assertEqual(len(res.json()), 3)
+
+    def test_cursor_pagination_walks_all_rows(self):
+        res = self.client.get("/api/students/?page_size=2")
+        body = res.json()
+        self.assertEqual([s["regno"] for s in body["results"]], [101, 102])
+        self.assertIsNotNone(body["next"])
+
+        body = self.client.get(body["next"]).json()
+        self.assertEqual([s["regno"] for s in body["results"]], [205])
+        self.assertIsNone(body["next"])
+
+    def test_filters(self):
+        def regnos(query):
+            return sorted(s["regno"] for s in self.client.get("/api/students/" + query).json())
+
+        self.assertEqual(regnos("?course=PYTHON"), [101, 205])
+        self.assertEqual(regnos("?start=2025-02-01&end=2025-12-31"), [102, 205])
+        self.assertEqual(regnos("?facultyname=ravi"), [101, 102])
+        self.assertEqual(regnos("?q=10"), [101, 102])
+        self.assertEqual(regnos("?q=ch"), [205])
+        self.assertEqual(regnos("?regno=102"), [102])
+
+    def test_malformed_dates_are_rejected(self):
+        for path in ("/api/students/?start=2024-13-40", "/api/students/?end=soon",
+                     "/api/students/?on_break=bad", "/api/students/?active_on=2025-02-30",
+                     "/api/filter-students/?start=bad", "/api/export-excel/?format=csv&end=bad"):
+            with self.subTest(path=path):
+                res = self.client.get(path)
+                self.assertEqual(res.status_code, 400)
+                self.assertIn("YYYY-MM-DD", res.json()["error"])
+
+    def test_non_numeric_ids_are_rejected(self):
+        for path in ("/api/students/?regno=abc", "/api/filter-students/?regno=abc",
+                     "/api/fees/summary/?regno=1e3", "/api/fees/?student=abc", "/api/breaks/?student=abc"):
+            with self.subTest(path=path):
+                res = self.client.get(path)
+                self.assertEqual(res.status_code, 400)
+                self.assertIn("must be a number", res.json()["error"])
+        self.assertEqual([s["regno"] for s in self.client.get("/api/students/?regno=102").json()], [102])
+
+    def test_ordering(self):
+        res = self.client.get("/api/students/?ordering=-regno")
+        self.assertEqual([s["regno"] for s in res.json()], [205, 102, 101])
+
+
+class StudentQueryCountTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        for i in range(5):
+            student = make_student(studentname="Student", regno=300 + i)
+            Break.objects.create(student=student, from_date=date(2025, 1, 1),
+                                 to_date=date(2025, 1, 10))
+
+    # Each list also runs two ETag aggregates (the model and its related rows)
+    def test_list_with_breaks_uses_constant_queries(self):
+        with self.assertNumQueries(2 + 2):
+            res = self.client.get("/api/students/")
+        self.assertEqual(res.json()[0]["breaks"][0]["student_name"], "Student")
+
+    def test_fields_param_skips_breaks(self):
+        with self.assertNumQueries(1 + 2):
+            res = self.client.get("/api/students/?fields=regno,studentname")
+        self.assertEqual(set(res.json()[0]), {"id", "regno", "studentname"})
+
+    def test_expand_breaks(self):
+        res = self.client.get("/api/students/?fields=regno&expand=breaks")
+        self.assertEqual(set(res.json()[0]), {"id", "regno", "breaks"})
+
+    def test_break_list_uses_one_query(self):
+        with self.assertNumQueries(1 + 2):
+            self.client.get("/api/breaks/")
+
+
+class FeeLedgerTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.student = make_student(regno=500, total_fees=10000)
+
+    def post_fee(self, amount):
+        return self.client.post("/api/fees/", {"student": self.student.id, "amount": amount})
+
+    def test_summary_tracks_payments_and_deletes(self):
+        self.post_fee(3000)
+        res = self.post_fee(2000)
+        self.assertEqual(res.json()["paid_fees"], 5000)
+        self.assertEqual(res.json()["due_fees"], 5000)
+
+        summary = FeeSummary.objects.get(student=self.student)
+        self.assertEqual((summary.paid_fees, summary.due_fees), (5000, 5000))
+        self.assertEqual(summary.last_receipt_id, res.json()["id"])
+
+        self.client.delete(f"/api/fees/{res.json()['id']}/")
+        summary.refresh_from_db()
+        self.assertEqual((summary.paid_fees, summary.due_fees), (3000, 7000))
+        self.assertEqual(FeeReceipt.objects.get().due_fees, 7000)
+
+    def test_backdated_and_edited_receipts_keep_latest_payment(self):
+        june = self.client.post("/api/fees/", {"student": self.student.id, "amount": 1000, "date": "2024-06-01"})
+        self.client.post("/api/fees/", {"student": self.student.id, "amount": 1000, "date": "2024-01-01"})
+        summary = FeeSummary.objects.get(student=self.student)
+        self.assertEqual(summary.last_receipt_id, june.json()["id"])
+
+        march = FeeReceipt.objects.get(date=date(2024, 1, 1))
+        march.amount = 1500
+        march.save()
+        summary.refresh_from_db()
+        self.assertEqual(summary.last_receipt_id, june.json()["id"])
+
+        self.client.patch(f"/api/fees/{june.json()['id']}/", {"date": "2023-12-01"}, format="json")
+        summary.refresh_from_db()
+        self.assertEqual(summary.last_receipt_id, march.id)
+        res = self.client.get("/api/fees/summary/")
+        self.assertEqual(res.json()[0]["last_payment_date"], "2024-01-01")
+
+    def test_moved_receipt_updates_old_students_latest(self):
+        other = make_student(regno=501, total_fees=10000)
+        first = FeeReceipt.objects.create(student=self.student, amount=100, date=date(2024, 1, 1))
+        moved = FeeReceipt.objects.create(student=self.student, amount=200, date=date(2024, 2, 1))
+        moved.student = other
+        moved.save()
+        summary = FeeSummary.objects.get(student=self.student)
+        self.assertEqual((summary.paid_fees, summary.last_receipt_id), (100, first.id))
+        self.assertEqual(FeeSummary.objects.get(student=other).last_receipt_id, moved.id)
+
+    def test_overpayment_is_rejected(self):
+        self.post_fee(9000)
+        res = self.post_fee(2000)
+        self.assertEqual(res.status_code, 400)
+        self.assertIn("1000", res.json()["amount"][0])
+
+    def test_query_count_does_not_grow_with_history(self):
+        self.post_fee(100)
+        # Includes the one UPDATE of the day's fee collection rollup and the
+        # change-feed INSERT
+        with self.assertNumQueries(9):
+            self.post_fee(100)
+        for _ in range(20):
+            self.post_fee(100)
+        with self.assertNumQueries(9):
+            self.post_fee(100)
+
+    def test_total_fee_change_updates_due(self):
+        self.post_fee(4000)
+        self.student.total_fees = 6000
+        self.student.save()
+        self.assertEqual(FeeSummary.objects.get(student=self.student).due_fees, 2000)
+
+
+class FeeSummaryEndpointTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.paid_up = make_student(regno=601, total_fees=1000, course="Python",
+                                    date_of_joining=date(2025, 1, 5))
+        self.owing = make_student(regno=602, total_fees=2000, course="Python",
+                                  date_of_joining=date(2025, 2, 5))
+        self.untouched = make_student(regno=603, total_fees=500, course="Java",
+                                      date_of_joining=date(2025, 3, 5))
+        FeeReceipt.objects.create(student=self.paid_up, amount=1000)
+        FeeReceipt.objects.create(student=self.owing, amount=500)
+
+    def test_summary_rows(self):
+        with self.assertNumQueries(1):
+            rows = self.client.get("/api/fees/summary/").json()
+        by_regno = {r["regno"]: r for r in rows}
+        self.assertEqual(by_regno[601]["due_fees"], 0)
+        self.assertEqual((by_regno[602]["paid_fees"], by_regno[602]["due_fees"]), (500, 1500))
+        self.assertEqual((by_regno[603]["paid_fees"], by_regno[603]["due_fees"]), (0, 500))
+
+    def test_summary_filters_and_pagination(self):
+        rows = self.client.get("/api/fees/summary/?due=true&course=python").json()
+        self.assertEqual([r["regno"] for r in rows], [602])
+
+        body = self.client.get("/api/fees/summary/?due=true&page_size=1").json()
+        self.assertEqual([r["regno"] for r in body["results"]], [602])
+        body = self.client.get(body["next"]).json()
+        self.assertEqual([r["regno"] for r in body["results"]], [603])
+
+    def test_summary_rejects_malformed_dates(self):
+        self.assertEqual(self.client.get("/api/fees/summary/?start=2025-02-01").status_code, 200)
+        for query in ("?start=bad", "?end=2025-13-01"):
+            with self.subTest(query=query):
+                res = self.client.get("/api/fees/summary/" + query)
+                self.assertEqual(res.status_code, 400)
+                self.assertIn("must be YYYY-MM-DD", res.json()["error"])
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        owing = make_student(studentname="Owing", regno=701, total_fees=1000,
+                             course="Python", date_of_joining=date(2025, 4, 1))
+        make_student(studentname="Other", regno=702, course="Java",
+                     date_of_joining=date(2025, 5, 1))
+        FeeReceipt.objects.create(student=owing, amount=400)
+
+    def test_xlsx_export_uses_filters_from_body(self):
+        res = self.client.post("/api/export-excel/",
+                               {"course": "Python", "rows": [{"regno": 1}]}, format="json")
+        self.assertEqual(res.status_code, 200)
+        wb = openpyxl.load_workbook(io.BytesIO(b"".join(res.streaming_content)))
+        rows = list(wb.active.values)
+        self.assertEqual(rows[0][:3], ("S.No", "regno", "studentname"))
+        self.assertEqual(rows[1][:3], (1, 701, "Owing"))
+        self.assertEqual(rows[1][-3:], (1000, 400, 600))
+        self.assertEqual(len(rows), 2)
+
+    def test_csv_export(self):
+        res = self.client.get("/api/export-excel/?format=csv")
+        lines = b"".join(res.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0].split(",")[:2], ["S.No", "regno"])
+        self.assertEqual([line.split(",")[1] for line in lines[1:]], ["702", "701"])
+
+
+class ExamAttemptTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.student = make_student(regno=801)
+        self.url = f"/api/students/{self.student.id}/update_exam_course/"
+
+    def test_update_exam_course_writes_attempts_and_columns(self):
+        self.client.patch(self.url, {"course": "Python", "hallticket_no": "H1",
+                                     "Exam_Date": "2025-07-01"}, format="json")
+        self.client.patch(self.url, {"course": "Java", "Certificate_status": "Yes"}, format="json")
+        self.client.patch(self.url, {"course": "Python", "Issued_status": "2025-08-01"}, format="json")
+
+        attempts = list(ExamAttempt.objects.filter(student=self.student))
+        self.assertEqual([a.course for a in attempts], ["Python", "Java"])
+        self.assertEqual(attempts[0].exam_date, date(2025, 7, 1))
+
+        self.student.refresh_from_db()
+        self.assertEqual(self.student.Exam_Course, "Python,Java")
+        self.assertEqual(self.student.hallticket_no, "H1,")
+        self.assertEqual(self.student.Exam_Date, "2025-07-01,")
+        self.assertEqual(self.student.Certificate_status, ",Yes")
+        self.assertEqual(self.student.Issued_status, "2025-08-01,")
+
+    def test_legacy_column_patch_resyncs_attempts(self):
+        self.client.patch(f"/api/students/{self.student.id}/", {
+            "Exam_Course": "Python,Java", "hallticket_no": "H1,H2",
+            "Exam_Date": "2025-07-01,2025-07-02", "Certificate_status": "Yes,",
+        }, format="json")
+        attempts = list(ExamAttempt.objects.filter(student=self.student))
+        self.assertEqual([(a.course, a.hallticket_no, a.certificate_status) for a in attempts],
+                         [("Python", "H1", "Yes"), ("Java", "H2", "")])
+
+    def test_certificate_filters(self):
+        other = make_student(regno=802)
+        self.client.patch(self.url, {"course": "Python", "Certificate_status": "Yes"}, format="json")
+        self.client.patch(f"/api/students/{other.id}/update_exam_course/",
+                          {"course": "Python", "Certificate_status": "No"}, format="json")
+
+        students = self.client.get("/api/students/?certificate_status=Yes").json()
+        self.assertEqual([s["regno"] for s in students], [801])
+
+        exams = self.client.get("/api/exams/?course=Python&certificate_status=No").json()
+        self.assertEqual([e["regno"] for e in exams], [802])
+
+    def test_exam_filters_reject_malformed_values(self):
+        self.client.patch(self.url, {"course": "Python", "Exam_Date": "2025-07-01"}, format="json")
+        exams = self.client.get("/api/exams/?exam_start=2025-07-01&exam_end=2025-07-31").json()
+        self.assertEqual([e["regno"] for e in exams], [801])
+        for query in ("?exam_start=bad", "?exam_end=2025-02-30", "?student=x"):
+            with self.subTest(query=query):
+                res = self.client.get("/api/exams/" + query)
+                self.assertEqual(res.status_code, 400)
+                self.assertIn("error", res.json())
+
+    def test_exam_updates_need_an_exam_course(self):
+        # The legacy columns are derived from ExamAttempt rows, so there is
+        # nothing to update until the student has an exam course
+        for action, body in (("update_cert_status", {"certificate_status": "Yes"}),
+                             ("update_exam_details", {"hallticket_no": "H9"})):
+            with self.subTest(action=action):
+                res = self.client.patch(f"/api/students/{self.student.id}/{action}/", body, format="json")
+                self.assertEqual(res.status_code, 400)
+                self.assertIn("update_exam_course", res.data["error"])
+
+    def test_exam_course_update_validates_values(self):
+        for body in ({"course": ["Python"]}, {"course": "Python", "Exam_Date": 20240101},
+                     {"course": "Python", "Certificate_status": {"a": 1}},
+                     {"course": "Python", "hallticket_no": "H" * 51}):
+            with self.subTest(body=body):
+                res = self.client.patch(self.url, body, format="json")
+                self.assertEqual(res.status_code, 400)
+                self.assertIn("error", res.data)
+        self.assertFalse(ExamAttempt.objects.exists())
+
+        self.client.patch(self.url, {"course": "Python"}, format="json")
+        for action, body in (("update_cert_status", {"certificate_status": ["Yes"]}),
+                             ("update_exam_details", {"Exam_Date": 20240101})):
+            with self.subTest(action=action):
+                res = self.client.patch(f"/api/students/{self.student.id}/{action}/", body, format="json")
+                self.assertEqual(res.status_code, 400)
+
+    def test_unchanged_legacy_columns_keep_attempts(self):
+        self.client.patch(self.url, {"course": "Python", "Exam_Date": "2025-07-01"}, format="json")
+        attempt = ExamAttempt.objects.get()
+        self.student.refresh_from_db()
+        res = self.client.patch(f"/api/students/{self.student.id}/", {
+            "Exam_Course": self.student.Exam_Course, "Exam_Date": self.student.Exam_Date,
+        }, format="json")
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(ExamAttempt.objects.get().pk, attempt.pk)
+        self.assertFalse(Tombstone.objects.filter(model="examattempt").exists())
+
+        self.client.patch(f"/api/students/{self.student.id}/", {"Exam_Date": "2025-08-01"}, format="json")
+        self.assertEqual(ExamAttempt.objects.get().exam_date, date(2025, 8, 1))
+
+    def test_bulk_exam_update(self):
+        other = make_student(regno=803)
+        for student in (self.student, other):
+            self.client.patch(f"/api/students/{student.id}/update_exam_course/",
+                              {"course": "Python", "Certificate_status": "Yes"}, format="json")
+        self.client.patch(self.url, {"course": "Java"}, format="json")
+
+        # Read attempts, bulk_update, re-project the student columns (2 reads,
+        # 1 bulk_update), one change-event insert per model, inside one
+        # savepoint pair
+        with self.assertNumQueries(9):
+            res = self.client.patch("/api/students/bulk_exam_update/", {"updates": [
+                {"student": self.student.id, "course": "Python", "Issued_status": "Issued"},
+                {"student": self.student.id, "course": "Java", "exam_date": "2025-09-01"},
+                {"student": other.id, "course": "Python", "certificate_status": "Yes"},
+            ]}, format="json")
+        self.assertEqual(res.status_code, 200, res.content)
+        self.assertEqual(res.data["unchanged"], 1)
+        self.assertEqual([(e["regno"], e["course"]) for e in res.data["updated"]], [(801, "Python"), (801, "Java")])
+
+        self.student.refresh_from_db()
+        self.assertEqual(self.student.Issued_status, "Issued,")
+        self.assertEqual(self.student.Exam_Date, ",2025-09-01")
+
+    def test_bulk_exam_update_is_all_or_nothing(self):
+        self.client.patch(self.url, {"course": "Python"}, format="json")
+        res = self.client.patch("/api/students/bulk_exam_update/", [
+            {"student": self.student.id, "course": "Python", "issued_status": "Issued"},
+            {"student": self.student.id, "course": "Java", "issued_status": "Issued"},
+        ], format="json")
+        self.assertEqual(res.status_code, 400)
+        self.assertEqual(res.data["missing"], [{"student": self.student.id, "course": "Java"}])
+
+        res = self.client.patch("/api/students/bulk_exam_update/", [
+            {"student": self.student.id, "course": "Python", "exam_date": "01/09/2025"},
+            {"student": "x", "course": "Python"},
+        ], format="json")
+        self.assertEqual(set(res.data["errors"]), {"0", "1"})
+        self.assertEqual(ExamAttempt.objects.get(student=self.student).issued_status, "")
+
+    def test_bulk_exam_update_validates_values(self):
+        self.client.patch(self.url, {"course": "Python"}, format="json")
+        res = self.client.patch("/api/students/bulk_exam_update/", [
+            {"student": self.student.id, "course": "Python", "issued_status": "Issued"},
+            {"student": self.student.id, "course": "Python", "certificate_status": {"a": 1}},
+            {"student": self.student.id, "course": "Python", "hallticket_no": ["H1"]},
+            {"student": self.student.id, "course": "Python", "issued_status": "x" * 31},
+            {"student": self.student.id, "course": "Python", "exam_date": 20250901},
+            {"student": self.student.id, "course": ["Python"], "issued_status": "Issued"},
+        ], format="json")
+        self.assertEqual(res.status_code, 400)
+        self.assertEqual(set(res.data["errors"]), {"1", "2", "3", "4", "5"})
+        self.assertIn("certificate_status", res.data["errors"]["1"])
+        self.assertIn("issued_status", res.data["errors"]["3"])
+        self.assertEqual(ExamAttempt.objects.get(student=self.student).issued_status, "")
+
+class SQLiteTuningTests(TestCase):
+    def pragma(self, name):
+        with connection.cursor() as cursor:
+            cursor.execute(f"PRAGMA {name}")
+            return cursor.fetchone()[0]
+
+    def test_connection_pragmas(self):
+        options = settings.DATABASES["default"]["OPTIONS"]
+        self.assertEqual(self.pragma("busy_timeout"), int(options["timeout"] * 1000))
+        self.assertEqual(self.pragma("cache_size"), settings.SQLITE_PRAGMAS["cache_size"])
+        self.assertEqual(connection.transaction_mode, options["transaction_mode"])
+
+
+class SQLiteConcurrencyTests(SimpleTestCase):
+    """
+    Concurrent writers against a real database file, as gunicorn threads
+    and job workers write. Runs stress_sqlite in a subprocess: the test
+    database is in memory, where WAL and locking do not apply.
+    """
+
+    def test_concurrent_fee_postings_all_succeed(self):
+        output = subprocess.run(
+            [sys.executable, "manage.py", "stress_sqlite", "--writers", "6", "--payments", "10"],
+            cwd=settings.BASE_DIR, capture_output=True, text=True, timeout=120, check=True,
+        ).stdout
+        result = json.loads(output)
+        self.assertEqual(result["journal_mode"], "wal")
+        self.assertEqual(result["errors"], {})
+        self.assertEqual(result["ok"], 60)
+
+
+class BulkImportTests(TestCase):
+    CSV = (
+        "studentname,regno,course,contact,date_of_joining,Exam_Course\n"
+        "Anu,901,Python,9876543210,2025-01-10,Python\n"
+        "Bala,902,Java,12,,\n"
+        "Chitra,903,Java,9876543211,,\n"
+        "Someone Else,900,Java,9876543212,,\n"
+        "Anu,901,Java,9876543210,,\n"
+    )
+
+    def setUp(self):
+        self.client = APIClient()
+        make_student(studentname="Existing", regno=900)
+
+    def upload(self, content, name="students.csv", query=""):
+        upload = SimpleUploadedFile(name, content)
+        return self.client.post("/api/students/bulk_import/" + query, {"file": upload}, format="multipart")
+
+    def test_csv_import_reports_row_errors(self):
+        report = self.upload(self.CSV.encode()).json()
+        self.assertEqual((report["total"], report["created"], report["failed"]), (5, 3, 2))
+        self.assertEqual([e["row"] for e in report["errors"]], [3, 5])
+        self.assertIn("contact", report["errors"][0]["errors"])
+        self.assertIn("regno", report["errors"][1]["errors"])
+
+        self.assertEqual(Student.objects.filter(regno=901).count(), 2)
+        self.assertTrue(ExamAttempt.objects.filter(student__regno=901, course="Python").exists())
+
+    def test_dry_run_writes_nothing(self):
+        report = self.upload(self.CSV.encode(), query="?dry_run=true").json()
+        self.assertEqual((report["created"], report["would_create"]), (0, 3))
+        self.assertEqual(Student.objects.count(), 1)
+
+    def test_non_utf8_csv_is_rejected(self):
+        res = self.upload("studentname,regno,course,contact\nJosé,905,Python,9876543214\n".encode("latin-1"))
+        self.assertEqual(res.status_code, 400)
+        self.assertIn("UTF-8", res.json()["error"])
+        self.assertEqual(Student.objects.count(), 1)
+
+    def test_corrupt_xlsx_is_rejected(self):
+        for content in (b"not a zip file", self.CSV.encode()):
+            with self.subTest(content=content[:10]):
+                res = self.upload(content, name="students.xlsx")
+                self.assertEqual(res.status_code, 400)
+                self.assertIn("XLSX", res.json()["error"])
+
+    def test_xlsx_import(self):
+        wb = openpyxl.Workbook()
+        wb.active.append(["studentname", "regno", "course", "contact"])
+        wb.active.append(["Divya", 904, "Python", 9876543213])
+        buffer = io.BytesIO()
+        wb.save(buffer)
+
+        report = self.upload(buffer.getvalue(), name="students.xlsx").json()
+        self.assertEqual(report["created"], 1, report)
+        self.assertEqual(Student.objects.get(regno=904).contact, "9876543213")
+
+
+LOCMEM_CACHE = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.student = make_student(regno=1001)
+
+    def get(self, url, etag=None):
+        headers = {"HTTP_IF_NONE_MATCH": etag} if etag else {}
+        return self.client.get(url, **headers)
+
+    def test_list_returns_304_until_something_changes(self):
+        etag = self.get("/api/students/")["ETag"]
+        with self.assertNumQueries(2):
+            res = self.get("/api/students/", etag)
+        self.assertEqual(res.status_code, 304)
+
+        Break.objects.create(student=self.student, from_date=date(2025, 1, 1), to_date=date(2025, 1, 2))
+        res = self.get("/api/students/", etag)
+        self.assertEqual(res.status_code, 200)
+        self.assertNotEqual(res["ETag"], etag)
+
+    def test_delete_invalidates_list(self):
+        other = make_student(regno=1002)
+        etag = self.get("/api/students/")["ETag"]
+        other.delete()
+        self.assertEqual(self.get("/api/students/", etag).status_code, 200)
+
+    def test_filters_get_their_own_etag(self):
+        self.assertNotEqual(self.get("/api/students/")["ETag"],
+                            self.get("/api/students/?regno=1001")["ETag"])
+
+    def test_detail_and_reference_data(self):
+        url = f"/api/students/{self.student.id}/"
+        etag = self.get(url)["ETag"]
+        self.assertEqual(self.get(url, etag).status_code, 304)
+        self.client.patch(url, {"reason": "Moved"}, format="json")
+        self.assertEqual(self.get(url, etag).status_code, 200)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            course = Course.objects.create(name="Python")
+        etag = self.get("/api/courses/")["ETag"]
+        self.assertEqual(self.get("/api/courses/", etag).status_code, 304)
+        with self.captureOnCommitCallbacks(execute=True):
+            course.name = "Python 3"
+            course.save()
+        self.assertEqual(self.get("/api/courses/", etag).status_code, 200)
+
+
+class DeltaSyncTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.old = make_student(regno=1101)
+        self.gone = make_student(regno=1102)
+        past = timezone.now() - timedelta(days=1)
+        Student.objects.update(updated_at=past)
+
+    def test_changed_rows_and_tombstones(self):
+        cursor = (timezone.now() - timedelta(hours=1)).isoformat()
+        gone_id = self.gone.id
+        self.gone.delete()
+        fresh = make_student(regno=1103)
+
+        body = self.client.get("/api/students/", {"updated_since": cursor}).json()
+        self.assertEqual([s["regno"] for s in body["changed"]], [1103])
+        self.assertEqual(body["deleted"], [gone_id])
+
+        body = self.client.get("/api/students/", {"updated_since": body["cursor"]}).json()
+        self.assertEqual([s["regno"] for s in body["changed"]], [1103])  # overlap window
+
+        fresh.refresh_from_db()
+        Student.objects.filter(pk=fresh.pk).update(updated_at=timezone.now() - timedelta(days=1))
+        later = (timezone.now() + timedelta(seconds=5)).isoformat()
+        body = self.client.get("/api/students/", {"updated_since": later}).json()
+        self.assertEqual((body["changed"], body["deleted"]), ([], []))
+
+    def test_cascaded_deletes_leave_tombstones(self):
+        receipt = FeeReceipt.objects.create(student=self.gone, amount=0)
+        cursor = timezone.now().isoformat()
+        self.gone.delete()
+        body = self.client.get("/api/fees/", {"updated_since": cursor}).json()
+        self.assertEqual(body["deleted"], [receipt.id])
+
+    def test_bad_timestamp(self):
+        self.assertEqual(self.client.get("/api/students/?updated_since=yesterday").status_code, 400)
+        self.assertEqual(self.client.get("/api/students/?updated_since=nan").status_code, 400)
+
+    def test_numeric_cursors(self):
+        self.gone.delete()
+        body = self.client.get("/api/students/", {"updated_since": "0"}).json()
+        self.assertEqual(([s["regno"] for s in body["changed"]], body["deleted"]), ([1101], []))
+        self.assertIsInstance(body["cursor"], float)
+
+        fresh = make_student(regno=1104)
+        hour_ago = (timezone.now() - timedelta(hours=1)).timestamp()
+        for since in (hour_ago, hour_ago * 1000):
+            with self.subTest(since=since):
+                body = self.client.get("/api/students/", {"updated_since": str(since)}).json()
+                self.assertEqual([s["regno"] for s in body["changed"]], [fresh.regno])
+                self.assertEqual(len(body["deleted"]), 1)
+
+    def test_expired_cursor_asks_for_a_reset(self):
+        from .sync import TOMBSTONE_RETENTION, prune_tombstones
+        self.gone.delete()
+        Tombstone.objects.update(deleted_at=timezone.now() - TOMBSTONE_RETENTION - timedelta(days=1))
+        self.assertEqual(prune_tombstones(), 1)
+
+        too_old = (timezone.now() - TOMBSTONE_RETENTION - timedelta(minutes=1)).isoformat()
+        res = self.client.get("/api/students/", {"updated_since": too_old})
+        self.assertEqual(res.status_code, 410)
+        self.assertTrue(res.json()["reset"])
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class ReferenceCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.faculty = Faculty.objects.create(faculty_name="Ravi")
+            Batch.objects.create(faculty=self.faculty, label="B1", date=date(2025, 1, 1))
+            Course.objects.create(name="Python")
+
+    def test_cached_reads_skip_the_database(self):
+        self.client.get("/api/courses/")
+        with self.assertNumQueries(0):
+            res = self.client.get("/api/courses/")
+        self.assertEqual([c["name"] for c in res.json()], ["Python"])
+
+        with self.assertNumQueries(0):
+            res = self.client.get("/api/courses/", HTTP_IF_NONE_MATCH=res["ETag"])
+        self.assertEqual(res.status_code, 304)
+
+        stats = self.client.get("/api/cache-stats/").json()
+        self.assertGreaterEqual(stats["course"]["hits"], 1)
+        self.assertGreaterEqual(stats["course"]["misses"], 1)
+
+    def test_writes_invalidate(self):
+        self.client.get("/api/courses/")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post("/api/courses/", {"name": "Java"})
+        self.assertEqual(len(self.client.get("/api/courses/").json()), 2)
+
+    def test_faculty_rename_invalidates_batches(self):
+        self.assertEqual(self.client.get("/api/batches/").json()[0]["faculty_name"], "Ravi")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.faculty.faculty_name = "Kumar"
+            self.faculty.save()
+        self.assertEqual(self.client.get("/api/batches/").json()[0]["faculty_name"], "Kumar")
+
+    def test_concurrent_bumps_are_not_lost(self):
+        from unittest import mock
+        from django.core.cache.backends.filebased import FileBasedCache
+        from .cache import bump_version, get_version
+
+        location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, location)
+        file_cache = {"default": {"BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+                                  "LOCATION": location}}
+        with override_settings(CACHES=file_cache):
+            get_version("course")
+            after_other = []
+
+            def other_worker_bumps():
+                if not after_other:
+                    after_other.append(None)
+                    bump_version("course")
+                    after_other[0] = get_version("course")
+
+            def racing_get(backend, *args, **kwargs):
+                # Lands after this worker's read
+                value = read(backend, *args, **kwargs)
+                other_worker_bumps()
+                return value
+
+            def racing_set(backend, *args, **kwargs):
+                # Lands just before this worker's write
+                other_worker_bumps()
+                return write(backend, *args, **kwargs)
+
+            read, write = FileBasedCache.get, FileBasedCache.set
+            with mock.patch.object(FileBasedCache, "get", racing_get), \
+                    mock.patch.object(FileBasedCache, "set", racing_set):
+                bump_version("course")
+            self.assertNotEqual(get_version("course"), after_other[0])
+
+
+def make_jpeg(size=(3000, 2000)):
+    exif = Image.Exif()
+    exif[0x010F] = "CameraMaker"
+    buffer = io.BytesIO()
+    Image.new("RGB", size, "red").save(buffer, "JPEG", exif=exif)
+    return buffer.getvalue()
+
+
+class StudentImageTests(TestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media)
+        self.override = override_settings(MEDIA_ROOT=self.media)
+        self.override.enable()
+        self.addCleanup(self.override.disable)
+        self.client = APIClient()
+
+    def test_upload_is_downscaled_and_gets_variants(self):
+        upload = SimpleUploadedFile("photo.jpg", make_jpeg(), content_type="image/jpeg")
+        res = self.client.post("/api/students/", {
+            "studentname": "Photo", "regno": 1201, "course": "Python",
+            "contact": "9876543210", "image": upload,
+        }, format="multipart")
+        self.assertEqual(res.status_code, 201, res.content)
+        self.assertIn("_small.", res.json()["image_small"])
+
+        student = Student.objects.get(regno=1201)
+        with Image.open(student.image.path) as image:
+            self.assertLessEqual(max(image.size), 1280)
+            self.assertEqual(len(image.getexif()), 0)
+        with Image.open(student.image_small.path) as image:
+            self.assertEqual(max(image.size), 160)
+
+    def test_backfill_command(self):
+        student = make_student(regno=1202)
+        Student.objects.filter(pk=student.pk).update(image="student_images/raw.jpg")
+        storage = student.image.storage
+        storage.save("student_images/raw.jpg", ContentFile(make_jpeg((800, 600))))
+
+        call_command("backfill_student_images", workers=1, delete_originals=True, stdout=io.StringIO())
+
+        student.refresh_from_db()
+        self.assertTrue(student.image_medium.name.endswith("_medium.webp"))
+        self.assertFalse(storage.exists("student_images/raw.jpg"))
+
+
+class MediaServingTests(TestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media)
+        self.override = override_settings(MEDIA_ROOT=self.media)
+        self.override.enable()
+        self.addCleanup(self.override.disable)
+
+        self.hashed = "student_images/0123456789abcdef_small.webp"
+        self.body = bytes(range(256)) * 4
+        storage = Student._meta.get_field("image").storage
+        storage.save(self.hashed, ContentFile(self.body))
+        storage.save("student_images/legacy.jpg", ContentFile(b"legacy"))
+
+    def test_hashed_variant_is_immutable_with_strong_etag(self):
+        res = self.client.get("/media/" + self.hashed, HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(b"".join(res.streaming_content), self.body)
+        self.assertIn("immutable", res["Cache-Control"])
+        self.assertEqual(res["ETag"], '"0123456789abcdef_small"')
+        self.assertFalse(res.has_header("Content-Encoding"))
+
+        res = self.client.get("/media/" + self.hashed, HTTP_IF_NONE_MATCH=res["ETag"])
+        self.assertEqual(res.status_code, 304)
+
+    def test_range_requests(self):
+        res = self.client.get("/media/" + self.hashed, HTTP_RANGE="bytes=10-19")
+        self.assertEqual(res.status_code, 206)
+        self.assertEqual(res["Content-Range"], "bytes 10-19/1024")
+        self.assertEqual(b"".join(res.streaming_content), self.body[10:20])
+
+        res = self.client.get("/media/" + self.hashed, HTTP_RANGE="bytes=-4")
+        self.assertEqual(b"".join(res.streaming_content), self.body[-4:])
+
+        res = self.client.get("/media/" + self.hashed, HTTP_RANGE="bytes=5000-")
+        self.assertEqual(res.status_code, 416)
+
+        res = self.client.get("/media/" + self.hashed, HTTP_RANGE="bytes=0-9,20-29")
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(b"".join(res.streaming_content), self.body)
+
+    def test_unhashed_files_must_revalidate(self):
+        res = self.client.get("/media/student_images/legacy.jpg")
+        self.assertEqual(res["Cache-Control"], "public, no-cache")
+
+    def test_only_student_images_are_served(self):
+        self.assertEqual(self.client.get("/media/student_images/%2E%2E/%2E%2E/etc/passwd").status_code, 404)
+        self.assertEqual(self.client.get("/media/other/file.jpg").status_code, 404)
+
+    def test_dot_segments_cannot_leave_student_images(self):
+        storage = Student._meta.get_field("image").storage
+        storage.save("jobs/output/export.csv", ContentFile(b"regno,studentname\n"))
+        for path in ("student_images/../jobs/output/export.csv", "student_images/%2e%2e/jobs/output/export.csv"):
+            self.assertEqual(self.client.get("/media/" + path).status_code, 404)
+
+
+class StudentSearchTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.ravi = make_student(studentname="Ravi Kumar", regno=1501, father_name="Mohan",
+                                 course="Python", email="ravi@example.com")
+        self.kumari = make_student(studentname="Kumari", regno=1502, father_name="Ravindra",
+                                   course="Java", contact="9123456780")
+        self.sita = make_student(studentname="Sita", regno=2601, course="Tally")
+
+    def search(self, q, **params):
+        res = self.client.get("/api/students/search/", {"q": q, **params})
+        self.assertEqual(res.status_code, 200)
+        return [row["id"] for row in res.json()]
+
+    def test_ranked_prefix_matching(self):
+        # Name match outranks the father-name match
+        self.assertEqual(self.search("rav"), [self.ravi.id, self.kumari.id])
+        # Every word must match a prefix somewhere; the name match comes first
+        self.assertEqual(self.search("ra ku"), [self.ravi.id, self.kumari.id])
+        self.assertEqual(self.search("ravi mo"), [self.ravi.id])
+        self.assertEqual(set(self.search("150")), {self.ravi.id, self.kumari.id})
+        self.assertEqual(self.search("91234"), [self.kumari.id])
+        self.assertEqual(self.search("tal"), [self.sita.id])
+        self.assertEqual(self.search('"*'), [])
+
+    def test_limit(self):
+        self.assertEqual(len(self.search("15")), 2)
+        self.assertEqual(len(self.search("15", limit=1)), 1)
+        self.assertEqual(self.client.get("/api/students/search/", {"q": "a", "limit": "x"}).status_code, 400)
+
+    def test_index_follows_writes(self):
+        self.sita.studentname = "Arjun"
+        self.sita.save()
+        self.assertEqual(self.search("sit"), [])
+        self.assertEqual(self.search("arj"), [self.sita.id])
+
+        Student.objects.filter(pk=self.sita.pk).update(course="Django")
+        self.assertEqual(self.search("djan"), [self.sita.id])
+
+        Student.objects.bulk_create([Student(studentname="Zoya", regno=3001, course="C", contact="9000000000")])
+        self.assertEqual(len(self.search("zoy")), 1)
+
+        self.kumari.delete()
+        self.assertEqual(self.search("kumari"), [])
+
+
+class BenchmarkHarnessTests(TestCase):
+    def test_percentile(self):
+        from .benchmark import percentile
+        samples = list(range(1, 101))
+        self.assertEqual(percentile(samples, 50), 50)
+        self.assertEqual(percentile(samples, 99), 99)
+        self.assertEqual(percentile([7], 90), 7)
+
+    def test_regressions(self):
+        from .management.commands.benchmark_api import regressions
+        before = {"list": {"p50_ms": 10.0, "queries": 3}, "detail": {"p50_ms": 2.0, "queries": 4}}
+        after = {"list": {"p50_ms": 14.0, "queries": 3}, "detail": {"p50_ms": 2.9, "queries": 5}}
+        self.assertEqual(regressions(before, after, threshold=20), [
+            "list: p50 10.0 ms -> 14.0 ms",
+            "detail: queries 4 -> 5",
+        ])
+
+
+@override_settings(REQUEST_METRICS=True, REQUEST_METRICS_TOKEN="s3cret")
+class RequestMetricsTests(TestCase):
+    def setUp(self):
+        from . import metrics
+        metrics.reset()
+        self.addCleanup(metrics.reset)
+        self.client = APIClient()
+        for i in range(3):
+            make_student(regno=1700 + i)
+
+    def test_server_timing_and_stats(self):
+        res = self.client.get("/api/students/")
+        self.assertRegex(res["Server-Timing"], r'^app;dur=[\d.]+, db;dur=[\d.]+;desc="\d+ queries, \d+ duplicate"$')
+        b"".join(self.client.get("/api/export-excel/?format=csv").streaming_content)
+
+        self.assertEqual(self.client.get("/api/request-stats/").status_code, 403)
+        stats = self.client.get("/api/request-stats/", HTTP_X_METRICS_TOKEN="s3cret").json()
+        self.assertTrue(stats["enabled"])
+        students = stats["routes"]["GET student-list"]
+        self.assertEqual(students["requests"], 1)
+        self.assertEqual(sum(students["histogram"].values()), 1)
+        self.assertGreater(students["mean_bytes"], 0)
+        # Streamed export is recorded once its body has been sent
+        export = stats["routes"]["GET export_excel"]
+        self.assertGreaterEqual(export["max_queries"], 1)
+        self.assertGreater(export["mean_bytes"], 0)
+
+    async def test_queries_are_counted_under_asgi(self):
+        # Sync views run on another thread (and connection) than the middleware
+        res = await self.async_client.get("/api/students/")
+        queries = int(re.search(r'desc="(\d+) queries', res["Server-Timing"]).group(1))
+        self.assertGreater(queries, 0)
+
+        res = await self.async_client.get("/api/export-excel/?format=csv")
+        b"".join([chunk async for chunk in res.streaming_content])
+        from .metrics import snapshot
+        self.assertGreaterEqual(snapshot()["GET export_excel"]["max_queries"], 1)
+
+    def test_repeated_queries_are_flagged(self):
+        from .metrics import QueryRecorder, record, snapshot
+        recorder = QueryRecorder()
+        with recorder.installed():
+            for student in Student.objects.all():
+                Student.objects.get(pk=student.pk)
+                Student.objects.get(pk=student.pk)
+        self.assertEqual(recorder.count, 7)
+        self.assertEqual(recorder.duplicates, 5)
+        self.assertEqual(recorder.repeated()[0][1], 6)
+
+        record("GET example", 12.0, recorder, 10)
+        route = snapshot()["GET example"]
+        self.assertEqual(route["n_plus_one_requests"], 1)
+        self.assertEqual(route["histogram"]["le_25ms"], 1)
+
+
+class AsyncViewTests(TestCase):
+    """The heavy endpoints as served by an ASGI server (AsyncClient)."""
+
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media)
+        self.override = override_settings(MEDIA_ROOT=self.media)
+        self.override.enable()
+        self.addCleanup(self.override.disable)
+        self.student = make_student(studentname="Async", regno=1801, total_fees=1000)
+
+    async def test_csv_export_streams_asynchronously(self):
+        res = await self.async_client.get("/api/export-excel/?format=csv")
+        self.assertTrue(res.is_async)
+        body = b"".join([chunk async for chunk in res.streaming_content]).decode()
+        self.assertIn("Async", body)
+        self.assertEqual(len(body.strip().splitlines()), 2)
+
+    async def test_xlsx_export(self):
+        res = await self.async_client.get("/api/export-excel/")
+        body = b"".join([chunk async for chunk in res.streaming_content])
+        self.assertEqual(int(res["Content-Length"]), len(body))
+        rows = list(openpyxl.load_workbook(io.BytesIO(body)).active.iter_rows(values_only=True))
+        self.assertEqual(rows[1][2], "Async")
+
+    async def test_bulk_import(self):
+        upload = SimpleUploadedFile("students.csv", b"studentname,regno,course,contact\nNila,1802,Python,9876543210\n")
+        res = await self.async_client.post("/api/students/bulk_import/", {"file": upload})
+        self.assertEqual(res.json()["created"], 1)
+        self.assertTrue(await Student.objects.filter(regno=1802).aexists())
+
+    async def test_photo_upload(self):
+        upload = SimpleUploadedFile("photo.jpg", make_jpeg(), content_type="image/jpeg")
+        res = await self.async_client.post(f"/api/students/{self.student.pk}/photo/", {"image": upload})
+        self.assertEqual(res.status_code, 200, res.content)
+        self.assertRegex(res.json()["image_small"], r"^/media/student_images/[0-9a-f]{16}_small\.\w+$")
+
+        student = await Student.objects.aget(pk=self.student.pk)
+        with Image.open(student.image.path) as image:
+            self.assertLessEqual(max(image.size), 1280)
+
+        bad = SimpleUploadedFile("photo.jpg", b"not an image", content_type="image/jpeg")
+        res = await self.async_client.post(f"/api/students/{self.student.pk}/photo/", {"image": bad})
+        self.assertEqual(res.status_code, 400)
+
+
+class BackgroundJobTests(TestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media)
+        self.override = override_settings(MEDIA_ROOT=self.media)
+        self.override.enable()
+        self.addCleanup(self.override.disable)
+        self.client = APIClient()
+        self.student = make_student(studentname="Queued", regno=1901, total_fees=1000)
+
+    def run_jobs(self):
+        call_command("run_jobs", once=True, purge_days=0, stdout=io.StringIO())
+
+    def test_export_job_and_download(self):
+        res = self.client.post("/api/jobs/", {"kind": "export", "params": {"format": "csv"}}, format="json")
+        self.assertEqual(res.status_code, 202, res.content)
+        job_url = res["Location"]
+        self.assertEqual(res.data["status"], "queued")
+        self.assertEqual(self.client.get(f"/api/jobs/{res.data['id']}/download/").status_code, 409)
+
+        self.run_jobs()
+        job = self.client.get(job_url).json()
+        self.assertEqual((job["status"], job["progress"], job["result"]["rows"]), ("done", 100, 1))
+
+        res = self.client.get(job["download_url"])
+        self.assertEqual(res.status_code, 200)
+        body = b"".join(res.streaming_content).decode()
+        self.assertIn("Queued", body)
+
+    def test_export_excel_background(self):
+        res = self.client.get("/api/export-excel/?background=1&course=Python")
+        self.assertEqual(res.status_code, 202)
+        job = Job.objects.get(pk=res.json()["id"])
+        self.assertEqual((job.kind, job.params), ("export", {"course": "Python"}))
+
+        self.run_jobs()
+        job.refresh_from_db()
+        self.assertTrue(job.artifact.name.endswith(".xlsx"))
+
+    def test_import_job(self):
+        upload = SimpleUploadedFile("students.csv", b"studentname,regno,course,contact\nNila,1902,Python,9876543210\n")
+        res = self.client.post("/api/jobs/", {"kind": "import_students", "input_file": upload,
+                                              "params": '{"dry_run": false}'}, format="multipart")
+        self.assertEqual(res.status_code, 202, res.content)
+        self.run_jobs()
+        self.assertEqual(Job.objects.get().result["created"], 1)
+        self.assertTrue(Student.objects.filter(regno=1902).exists())
+
+        res = self.client.post("/api/jobs/", {"kind": "import_students"}, format="json")
+        self.assertEqual(res.status_code, 400)
+
+    def test_import_job_reports_progress(self):
+        from unittest import mock
+        upload = SimpleUploadedFile("students.csv", b"studentname,regno,course,contact\n"
+                                                    b"Nila,1903,Python,9876543210\nMani,1904,Java,9876543211")
+        self.client.post("/api/jobs/", {"kind": "import_students", "input_file": upload}, format="multipart")
+        with mock.patch.object(Job, "set_progress", autospec=True) as set_progress:
+            self.run_jobs()
+        set_progress.assert_called_with(mock.ANY, 99, "2 of 2 rows processed")
+
+    def test_workers_requeue_stale_jobs_while_polling(self):
+        from unittest import mock
+        from . import jobs
+        job = jobs.enqueue("rebuild_fee_summaries")
+        Job.objects.filter(pk=job.pk).update(status=Job.RUNNING, worker="dead:1",
+                                             updated_at=timezone.now() - timedelta(hours=2))
+        with mock.patch.object(jobs, "REQUEUE_INTERVAL", 0), self.assertLogs("page.jobs", "WARNING"):
+            self.assertEqual(jobs.work(once=True), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.DONE)
+        res = self.client.post("/api/jobs/", {"kind": "format_disk"}, format="json")
+        self.assertEqual(res.status_code, 400)
+
+    def test_background_photo_and_failures(self):
+        upload = SimpleUploadedFile("photo.jpg", make_jpeg(), content_type="image/jpeg")
+        res = self.client.post(f"/api/students/{self.student.pk}/photo/?background=1", {"image": upload})
+        self.assertEqual(res.status_code, 202, res.content)
+
+        FeeSummary.objects.all().delete()
+        self.client.post("/api/jobs/", {"kind": "rebuild_fee_summaries"}, format="json")
+        self.run_jobs()
+
+        self.assertEqual(list(Job.objects.order_by("id").values_list("status", flat=True)), ["done", "done"])
+        self.student.refresh_from_db()
+        self.assertRegex(self.student.image_small.name, r"[0-9a-f]{16}_small\.\w+$")
+        self.assertTrue(FeeSummary.objects.filter(student=self.student).exists())
+
+    def test_failed_job_is_recorded(self):
+        from . import jobs
+        job = jobs.enqueue("export", {"start": "not-a-date"})
+        with self.assertLogs("page.jobs", "ERROR"):
+            self.run_jobs()
+        job.refresh_from_db()
+        self.assertEqual(job.status, "failed")
+        self.assertTrue(job.message.startswith("ValidationError"))
+        self.assertIsNotNone(job.finished_at)
+        self.assertIsNone(jobs.claim_next("test"))
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class TimetableTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.ravi = Faculty.objects.create(faculty_name="Ravi")
+        self.anu = Faculty.objects.create(faculty_name="Anu")
+        self.day = date(2025, 1, 7)
+        self.a = Batch.objects.create(faculty=self.ravi, label="B1", date=self.day, batch_time="9-11 AM")
+        self.b = Batch.objects.create(faculty=self.ravi, label="B2", date=self.day, batch_time="10:30 AM")
+        Batch.objects.create(faculty=self.ravi, label="B3", date=self.day, batch_time="11:30-12:30 PM")
+        Batch.objects.create(faculty=self.anu, label="B4", date=self.day + timedelta(days=1), batch_time="TBD")
+
+    def test_time_slots_are_parsed(self):
+        from datetime import time
+        from .timeslots import parse_time_slot
+        self.assertEqual(parse_time_slot("8.00-10.00AM"), (time(8), time(10)))
+        self.assertEqual(parse_time_slot("11-12 PM"), (time(11), time(12)))
+        self.assertEqual(parse_time_slot("4-5 PM"), (time(16), time(17)))
+        self.assertEqual(parse_time_slot("10:30 AM"), (time(10, 30), time(11, 30)))
+        self.assertEqual(parse_time_slot("TBD"), (None, None))
+
+        self.b.batch_time = "4-5 PM"
+        self.b.save(update_fields=["batch_time"])
+        self.b.refresh_from_db()
+        self.assertEqual((self.b.start_time, self.b.end_time), (time(16), time(17)))
+
+    def test_default_window_follows_today(self):
+        from unittest import mock
+        res = self.client.get("/api/batches/timetable/")
+        self.assertEqual(res.json()["start"], timezone.localdate().isoformat())
+        with mock.patch("django.utils.timezone.localdate", return_value=date(2030, 1, 1)):
+            later = self.client.get("/api/batches/timetable/")
+        self.assertEqual(later.json()["start"], "2030-01-01")
+        self.assertNotEqual(later["ETag"], res["ETag"])
+
+    def test_timetable_groups_by_day_and_flags_clashes(self):
+        res = self.client.get("/api/batches/timetable/", {"start": "2025-01-07", "end": "2025-01-09"})
+        self.assertEqual(res.status_code, 200, res.content)
+        data = res.json()
+        self.assertEqual([d["date"] for d in data["days"]], ["2025-01-07", "2025-01-08", "2025-01-09"])
+        self.assertEqual(data["days"][0]["weekday"], "Tuesday")
+        self.assertEqual([b["label"] for b in data["days"][0]["batches"]], ["B1", "B2", "B3"])
+        self.assertEqual(data["clashes"], [{"faculty": self.ravi.pk, "date": "2025-01-07",
+                                            "batches": [self.a.pk, self.b.pk]}])
+        self.assertEqual(data["days"][0]["batches"][1]["clashes_with"], [self.a.pk])
+        self.assertEqual(data["days"][0]["batches"][2]["clashes_with"], [])
+        self.assertEqual(len(data["unscheduled"]), 1)
+
+        res = self.client.get("/api/batches/timetable/", {"start": "2025-01-07", "end": "2025-01-09",
+                                                          "faculty": self.anu.pk})
+        self.assertEqual([len(d["batches"]) for d in res.json()["days"]], [0, 1, 0])
+        self.assertEqual(res.json()["clashes"], [])
+
+        self.assertEqual(self.client.get("/api/batches/timetable/", {"start": "2025-13-01"}).status_code, 400)
+        self.assertEqual(self.client.get("/api/batches/timetable/",
+                                         {"start": "2025-01-01", "end": "2025-12-31"}).status_code, 400)
+
+    def test_free_faculties_is_one_query(self):
+        with self.assertNumQueries(1):
+            res = self.client.get("/api/batches/free/", {"date": "2025-01-07", "start": "10:00", "end": "11:00"})
+        self.assertEqual([f["faculty_name"] for f in res.json()["free"]], ["Anu"])
+
+        res = self.client.get("/api/batches/free/", {"date": "2025-01-07", "start": "13:00", "end": "14:00"})
+        self.assertEqual([f["faculty_name"] for f in res.json()["free"]], ["Anu", "Ravi"])
+
+        res = self.client.get("/api/batches/free/", {"date": "2025-01-07", "start": "11:00", "end": "10:00"})
+        self.assertEqual(res.status_code, 400)
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "EXPLAIN QUERY PLAN SELECT faculty_id FROM page_batch "
+                "WHERE date = %s AND start_time < %s AND end_time > %s",
+                ["2025-01-07", "11:00:00", "10:00:00"],
+            )
+            plan = " ".join(str(row[-1]) for row in cursor.fetchall())
+        self.assertIn("batch_date_slot_idx", plan)
+
+
+class AttendanceTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        joined = date(2025, 1, 1)
+        self.py_am = make_student(regno=1, batchtime="9 AM", date_of_joining=joined)
+        self.py_am_break = make_student(regno=2, batchtime="9 AM", date_of_joining=joined)
+        self.java = make_student(regno=3, course="Java", batchtime="4 PM")
+        self.late = make_student(regno=4, batchtime="9 AM", date_of_joining=date(2025, 6, 1))
+        Break.objects.create(student=self.py_am_break, from_date=date(2025, 3, 1), to_date=date(2025, 3, 10))
+        Break.objects.create(student=self.java, from_date=date(2025, 3, 10), to_date=date(2025, 3, 20))
+
+    def test_queryset_helpers(self):
+        day = date(2025, 3, 5)
+        self.assertEqual(set(Student.objects.on_break(day)), {self.py_am_break})
+        self.assertEqual(set(Student.objects.active_on(day)), {self.py_am, self.java})
+        self.assertEqual(set(Student.objects.on_break(date(2025, 3, 10))), {self.py_am_break, self.java})
+        self.assertEqual(set(Student.objects.on_break(date(2025, 2, 1), date(2025, 3, 1))), {self.py_am_break})
+        self.assertEqual(set(Student.objects.active_on(date(2025, 7, 1))), {self.py_am, self.py_am_break,
+                                                                            self.java, self.late})
+
+    def test_counts_per_course_and_batchtime_in_one_query(self):
+        with self.assertNumQueries(1):
+            res = self.client.get("/api/students/attendance/", {"date": "2025-03-10"})
+        data = res.json()
+        self.assertEqual((data["enrolled"], data["active"], data["on_break"]), (3, 1, 2))
+        self.assertEqual(data["groups"], [
+            {"course": "Java", "batchtime": "4 PM", "enrolled": 1, "on_break": 1, "active": 0},
+            {"course": "Python", "batchtime": "9 AM", "enrolled": 2, "on_break": 1, "active": 1},
+        ])
+
+        data = self.client.get("/api/students/attendance/",
+                               {"from_date": "2025-03-11", "to_date": "2025-06-30", "course": "python"}).json()
+        self.assertEqual((data["enrolled"], data["active"], data["on_break"]), (3, 3, 0))
+
+        self.assertEqual(self.client.get("/api/students/attendance/").status_code, 400)
+        self.assertEqual(self.client.get("/api/students/attendance/",
+                                         {"from_date": "2025-03-11", "to_date": "2025-03-01"}).status_code, 400)
+
+    def test_list_filters(self):
+        res = self.client.get("/api/students/", {"on_break": "2025-03-15", "fields": "regno"})
+        self.assertEqual([s["regno"] for s in res.json()], [3])
+        res = self.client.get("/api/students/", {"active_on": "2025-03-15", "fields": "regno"})
+        self.assertEqual([s["regno"] for s in res.json()], [1, 2])
+
+    def test_overlap_subquery_uses_index(self):
+        sql, params = Break.objects.overlapping(date(2025, 3, 5)).values("student_id").query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute("EXPLAIN QUERY PLAN " + sql, params)
+            plan = " ".join(str(row[-1]) for row in cursor.fetchall())
+        self.assertIn("break_to_from_idx", plan)
+
+
+class DashboardRollupTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def assertMatchesRebuild(self):
+        from . import rollups
+        incremental = rollups.dashboard_stats()
+        rollups.rebuild(chunk_size=2)
+        self.assertEqual(incremental, rollups.dashboard_stats())
+        return incremental
+
+    def test_signals_and_bulk_paths_keep_rollups_exact(self):
+        anu = make_student(regno=1, date_of_joining=date(2025, 1, 10), total_fees=5000)
+        bala = make_student(regno=2, course="Java", date_of_joining=date(2025, 2, 3), total_fees=5000)
+        FeeReceipt.objects.create(student=anu, amount=1000, date=date(2025, 1, 10))
+        receipt = FeeReceipt.objects.create(student=bala, amount=500, date=date(2025, 2, 3))
+        self.client.patch(f"/api/students/{anu.id}/update_exam_course/",
+                          {"course": "Python", "Certificate_status": "Yes"}, format="json")
+        self.client.patch(f"/api/students/{bala.id}/update_exam_course/", {"course": "Java"}, format="json")
+
+        stats = self.assertMatchesRebuild()
+        self.assertEqual(stats["enrolment"]["by_month"], [{"month": "2025-01", "students": 1},
+                                                          {"month": "2025-02", "students": 1}])
+        self.assertEqual(stats["fees"]["amount"], 1500)
+        self.assertEqual(stats["certificates"]["by_status"], [{"certificate_status": "", "attempts": 1},
+                                                              {"certificate_status": "Yes", "attempts": 1}])
+
+        # Edits that move rows between buckets
+        receipt.amount, receipt.date = 700, date(2025, 2, 4)
+        receipt.save()
+        anu.course = "Java"
+        anu.save()
+        self.client.patch(f"/api/students/{bala.id}/update_cert_status/", {"certificate_status": "No"}, format="json")
+        self.client.patch("/api/students/bulk_exam_update/", [
+            {"student": anu.id, "course": "Python", "certificate_status": "No"},
+        ], format="json")
+        self.client.patch(f"/api/students/{bala.id}/", {"Exam_Course": "Java,C", "Certificate_status": "Yes,"},
+                          format="json")
+        self.client.post("/api/students/bulk_import/", {"file": SimpleUploadedFile(
+            "s.csv", b"studentname,regno,course,contact,date_of_joining,Exam_Course\n"
+                     b"Chitra,3,Python,9876543211,2025-03-01,Python\n")}, format="multipart")
+        stats = self.assertMatchesRebuild()
+        self.assertEqual(stats["enrolment"]["by_course"], [{"course": "Java", "students": 2},
+                                                           {"course": "Python", "students": 1}])
+        self.assertEqual(stats["fees"]["by_course"], [{"course": "Java", "receipts": 2, "amount": 1700}])
+
+        # Cascaded deletes
+        bala.delete()
+        stats = self.assertMatchesRebuild()
+        self.assertEqual(stats["enrolment"]["students"], 2)
+        self.assertEqual(stats["fees"]["amount"], 1000)
+        self.assertEqual(stats["certificates"]["by_course"], [
+            {"course": "Python", "certificate_status": "", "attempts": 1},
+            {"course": "Python", "certificate_status": "No", "attempts": 1},
+        ])
+
+    def test_cascade_reads_course_once(self):
+        from django.db import IntegrityError
+        from django.test.utils import CaptureQueriesContext
+        from .models import EnrolmentRollup
+        students = [make_student(regno=n, course="Java", total_fees=5000) for n in (1, 2)]
+        for student in students:
+            for day in range(1, 5):
+                FeeReceipt.objects.create(student=student, amount=100, date=date(2025, 1, day))
+
+        for doomed in (students[0], Student.objects.filter(pk=students[1].pk)):
+            with CaptureQueriesContext(connection) as queries:
+                doomed.delete()
+            lookups = [q["sql"] for q in queries if q["sql"].startswith('SELECT "page_student"."id", "page_student"."course"')
+                       or q["sql"].startswith('SELECT "page_student"."course"')]
+            self.assertLessEqual(len(lookups), 1, lookups)
+        self.assertEqual(self.assertMatchesRebuild()["fees"]["amount"], 0)
+
+        # Rows without a joining month are unique per course too
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            EnrolmentRollup.objects.create(course="Java", month=None)
+            EnrolmentRollup.objects.create(course="Java", month=None)
+
+    def test_stats_endpoint_reads_rollups_only(self):
+        for n in range(5):
+            student = make_student(regno=n + 1, date_of_joining=date(2025, n + 1, 1), total_fees=1000)
+            FeeReceipt.objects.create(student=student, amount=100, date=date(2025, n + 1, 2))
+
+        with self.assertNumQueries(7):
+            res = self.client.get("/api/stats/", {"start": "2025-02-01", "end": "2025-03-31"})
+        data = res.json()
+        self.assertEqual(data["enrolment"]["students"], 2)
+        self.assertEqual([d["date"] for d in data["fees"]["by_day"]], ["2025-02-02", "2025-03-02"])
+        self.assertEqual(data["fees"]["amount"], 200)
+        self.assertEqual(self.client.get("/api/stats/", {"start": "soon"}).status_code, 400)
+
+        out = io.StringIO()
+        call_command("rebuild_rollups", "--chunk-size", "2", stdout=out)
+        self.assertIn("enrolment 5 rows", out.getvalue())
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class FastListTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(settings.MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.client = APIClient()
+        self.anu = make_student(regno=1, studentname="Anu", date_of_joining=date(2025, 1, 10), total_fees=5000,
+                                address="Line two வ", Exam_Course="Python")
+        self.anu.image = SimpleUploadedFile("a.jpg", make_jpeg((40, 30)), content_type="image/jpeg")
+        self.anu.save()
+        make_student(regno=2, studentname="Bala", course="Java")
+        Break.objects.create(student=self.anu, from_date=date(2025, 3, 1), to_date=date(2025, 3, 5), reason="Trip")
+        Break.objects.create(student=self.anu, from_date=date(2025, 5, 1), to_date=date(2025, 5, 2))
+        FeeReceipt.objects.create(student=self.anu, amount=1000, receipt_no="R1", date=date(2025, 1, 10))
+        FeeReceipt.objects.create(student=self.anu, amount=500, date=date(2025, 2, 10))
+
+    def get_both(self, path, params=None):
+        regular = self.client.get(path, params or {})
+        fast = self.client.get(path, {**(params or {}), "fast": "1"})
+        self.assertTrue(fast.streaming)
+        self.assertFalse(regular.streaming)
+        return regular.content, b"".join(fast.streaming_content)
+
+    def test_output_is_byte_identical(self):
+        for path, params in [
+            ("/api/students/", {}),
+            ("/api/students/", {"fields": "regno,image_small,updated_at", "ordering": "-regno"}),
+            ("/api/students/", {"fields": "regno", "expand": "breaks"}),
+            ("/api/students/", {"course": "nothing"}),
+            ("/api/fees/", {}),
+            ("/api/fees/", {"student": self.anu.id}),
+        ]:
+            with self.subTest(path=path, params=params):
+                regular, fast = self.get_both(path, params)
+                self.assertEqual(fast, regular)
+                if path == "/api/students/" and not params:
+                    self.assertIn(b"http://testserver/media/", fast)
+
+    def test_fast_list_query_count_is_flat(self):
+        for n in range(3, 30):
+            student = make_student(regno=n)
+            Break.objects.create(student=student, from_date=date(2025, 1, 1), to_date=date(2025, 1, 2))
+        # ETag stamp (2 aggregates), the students, their breaks
+        with self.assertNumQueries(4):
+            b"".join(self.client.get("/api/students/", {"fast": "1"}).streaming_content)
+
+    async def test_streams_asynchronously_under_asgi(self):
+        res = await self.async_client.get("/api/students/", {"fast": "1", "fields": "regno"})
+        self.assertTrue(res.is_async)
+        body = b"".join([chunk async for chunk in res.streaming_content])
+        self.assertEqual(body, b'[{"id":1,"regno":1},{"id":2,"regno":2}]')
+
+    def test_falls_back_when_paginated(self):
+        res = self.client.get("/api/students/", {"fast": "1", "page_size": "1"})
+        self.assertFalse(res.streaming)
+        self.assertEqual(len(res.json()["results"]), 1)
+
+
+class ChangeFeedTests(TestCase):
+    def setUp(self):
+        from . import events
+        self.events = events
+        self.start = str(events.latest_id())
+
+    def published(self):
+        return [event for _, event in self.events.since(int(self.start))[0]]
+
+    def read(self, **headers):
+        res = self.client.get("/api/events/", {"timeout": "0", **headers.pop("params", {})}, **headers)
+        self.assertEqual(res["Content-Type"], "text/event-stream")
+        return b"".join(res.streaming_content).decode()
+
+    def test_writes_publish_compact_events(self):
+        student = make_student(regno=901)
+        pk = student.pk
+        student.delete()
+
+        published = self.published()
+        self.assertEqual([(e["model"], e["id"], e["op"]) for e in published],
+                         [("student", pk, "create"), ("student", pk, "delete")])
+        self.assertTrue(published[0]["version"].endswith("Z"))
+        self.assertIsNone(published[1]["version"])
+        # Rollup rows and tombstones changed too, but are not published
+        self.assertEqual({e["model"] for e in published}, {"student"})
+
+    def test_events_are_shared_between_processes(self):
+        # Written by another process (a run_jobs worker, another gunicorn
+        # worker): only the table is shared
+        ChangeEvent.objects.create(model="student", object_id=77, op="update")
+        self.assertIn('"model":"student","id":77,"op":"update"', self.read(HTTP_LAST_EVENT_ID=self.start))
+
+    def test_resumes_after_last_event_id(self):
+        student = make_student(regno=902)
+        Break.objects.create(student=student, from_date=date(2025, 1, 1), to_date=date(2025, 1, 2))
+
+        body = self.read(HTTP_LAST_EVENT_ID=self.start)
+        self.assertTrue(body.startswith("retry: "))
+        self.assertIn(f'"model":"student","id":{student.id},"op":"create"', body)
+        self.assertIn('"model":"break"', body)
+        self.assertNotIn("event: reset", body)
+
+        latest = self.events.latest_id()
+        body = self.read(params={"last_event_id": self.start, "models": "break"})
+        self.assertNotIn('"model":"student"', body)
+        self.assertIn('"model":"break"', body)
+
+        # Skipped events still move the client's id forward
+        body = self.read(params={"last_event_id": self.start, "models": "student"})
+        self.assertTrue(body.endswith(f"id: {latest}\n\n"))
+
+        # Nothing is replayed to new clients, who get the current id
+        body = self.read()
+        self.assertNotIn("data: {\"model\"", body)
+        self.assertIn(f"id: {latest}\n", body)
+
+    def test_unknown_or_expired_cursor_gets_reset(self):
+        body = self.read(HTTP_LAST_EVENT_ID="deadbeef-12")
+        self.assertIn("event: reset", body)
+        self.assertIn(f"id: {self.events.latest_id()}\n", body)
+
+        for pk in range(4):
+            self.events.publish("student", pk, "update")
+        ChangeEvent.objects.update(created_at=timezone.now() - timedelta(days=2))
+        first, latest = int(self.start) + 1, self.events.latest_id()
+        self.assertEqual(self.events.prune(), 3)
+        self.assertFalse(self.events.since(first)[2])
+        self.assertEqual(len(self.events.since(latest - 1)[0]), 1)
+        self.assertEqual(self.events.since(latest), ([], latest, True))
+        self.assertFalse(self.events.since(latest + 1)[2])
+        self.assertIn("event: reset", self.read(HTTP_LAST_EVENT_ID=str(first)))
+
+    def test_rejects_unknown_models_and_bad_timeouts(self):
+        self.assertEqual(self.client.get("/api/events/", {"models": "student,tombstone"}).status_code, 400)
+        for timeout in ("nan", "inf", "-inf", "soon"):
+            with self.subTest(timeout=timeout):
+                self.assertEqual(self.client.get("/api/events/", {"timeout": timeout}).status_code, 400)
+
+    def test_bulk_exam_update_publishes_attempts(self):
+        student = make_student(regno=903, Exam_Course="Python")
+        student.sync_exam_attempts()
+        self.start = str(self.events.latest_id())
+        APIClient().patch("/api/students/bulk_exam_update/",
+                          [{"student": student.id, "course": "Python", "certificate_status": "Yes"}],
+                          format="json")
+        self.assertEqual(
+            sorted((e["model"], e["op"]) for e in self.published()),
+            [("examattempt", "update"), ("student", "update")],
+        )
+
+    def test_wsgi_stream_does_not_wait(self):
+        res = self.client.get("/api/events/", HTTP_ACCEPT_ENCODING="gzip")
+        self.assertFalse(res.has_header("Content-Encoding"))
+        self.assertEqual(res["Cache-Control"], "no-cache")
+        started = time.monotonic()
+        b"".join(res.streaming_content)
+        self.assertLess(time.monotonic() - started, 1)
+
+    async def test_async_stream_sees_new_events(self):
+        import asyncio
+        from asgiref.sync import sync_to_async
+        res = await self.async_client.get("/api/events/", {"timeout": "5"})
+        self.assertTrue(res.is_async)
+        chunks = aiter(res.streaming_content)
+        self.assertTrue((await anext(chunks)).startswith(b"retry: "))
+        await sync_to_async(self.events.publish)("course", 7, "update")
+        chunk = await asyncio.wait_for(anext(chunks), 3)
+        self.assertIn(b'data: {"model":"course","id":7,"op":"update","version":null}', chunk)
+        await chunks.aclose()
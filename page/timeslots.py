@@ -0,0 +1,58 @@
+"""
+Parse the free-text batch times into (start, end) clock times.
+
+FacultyDetails saves a start time only ("10:30 AM"); older rows hold
+ranges such as "8.00-10.00AM", "11-12 PM" or "4-5 PM", where the AM/PM on
+the end also covers the start unless that would put the start after the
+end. Without any AM/PM, hours 1-6 are read as afternoon classes.
+"""
+import re
+from datetime import time, timedelta
+
+# Length assumed for a batch saved with a start time only
+DEFAULT_DURATION = timedelta(hours=1)
+
+_CLOCK = r"(\d{1,2})(?:[:.](\d{2}))?\s*(AM|PM)?"
+_SLOT = re.compile(rf"^{_CLOCK}(?:\s*(?:-|–|TO)\s*{_CLOCK})?$")
+
+
+def _to_24h(hour, minute, meridiem):
+    if meridiem == "AM":
+        hour = 0 if hour == 12 else hour
+    elif meridiem == "PM":
+        hour = hour if hour == 12 else hour + 12
+    elif 1 <= hour <= 6:
+        hour += 12
+    if hour > 23 or minute > 59:
+        raise ValueError
+    return hour * 60 + minute
+
+
+def parse_time_slot(text):
+    """``(start, end)`` as ``datetime.time`` for a batch time, or ``(None, None)``."""
+    match = _SLOT.match((text or "").strip().upper())
+    if not match:
+        return None, None
+    h1, m1, mer1, h2, m2, mer2 = match.groups()
+
+    try:
+        if h2 is None:
+            start = _to_24h(int(h1), int(m1 or 0), mer1)
+            end = min(start + int(DEFAULT_DURATION.total_seconds() // 60), 24 * 60 - 1)
+        else:
+            end = _to_24h(int(h2), int(m2 or 0), mer2)
+            start = _to_24h(int(h1), int(m1 or 0), mer1 or mer2)
+            if mer1 is None and mer2 is not None and start >= end:
+                start = _to_24h(int(h1), int(m1 or 0), "AM" if mer2 == "PM" else "PM")
+    except ValueError:
+        return None, None
+
+    if not start < end <= 24 * 60:
+        return None, None
+    end = min(end, 24 * 60 - 1)
+    return time(start // 60, start % 60), time(end // 60, end % 60)
+
+
+def parse_clock(text):
+    """A single clock time ("10", "10:30", "10.30 am", "14:00") or None."""
+    return parse_time_slot(text)[0]
@@ -0,0 +1,114 @@
+"""
+Faculty timetables built on Batch's parsed ``start_time`` / ``end_time``.
+
+Two batches clash when they belong to the same faculty, fall on the same
+date and their [start, end) slots overlap. Batches whose ``batch_time``
+could not be parsed are listed but never clash.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db.models import F
+
+from .models import Batch, Faculty
+
+# Longest range one timetable request may cover
+MAX_DAYS = 62
+
+TIMETABLE_FIELDS = (
+    "id", "faculty_id", "faculty__faculty_name", "label", "subject", "date", "batch_time", "start_time", "end_time",
+)
+
+
+def find_clashes(rows):
+    """
+    Overlapping pairs among timetable ``rows`` (dicts with ``id``,
+    ``faculty_id``, ``date``, ``start_time`` and ``end_time``), one sweep
+    per faculty and day. Returns ``[(first_id, second_id), ...]``.
+    """
+    days = defaultdict(list)
+    for row in rows:
+        if row["start_time"] is not None:
+            days[row["faculty_id"], row["date"]].append(row)
+
+    clashes = []
+    for slots in days.values():
+        slots.sort(key=lambda row: (row["start_time"], row["id"]))
+        open_slots = []
+        for row in slots:
+            open_slots = [other for other in open_slots if other["end_time"] > row["start_time"]]
+            clashes.extend((other["id"], row["id"]) for other in open_slots)
+            open_slots.append(row)
+    return clashes
+
+
+def _format_time(value):
+    return value.strftime("%H:%M") if value is not None else None
+
+
+def build_timetable(start, end, faculty_id=None):
+    """
+    Batches between ``start`` and ``end`` (inclusive), grouped by day with
+    every day of the range present, plus the clashing pairs.
+    """
+    batches = Batch.objects.filter(date__range=(start, end))
+    if faculty_id:
+        batches = batches.filter(faculty_id=faculty_id)
+    rows = list(
+        batches.order_by("date", F("start_time").asc(nulls_last=True), "faculty_id", "id").values(*TIMETABLE_FIELDS)
+    )
+
+    clashes = find_clashes(rows)
+    clashes_with = defaultdict(list)
+    for first, second in clashes:
+        clashes_with[first].append(second)
+        clashes_with[second].append(first)
+
+    by_day = defaultdict(list)
+    for row in rows:
+        by_day[row["date"]].append({
+            "id": row["id"],
+            "faculty": row["faculty_id"],
+            "faculty_name": row["faculty__faculty_name"],
+            "label": row["label"],
+            "subject": row["subject"],
+            "batch_time": row["batch_time"],
+            "start_time": _format_time(row["start_time"]),
+            "end_time": _format_time(row["end_time"]),
+            "clashes_with": sorted(clashes_with.get(row["id"], [])),
+        })
+
+    by_id = {row["id"]: row for row in rows}
+    days = []
+    day = start
+    while day <= end:
+        days.append({"date": day.isoformat(), "weekday": day.strftime("%A"), "batches": by_day.get(day, [])})
+        day += timedelta(days=1)
+
+    return {
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "faculty": int(faculty_id) if faculty_id else None,
+        "days": days,
+        "clashes": [
+            {
+                "faculty": by_id[first]["faculty_id"],
+                "date": by_id[first]["date"].isoformat(),
+                "batches": [first, second],
+            }
+            for first, second in clashes
+        ],
+        "unscheduled": [row["id"] for row in rows if row["start_time"] is None],
+    }
+
+
+def free_faculties(day, start, end):
+    """
+    Faculties with no batch overlapping ``start``-``end`` on ``day``. The
+    busy set is a range scan of ``batch_date_slot_idx`` run as a subquery,
+    so the whole lookup is one query.
+    """
+    busy = Batch.objects.filter(date=day, start_time__lt=end, end_time__gt=start).values("faculty_id")
+    return list(
+        Faculty.objects.exclude(pk__in=busy).order_by("faculty_name", "id").values("id", "faculty_name", "subjects")
+    )
@@ -7,8 +7,16 @@ from .views import (
     CourseViewSet,
     BreakViewset,
     FeeReceiptViewSet,
+    ExamAttemptViewSet,
+    JobViewSet,
     export_excel,
+    bulk_import_students,
+    student_photo,
     filter_students,
+    stats_view,
+    change_feed,
+    cache_stats_view,
+    request_stats_view,
 )
 
 router = DefaultRouter()
@@ -18,9 +26,18 @@ router.register(r'batches', BatchViewSet)
 router.register(r'courses', CourseViewSet)
 router.register(r'breaks', BreakViewset)
 router.register(r'fees', FeeReceiptViewSet)
+router.register(r'exams', ExamAttemptViewSet)
+router.register(r'jobs', JobViewSet)
 
 urlpatterns = [
+    # Async views; listed before the router so they win over its student routes
+    path("students/bulk_import/", bulk_import_students, name="student-bulk-import"),
+    path("students/<int:pk>/photo/", student_photo, name="student-photo"),
     path('', include(router.urls)),
     path("export-excel/", export_excel, name="export_excel"),
     path("filter-students/", filter_students),
+    path("stats/", stats_view, name="stats"),
+    path("events/", change_feed, name="change_feed"),
+    path("cache-stats/", cache_stats_view, name="cache_stats"),
+    path("request-stats/", request_stats_view, name="request_stats"),
 ]
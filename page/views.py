@@ -1,55 +1,233 @@
-from rest_framework import viewsets
+from rest_framework import mixins, viewsets
+from django.conf import settings
+from django.urls import reverse
 from django.utils import timezone
+from django.utils.dateparse import parse_date
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import OrderingFilter
 from rest_framework.response import Response
-from django.http import HttpResponse, JsonResponse
-from django.db import IntegrityError
-from .models import Student, Faculty, Batch, Course, Break, FeeReceipt
+from django.http import (
+    FileResponse, HttpResponse, HttpResponseNotAllowed, JsonResponse, StreamingHttpResponse
+)
+from django.db import IntegrityError, transaction
+from django.db.models import Max
+from .models import Student, Faculty, Batch, Course, Break, FeeReceipt, ExamAttempt, Job
 from .serializers import (
     StudentSerializer, FacultySerializer, BatchSerializer,
-    CourseSerializer, BreakSerializer, FeeReceiptSerializer
+    CourseSerializer, BreakSerializer, FeeReceiptSerializer, ExamAttemptSerializer, JobSerializer
 )
+from . import events, jobs, rollups
+from .exports import aiter_csv, awrite_xlsx, export_queryset, iter_csv
+from .images import encode_variants, apply_variants
+from .imports import ImportFileError, StudentImport, read_rows
+from .offload import aiter_file, run_db, run_in_pool, serving_async
+from .filters import filter_due, filter_exam_attempts, filter_students_queryset, number_param
+from .cache import CachedResponseMixin, cache_stats
+from .conditional import ConditionalGetMixin
+from .fastlist import FastListMixin
+from .pagination import OptionalCursorPagination
+from .search import DEFAULT_LIMIT, search_students
+from .timeslots import parse_clock
+from .timetable import MAX_DAYS, build_timetable, free_faculties
+from . import metrics
+from .sync import DeltaSyncMixin
 import openpyxl
+from PIL import Image
 import json
+import math
+import os
+from datetime import timedelta
 from openpyxl.utils import get_column_letter
 from django.views.decorators.csrf import csrf_exempt
 
-class StudentViewSet(viewsets.ModelViewSet):
+# Fields bulk_exam_update may set, and the legacy spellings clients send
+EXAM_UPDATE_FIELDS = {"hallticket_no", "exam_date", "certificate_status", "issued_status"}
+EXAM_FIELD_ALIASES = {"Exam_Date": "exam_date", "Certificate_status": "certificate_status",
+                      "Issued_status": "issued_status"}
+BULK_EXAM_UPDATE_LIMIT = 2000
+
+
+def clean_exam_fields(data, exam_fields=None):
+    """
+    ``(fields, error)``: the exam attempt fields present in ``data``
+    (legacy keys included) checked by the ExamAttemptSerializer fields,
+    without model validators (no queries). Blank dates clear the date.
+    """
+    exam_fields = exam_fields or ExamAttemptSerializer().fields
+    fields = {}
+    for key, value in data.items():
+        field = EXAM_FIELD_ALIASES.get(key, key)
+        if field not in EXAM_UPDATE_FIELDS or value is None:
+            continue
+        if field == "exam_date":
+            parsed = ExamAttempt.parse_exam_date(value) if isinstance(value, str) else None
+            if parsed is None and value != "":
+                return None, "Exam date must be YYYY-MM-DD"
+            value = parsed
+        else:
+            try:
+                value = exam_fields[field].run_validation(value)
+            except ValidationError as exc:
+                return None, f"{field}: {' '.join(str(message) for message in exc.detail)}"
+        fields[field] = value
+    return fields, None
+
+
+class StudentViewSet(DeltaSyncMixin, ConditionalGetMixin, FastListMixin, viewsets.ModelViewSet):
     queryset = Student.objects.all()
     serializer_class = StudentSerializer
+    etag_related = ("breaks",)
+    pagination_class = OptionalCursorPagination
+    filter_backends = [OrderingFilter]
+    ordering_fields = ["id", "regno", "studentname", "updated_at"]
+    ordering = ["id"]
+
+    def get_fields_param(self):
+        """
+        Field names requested with ``?fields=a,b,c`` on GET requests, or
+        None for the full representation. Nested breaks are only included
+        when listed in ``fields`` or asked for with ``?expand=breaks``.
+        """
+        if self.request.method != "GET":
+            return None
+
+        params = self.request.query_params
+        fields = params.get("fields")
+        if not fields:
+            return None
+
+        names = {name.strip() for name in fields.split(",") if name.strip()}
+        names.add("id")
+        if "breaks" in params.get("expand", "").split(","):
+            names.add("breaks")
+        return names
+
+    def get_serializer(self, *args, **kwargs):
+        kwargs.setdefault("fields", self.get_fields_param())
+        return super().get_serializer(*args, **kwargs)
 
     def get_queryset(self):
-        regno = self.request.query_params.get("regno")
-        if regno:
-            return Student.objects.filter(regno=regno)
-        return super().get_queryset()
+        queryset = super().get_queryset()
+
+        fields = self.get_fields_param()
+        if fields is None or "breaks" in fields:
+            queryset = queryset.prefetch_related("breaks")
+        if fields is not None:
+            # Ordering columns stay loaded so cursor pagination can read them
+            concrete = {f.name for f in Student._meta.concrete_fields}
+            queryset = queryset.only(*((fields | set(self.ordering_fields)) & concrete))
+
+        return filter_students_queryset(queryset, self.request.query_params)
+
+    @action(detail=False, methods=["GET"])
+    def search(self, request):
+        """
+        Typeahead lookup: ``?q=`` matches word prefixes of name, father
+        name, regno, contact, email and course, best matches first.
+        ``limit`` defaults to 10 (max 50).
+        """
+        try:
+            limit = int(request.query_params.get("limit", DEFAULT_LIMIT))
+        except ValueError:
+            return Response({"error": "limit must be a number"}, status=400)
+        return Response(search_students(request.query_params.get("q", ""), limit))
+
+    @action(detail=False, methods=["GET"])
+    def attendance(self, request):
+        """
+        Head counts for ``?date=`` (or ``from_date``-``to_date``) per course
+        and batchtime: students enrolled by then, on a break overlapping
+        the range, and active (the rest). Accepts the usual student filters.
+        """
+        params = request.query_params
+        try:
+            start = parse_date(params.get("from_date") or params.get("date") or "")
+            end = parse_date(params.get("to_date") or params.get("date") or "") or start
+        except ValueError:
+            start = end = None
+        if start is None or end < start:
+            return Response({"error": "Send date, or from_date and to_date (YYYY-MM-DD)"}, status=400)
+
+        groups = filter_students_queryset(Student.objects.all(), params).attendance_counts(start, end)
+        totals = {key: sum(group[key] for group in groups) for key in ("enrolled", "active", "on_break")}
+        return Response({"from_date": start.isoformat(), "to_date": end.isoformat(), **totals, "groups": groups})
 
     @action(detail=True, methods=["PATCH"])
     def update_cert_status(self, request, pk=None):
+        """
+        Set ``certificate_status`` on the student's exam attempts (only the
+        ``course`` one when given). The legacy column is derived from the
+        attempts, so a student with no exam course gets a 400.
+        """
         student = self.get_object()
+        if not isinstance(request.data, dict):
+            return Response({"error": "Send an object"}, status=400)
         status = request.data.get("certificate_status") or request.data.get("Certificate_status")
 
         if status is None:
             return Response({"error": "No certificate status provided"}, status=400)
+        fields, error = clean_exam_fields({"certificate_status": status})
+        if error:
+            return Response({"error": error}, status=400)
+        status = fields["certificate_status"]
+
+        attempts = student.exam_attempts.all()
+        course = request.data.get("course")
+        if course and not isinstance(course, str):
+            return Response({"error": "course must be a string"}, status=400)
+        if course:
+            attempts = attempts.filter(course=course)
+
+        with transaction.atomic():
+            before = list(attempts.values_list("pk", "course", "certificate_status"))
+            if not attempts.update(certificate_status=status, updated_at=timezone.now()):
+                return Response({"error": "No exam course found for this student; add one with update_exam_course"},
+                                status=400)
+            rollups.move_certificates((course, old, status) for _, course, old in before)
+            events.publish_many(ExamAttempt, (pk for pk, _, _ in before))
+            student.sync_exam_columns()
 
-        student.Certificate_status = status
-        student.save()
         return Response({"message": "Certificate status updated successfully"})
 
     @action(detail=True, methods=["PATCH"])
     def update_exam_details(self, request, pk=None):
+        """
+        Set ``hallticket_no`` / ``exam_date`` on the ``course`` attempt, or
+        on the latest one. A student with no exam course gets a 400; add
+        one with ``update_exam_course`` first.
+        """
         student = self.get_object()
-
-        hall = request.data.get("hallticket_no")
-        exam_date = request.data.get("exam_date") or request.data.get("Exam_Date")
-
-        if hall:
-            student.hallticket_no = hall
-        if exam_date:
-            student.Exam_Date = exam_date
+        if not isinstance(request.data, dict):
+            return Response({"error": "Send an object"}, status=400)
+
+        # Blank values leave the attempt as it is
+        fields, error = clean_exam_fields({
+            "hallticket_no": request.data.get("hallticket_no") or None,
+            "exam_date": request.data.get("exam_date") or request.data.get("Exam_Date") or None,
+        })
+        if error:
+            return Response({"error": error}, status=400)
+
+        # Without a course, the most recent exam attempt is updated
+        attempts = student.exam_attempts.all()
+        course = request.data.get("course")
+        if course and not isinstance(course, str):
+            return Response({"error": "course must be a string"}, status=400)
+        if course:
+            attempts = attempts.filter(course=course)
+        attempt = attempts.order_by("-position").first()
+        if attempt is None:
+            return Response({"error": "No exam course found for this student; add one with update_exam_course"},
+                            status=400)
+
+        for field, value in fields.items():
+            setattr(attempt, field, value)
 
         try:
-            student.save()
+            with transaction.atomic():
+                attempt.save()
+                student.sync_exam_columns()
         except IntegrityError:
             return Response({"error": "Hall Ticket No already exists"}, status=400)
 
@@ -58,128 +236,130 @@ class StudentViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=["PATCH"])
     def update_exam_course(self, request, pk=None):
         student = self.get_object()
+        if not isinstance(request.data, dict):
+            return Response({"error": "Send an object"}, status=400)
 
         course = request.data.get("course")
-        hall = request.data.get("hallticket_no")
-        exam_date = request.data.get("Exam_Date")
-        cert_status = request.data.get("Certificate_status")
-        issued_status = request.data.get("Issued_status")
-
         if not course:
             return Response({"error": "Course not provided"}, status=400)
+        if not isinstance(course, str):
+            return Response({"error": "course must be a string"}, status=400)
 
-        # Convert CSV to lists
-        courses = student.Exam_Course.split(",") if student.Exam_Course else []
-        halls = student.hallticket_no.split(",") if student.hallticket_no else []
-        dates = student.Exam_Date.split(",") if student.Exam_Date else []
-        certs = student.Certificate_status.split(",") if student.Certificate_status else []
-        issued_list = student.Issued_status.split(",") if student.Issued_status else []
-
-        # Normalize lengths
-        max_len = max(len(courses), len(halls), len(dates), len(certs), len(issued_list))
-
-        while len(courses) < max_len: courses.append("")
-        while len(halls) < max_len: halls.append("")
-        while len(dates) < max_len: dates.append("")
-        while len(certs) < max_len: certs.append("")
-        while len(issued_list) < max_len: issued_list.append("")
-
-        # ADD NEW COURSE
-        if course not in courses:
-            courses.append(course)
-            halls.append(hall or "")  # Only if provided
-            dates.append(exam_date or "")
-            certs.append(cert_status or "")
-            issued_list.append(issued_status or "")
-
-        else:
-            # UPDATE EXISTING COURSE
-            idx = courses.index(course)
-
-            if hall is not None:       # Only update if explicitly provided
-                halls[idx] = hall
-
-            if exam_date is not None:
-                dates[idx] = exam_date
+        fields, error = clean_exam_fields(request.data)
+        if error:
+            return Response({"error": error}, status=400)
 
-            if cert_status is not None:
-                certs[idx] = cert_status
+        with transaction.atomic():
+            attempt = student.exam_attempts.filter(course=course).first()
 
-            if issued_status is not None:
-                issued_list[idx] = issued_status
+            # ADD NEW COURSE
+            if attempt is None:
+                last = student.exam_attempts.aggregate(last=Max("position"))["last"]
+                attempt = ExamAttempt(
+                    student=student,
+                    course=course,
+                    position=0 if last is None else last + 1,
+                )
 
-        # Save all CSV fields
-        student.Exam_Course = ",".join(courses)
-        student.hallticket_no = ",".join(halls)
-        student.Exam_Date = ",".join(dates)
-        student.Certificate_status = ",".join(certs)
-        student.Issued_status = ",".join(issued_list)
+            # Only the fields explicitly provided
+            for field, value in fields.items():
+                setattr(attempt, field, value)
 
-        student.save()
+            attempt.save()
+            student.sync_exam_columns()
 
         return Response({"message": "Updated successfully"})
 
 
-
-
-        # @action(detail=True, methods=["PATCH"])
-        # def update_exam_course(self, request, pk=None):
-        #     student = self.get_object()
-
-        #     course = request.data.get("course")
-        #     hall = request.data.get("hallticket_no")
-        #     exam_date = request.data.get("Exam_Date")
-        #     status = request.data.get("Certificate_status")
-
-        #     if not course:
-        #         return Response({"error": "Course not provided"}, status=400)
-
-        #     # Convert CSV to lists
-        #     courses = student.Exam_Course.split(",") if student.Exam_Course else []
-        #     halls = student.hallticket_no.split(",") if student.hallticket_no else []
-        #     dates = student.Exam_Date.split(",") if student.Exam_Date else []
-        #     statuses = student.Certificate_status.split(",") if student.Certificate_status else []
-
-        #     # Normalize lists to equal lengths
-        #     max_len = max(len(courses), len(halls), len(dates), len(statuses))
-        #     while len(courses) < max_len: courses.append("")
-        #     while len(halls) < max_len: halls.append("")
-        #     while len(dates) < max_len: dates.append("")
-        #     while len(statuses) < max_len: statuses.append("")
-
-        #     # 🔥 If new course → ADD it
-        #     if course not in courses:
-        #         courses.append(course)
-        #         halls.append(hall or "")
-        #         dates.append(exam_date or "")
-        #         statuses.append(status or "")
-
-        #     else:
-        #         # 🔥 If exists → UPDATE that index
-        #         idx = courses.index(course)
-
-        #         if hall is not None:
-        #             halls[idx] = hall
-        #         if exam_date is not None:
-        #             dates[idx] = exam_date
-        #         if status is not None:
-        #             statuses[idx] = status
-
-        #     # Save back into CSV fields
-        #     student.Exam_Course = ",".join(courses)
-        #     student.hallticket_no = ",".join(halls)
-        #     student.Exam_Date = ",".join(dates)
-        #     student.Certificate_status = ",".join(statuses)
-
-        #     student.save()
-        #     return Response({"message": "Exam course added/updated successfully"})
-
+    @action(detail=False, methods=["PATCH", "POST"])
+    def bulk_exam_update(self, request):
+        """
+        Update many exam attempts in one transaction. Body: a list (or
+        ``{"updates": [...]}``) of ``{"student": id, "course": ..., <fields>}``
+        where the fields are any of hallticket_no, exam_date,
+        certificate_status and issued_status (the legacy capitalised keys
+        work too). Nothing is written unless every entry is valid; the
+        response only lists the attempts that actually changed.
+        """
+        updates = request.data.get("updates") if isinstance(request.data, dict) else request.data
+        if not isinstance(updates, list) or not updates:
+            return Response({"error": "Send a non-empty list of updates"}, status=400)
+        if len(updates) > BULK_EXAM_UPDATE_LIMIT:
+            return Response({"error": f"At most {BULK_EXAM_UPDATE_LIMIT} updates per request"}, status=400)
+
+        changes, errors = {}, {}
+        # Type and length checks of the attempt fields, without model validators (no queries)
+        exam_fields = ExamAttemptSerializer().fields
+        for index, update in enumerate(updates):
+            if not isinstance(update, dict):
+                errors[index] = "Each update must be an object"
+                continue
+            try:
+                student_id = int(update.get("student", update.get("id")))
+            except (TypeError, ValueError):
+                errors[index] = "student must be a student id"
+                continue
+            course = update.get("course")
+            if not course or not isinstance(course, str):
+                errors[index] = "course is required"
+                continue
+
+            fields, error = clean_exam_fields(update, exam_fields)
+            if error or not fields:
+                errors[index] = error or "Nothing to update"
+            else:
+                changes.setdefault((student_id, course), {}).update(fields)
+
+        if errors:
+            return Response({"errors": {str(index): message for index, message in errors.items()}}, status=400)
+
+        attempts = {
+            (attempt.student_id, attempt.course): attempt
+            for attempt in ExamAttempt.objects.select_related("student").filter(
+                student_id__in={student_id for student_id, _ in changes},
+                course__in={course for _, course in changes},
+            )
+        }
+        missing = [key for key in changes if key not in attempts]
+        if missing:
+            return Response({
+                "error": "No exam course found for some students",
+                "missing": [{"student": student_id, "course": course} for student_id, course in missing],
+            }, status=400)
+
+        changed, touched, moved = [], set(), []
+        now = timezone.now()
+        for key, fields in changes.items():
+            attempt = attempts[key]
+            dirty = [field for field, value in fields.items() if getattr(attempt, field) != value]
+            if "certificate_status" in dirty:
+                moved.append((attempt.course, attempt.certificate_status, fields["certificate_status"]))
+            if dirty:
+                for field in dirty:
+                    setattr(attempt, field, fields[field])
+                attempt.updated_at = now
+                touched.update(dirty)
+                changed.append(attempt)
+
+        if changed:
+            with transaction.atomic():
+                ExamAttempt.objects.bulk_update(changed, sorted(touched) + ["updated_at"], batch_size=500)
+                rollups.move_certificates(moved)
+                student_ids = {attempt.student_id for attempt in changed}
+                Student.bulk_sync_exam_columns(student_ids)
+                events.publish_many(ExamAttempt, (attempt.pk for attempt in changed))
+                events.publish_many(Student, student_ids)
+
+        return Response({
+            "updated": ExamAttemptSerializer(changed, many=True).data,
+            "unchanged": len(changes) - len(changed),
+        })
 
 
 # ------------------------------------------------------------
 # COURSE VIEWSET
 # ------------------------------------------------------------
-class CourseViewSet(viewsets.ModelViewSet):
+class CourseViewSet(CachedResponseMixin, viewsets.ModelViewSet):
     queryset = Course.objects.all()
     serializer_class = CourseSerializer
 
@@ -187,7 +367,7 @@ class CourseViewSet(viewsets.ModelViewSet):
 # ------------------------------------------------------------
 # FACULTY VIEWSET
 # ------------------------------------------------------------
-class FacultyViewSet(viewsets.ModelViewSet):
+class FacultyViewSet(CachedResponseMixin, viewsets.ModelViewSet):
     queryset = Faculty.objects.all()
     serializer_class = FacultySerializer
 
@@ -195,81 +375,421 @@ class FacultyViewSet(viewsets.ModelViewSet):
 # ------------------------------------------------------------
 # BATCH VIEWSET
 # ------------------------------------------------------------
-class BatchViewSet(viewsets.ModelViewSet):
-    queryset = Batch.objects.all()
+class BatchViewSet(DeltaSyncMixin, CachedResponseMixin, viewsets.ModelViewSet):
+    queryset = Batch.objects.select_related("faculty")
     serializer_class = BatchSerializer
+    cache_models = ("faculty",)
 
     def get_queryset(self):
+        queryset = super().get_queryset()
         faculty_id = self.request.query_params.get("faculty")
         if faculty_id:
-            return Batch.objects.filter(faculty_id=faculty_id)
-        return super().get_queryset()
+            return queryset.filter(faculty_id=faculty_id)
+        return queryset
+
+    @action(detail=False, methods=["GET"])
+    def timetable(self, request):
+        """
+        ``?start=&end=`` (YYYY-MM-DD, default: the week from today, at most
+        62 days) and optional ``faculty``: batches grouped by day, with
+        overlapping slots of the same faculty listed under ``clashes``.
+        """
+        params = request.query_params
+        try:
+            start = parse_date(params["start"]) if params.get("start") else timezone.localdate()
+            end = parse_date(params["end"]) if params.get("end") else start and start + timedelta(days=6)
+        except ValueError:
+            start = end = None
+        if start is None or end is None:
+            return Response({"error": "start and end must be YYYY-MM-DD"}, status=400)
+        if end < start or (end - start).days >= MAX_DAYS:
+            return Response({"error": f"end must be within {MAX_DAYS} days after start"}, status=400)
+
+        faculty_id = params.get("faculty")
+        if faculty_id and not faculty_id.isdigit():
+            return Response({"error": "faculty must be a number"}, status=400)
+
+        # The window defaults to today, so it is part of the cache key and ETag
+        return self.conditional_response(
+            request, self.get_queryset(), lambda: Response(build_timetable(start, end, faculty_id)),
+            variant=(start, end),
+        )
+
+    @action(detail=False, methods=["GET"])
+    def free(self, request):
+        """Faculties with no batch on ``?date=`` between ``start`` and ``end`` (e.g. 10:00 and 11:00)."""
+        params = request.query_params
+        try:
+            day = parse_date(params.get("date", ""))
+        except ValueError:
+            day = None
+        start, end = parse_clock(params.get("start")), parse_clock(params.get("end"))
+        if day is None or start is None or end is None:
+            return Response({"error": "Send date (YYYY-MM-DD), start and end (HH:MM)"}, status=400)
+        if end <= start:
+            return Response({"error": "end must be after start"}, status=400)
+
+        return self.conditional_response(request, self.get_queryset(), lambda: Response({
+            "date": day.isoformat(),
+            "start": start.strftime("%H:%M"),
+            "end": end.strftime("%H:%M"),
+            "free": free_faculties(day, start, end),
+        }))
 
 
 # ------------------------------------------------------------
 # BREAK VIEWSET
 # ------------------------------------------------------------
-class BreakViewset(viewsets.ModelViewSet):
-    queryset = Break.objects.all()
+class BreakViewset(DeltaSyncMixin, ConditionalGetMixin, viewsets.ModelViewSet):
+    queryset = Break.objects.select_related("student")
     serializer_class = BreakSerializer
+    etag_related = ("student",)
 
     def get_queryset(self):
-        student_id = self.request.query_params.get("student")
-        if student_id:
-            return Break.objects.filter(student_id=student_id)
-        return super().get_queryset()
+        queryset = super().get_queryset()
+        student_id = number_param(self.request.query_params, "student")
+        if student_id is not None:
+            return queryset.filter(student_id=student_id)
+        return queryset
+
+
+# ------------------------------------------------------------
+# EXAM ATTEMPT VIEWSET (READ ONLY — writes go through StudentViewSet)
+# ------------------------------------------------------------
+class ExamAttemptViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
+    queryset = ExamAttempt.objects.select_related("student")
+    serializer_class = ExamAttemptSerializer
+    etag_related = ("student",)
+    pagination_class = OptionalCursorPagination
+
+    def get_queryset(self):
+        return filter_exam_attempts(super().get_queryset(), self.request.query_params)
 
 
 # ------------------------------------------------------------
 # FEE RECEIPT VIEWSET
 # ------------------------------------------------------------
-class FeeReceiptViewSet(viewsets.ModelViewSet):
+class FeeReceiptViewSet(DeltaSyncMixin, ConditionalGetMixin, FastListMixin, viewsets.ModelViewSet):
     queryset = FeeReceipt.objects.all()
     serializer_class = FeeReceiptSerializer
+    pagination_class = OptionalCursorPagination
+
+    SUMMARY_FIELDS = [
+        "id", "regno", "studentname", "course", "date_of_joining", "contact",
+        "email", "total_fees", "paid_fees", "due_fees", "last_payment_date",
+    ]
 
     def get_queryset(self):
-        student_id = self.request.query_params.get("student")
-        if student_id:
+        student_id = number_param(self.request.query_params, "student")
+        if student_id is not None:
             return FeeReceipt.objects.filter(student_id=student_id)
         return super().get_queryset()
 
-from django.http import FileResponse
-import io
+    @action(detail=False, methods=["GET"])
+    def summary(self, request):
+        """
+        Per-student total / paid / due, one row per student, built from the
+        fee ledger in a single query. Accepts the student filters
+        (``start``, ``end``, ``course``, ...) plus ``due=true`` to keep only
+        students with an outstanding balance. Malformed dates get a 400.
+        """
+        queryset = filter_students_queryset(Student.objects.with_fee_totals(), request.query_params)
+        queryset = filter_due(queryset, request.query_params)
 
-@csrf_exempt
-def export_excel(request):
-    if request.method == "POST":
-        data = json.loads(request.body)
+        rows = queryset.order_by("id").values(*self.SUMMARY_FIELDS)
 
-        wb = openpyxl.Workbook()
-        ws = wb.active
-        ws.append(["Test"])
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(page)
+        return Response(list(rows))
 
-        buffer = io.BytesIO()
-        wb.save(buffer)
-        buffer.seek(0)
+# ------------------------------------------------------------
+# BACKGROUND JOBS (run by `manage.py run_jobs`)
+# ------------------------------------------------------------
+class JobViewSet(mixins.CreateModelMixin, mixins.ListModelMixin, mixins.RetrieveModelMixin,
+                 mixins.DestroyModelMixin, viewsets.GenericViewSet):
+    """
+    Queue work with ``POST {"kind": ..., "params": {...}}`` (imports also
+    send ``input_file``), poll the job for ``status`` / ``progress`` and
+    fetch the result from ``download_url`` once it is done.
+    """
+    queryset = Job.objects.order_by("-id")
+    serializer_class = JobSerializer
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        for field in ("kind", "status"):
+            value = self.request.query_params.get(field)
+            if value:
+                queryset = queryset.filter(**{field: value})
+        return queryset
+
+    def create(self, request, *args, **kwargs):
+        response = super().create(request, *args, **kwargs)
+        response.status_code = 202
+        response["Location"] = reverse("job-detail", args=[response.data["id"]])
+        return response
+
+    def destroy(self, request, *args, **kwargs):
+        job = self.get_object()
+        if job.status == Job.RUNNING:
+            return Response({"error": "Job is still running"}, status=409)
+        for field in (job.input_file, job.artifact):
+            if field:
+                field.delete(save=False)
+        job.delete()
+        return Response(status=204)
+
+    @action(detail=True, methods=["GET"])
+    def download(self, request, pk=None):
+        job = self.get_object()
+        if job.status != Job.DONE or not job.artifact:
+            return Response({"error": "Nothing to download yet", "status": job.status}, status=409)
+        return FileResponse(job.artifact.open("rb"), as_attachment=True, filename=os.path.basename(job.artifact.name))
+
+
+# ------------------------------------------------------------
+# EXPORT STUDENTS (XLSX / CSV) — ASYNC
+# ------------------------------------------------------------
+@csrf_exempt
+async def export_excel(request):
+    """
+    Export the filtered students with their fee totals.
+
+    Filters (``start``, ``end``, ``course``, ``due``, ...) are read from the
+    query string and, for POST requests, from the JSON body. Any ``rows``
+    sent by older clients are ignored; the data always comes from the
+    database. ``format=csv`` streams CSV instead of an xlsx workbook.
+    ``background=1`` queues the export as a job instead (202 + job).
+    """
+    if request.method not in ("GET", "POST"):
+        return HttpResponseNotAllowed(["GET", "POST"])
+
+    params = request.GET.dict()
+    if request.method == "POST" and request.body:
+        try:
+            body = json.loads(request.body)
+        except ValueError:
+            return JsonResponse({"error": "Invalid JSON body"}, status=400)
+        if isinstance(body, dict):
+            params.update({
+                key: value for key, value in body.items()
+                if key not in ("rows", "columns") and value not in (None, "")
+            })
+
+    try:
+        # Builds the queryset only (no query), so bad filters get a 400 up front
+        export_queryset(params)
+    except ValidationError as exc:
+        return JsonResponse(exc.detail, status=400)
+
+    if str(params.pop("background", "")).lower() in ("1", "true", "yes"):
+        job = await run_db(jobs.enqueue, "export", params)
+        return JsonResponse(JobSerializer(job).data, status=202)
+
+    if params.get("format") == "csv":
+        rows = aiter_csv(params) if serving_async(request) else iter_csv(params)
+        response = StreamingHttpResponse(rows, content_type="text/csv")
+        response["Content-Disposition"] = 'attachment; filename="Filtered_Students_Report.csv"'
+        return response
+
+    output = await awrite_xlsx(params)
+    content_type = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    if not serving_async(request):
         return FileResponse(
-            buffer,
-            as_attachment=True,
-            filename="Filtered_Students_Report.xlsx",
-            content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            output, as_attachment=True, filename="Filtered_Students_Report.xlsx", content_type=content_type
         )
 
+    size = await run_in_pool(lambda: output.seek(0, 2))
+    await run_in_pool(output.seek, 0)
+    response = StreamingHttpResponse(aiter_file(output), content_type=content_type)
+    response["Content-Length"] = str(size)
+    response["Content-Disposition"] = 'attachment; filename="Filtered_Students_Report.xlsx"'
+    return response
+
 
 # ------------------------------------------------------------
-# FILTER STUDENTS (NOT USED BY FRONTEND)
+# BULK STUDENT IMPORT (CSV / XLSX) — ASYNC
 # ------------------------------------------------------------
-def filter_students(request):
-    start = request.GET.get("start")
-    end = request.GET.get("end")
-    course = request.GET.get("course")
+@csrf_exempt
+async def bulk_import_students(request):
+    """
+    Enrol students from an uploaded CSV or XLSX ``file`` whose header row
+    uses the Student field names. Valid rows are inserted in batches and
+    the response lists the rows that failed. ``dry_run=true`` only
+    validates and reports ``would_create``. Files that cannot be read at
+    all get a 400.
+    """
+    if request.method != "POST":
+        return HttpResponseNotAllowed(["POST"])
+
+    # Multipart parsing reads the spooled body; keep it off the event loop
+    files = await run_in_pool(lambda: request.FILES)
+    upload = files.get("file")
+    if upload is None:
+        return JsonResponse({"error": "No file uploaded"}, status=400)
+
+    try:
+        rows = await run_in_pool(read_rows, upload)
+    except ImportFileError as exc:
+        return JsonResponse({"error": str(exc)}, status=400)
+
+    dry_run = str(request.GET.get("dry_run") or request.POST.get("dry_run") or "")
+    importer = StudentImport(dry_run=dry_run.lower() in ("1", "true", "yes"))
+    return JsonResponse(await importer.arun(rows))
 
-    filters = {}
-    if start and end:
-        filters["date_of_joining__range"] = [start, end]
-    if course:
-        filters["course__iexact"] = course.lower()
 
-    data = Student.objects.filter(**filters)
+# ------------------------------------------------------------
+# STUDENT PHOTO UPLOAD — ASYNC
+# ------------------------------------------------------------
+def _read_upload(upload):
+    upload.seek(0)
+    return upload.read()
+
+
+def _store_photo(student, encoded):
+    apply_variants(student, encoded)
+    student.save(update_fields=["image", "image_medium", "image_small", "updated_at"])
+    return {
+        "id": student.id,
+        "image": student.image.url,
+        "image_medium": student.image_medium.url,
+        "image_small": student.image_small.url,
+    }
+
+
+def _store_raw_photo(student, upload):
+    student._image_processed = True
+    student.image = upload
+    student.save(update_fields=["image", "updated_at"])
+    return jobs.enqueue("process_photos", {"student_ids": [student.id]})
+
+
+@csrf_exempt
+async def student_photo(request, pk):
+    """
+    Replace a student's photo. Pillow re-encodes the upload and its
+    variants in the offload pool, so large camera frames do not hold up
+    other requests. With ``background=1`` the raw upload is stored and a
+    ``process_photos`` job does the encoding (202 + job).
+    """
+    if request.method != "POST":
+        return HttpResponseNotAllowed(["POST"])
+
+    files = await run_in_pool(lambda: request.FILES)
+    upload = files.get("image")
+    if upload is None:
+        return JsonResponse({"error": "No image uploaded"}, status=400)
+
+    try:
+        student = await Student.objects.only("id", "image", "image_medium", "image_small").aget(pk=pk)
+    except Student.DoesNotExist:
+        return JsonResponse({"error": "Student not found"}, status=404)
+
+    if request.GET.get("background", "").lower() in ("1", "true", "yes"):
+        job = await run_db(_store_raw_photo, student, upload)
+        return JsonResponse(JobSerializer(job).data, status=202)
+
+    try:
+        encoded = await run_in_pool(lambda: encode_variants(_read_upload(upload)))
+    except (OSError, ValueError, Image.DecompressionBombError):
+        return JsonResponse({"error": "Upload is not a valid image"}, status=400)
+
+    return JsonResponse(await run_db(_store_photo, student, encoded))
+
+
+# ------------------------------------------------------------
+# DASHBOARD STATS (ROLLUP TABLES ONLY)
+# ------------------------------------------------------------
+def stats_view(request):
+    """Enrolment, fee collection and certificate totals; ``?start=&end=`` (YYYY-MM-DD) bound the dates."""
+    bounds = {}
+    for name in ("start", "end"):
+        value = request.GET.get(name)
+        try:
+            bounds[name] = parse_date(value) if value else None
+        except ValueError:
+            bounds[name] = None
+        if value and bounds[name] is None:
+            return JsonResponse({"error": f"{name} must be YYYY-MM-DD"}, status=400)
+    return JsonResponse(rollups.dashboard_stats(**bounds))
+
+
+# ------------------------------------------------------------
+# CHANGE FEED (SERVER-SENT EVENTS) — ASYNC
+# ------------------------------------------------------------
+@csrf_exempt
+async def change_feed(request):
+    """
+    Stream change events (model, id, op, version) as they are committed,
+    so clients patch their lists instead of refetching after every write.
+    ``Last-Event-ID`` (or ``?last_event_id=``) resumes after a reconnect,
+    ``?models=student,feereceipt`` limits the models and ``?timeout=``
+    shortens the stream. Only ASGI keeps the stream open; under WSGI it
+    ends after the pending events and the client polls (see page.events).
+    """
+    if request.method != "GET":
+        return HttpResponseNotAllowed(["GET"])
+
+    models = None
+    if request.GET.get("models"):
+        models = {name.strip().lower() for name in request.GET["models"].split(",") if name.strip()}
+        unknown = models - {model._meta.model_name for model in events.published_models()}
+        if unknown:
+            return JsonResponse({"error": f"Unknown models: {', '.join(sorted(unknown))}"}, status=400)
+
+    limit = getattr(settings, "CHANGE_FEED_STREAM_SECONDS", 25)
+    try:
+        duration = float(request.GET.get("timeout", limit))
+    except ValueError:
+        duration = None
+    # nan would never compare as elapsed and keep the stream open forever
+    if duration is None or not math.isfinite(duration):
+        return JsonResponse({"error": "timeout must be a number of seconds"}, status=400)
+    duration = min(duration, limit)
+
+    last_event_id = request.headers.get("Last-Event-ID") or request.GET.get("last_event_id")
+    if serving_async(request):
+        stream = events.aiter_events(last_event_id, models, max(duration, 0))
+    else:
+        stream = events.iter_events(last_event_id, models)
+    response = StreamingHttpResponse(stream, content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    # Tell nginx not to buffer the stream
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+# ------------------------------------------------------------
+# RESPONSE CACHE STATS
+# ------------------------------------------------------------
+def cache_stats_view(request):
+    return JsonResponse(cache_stats())
+
+
+# ------------------------------------------------------------
+# REQUEST METRICS (STAFF / TOKEN ONLY)
+# ------------------------------------------------------------
+@csrf_exempt
+def request_stats_view(request):
+    if not metrics.can_view_stats(request):
+        return JsonResponse({"error": "Forbidden"}, status=403)
+    if request.method == "DELETE":
+        metrics.reset()
+        return JsonResponse({"message": "Request metrics reset"})
+    return JsonResponse({
+        "enabled": getattr(settings, "REQUEST_METRICS", False),
+        "routes": metrics.snapshot(),
+    })
+
+
+# ------------------------------------------------------------
+# FILTER STUDENTS (NOT USED BY FRONTEND)
+# ------------------------------------------------------------
+def filter_students(request):
+    queryset = Student.objects.prefetch_related("breaks").order_by("id")
+    try:
+        data = filter_students_queryset(queryset, request.GET)
+    except ValidationError as exc:
+        return JsonResponse(exc.detail, status=400)
     return JsonResponse(StudentSerializer(data, many=True).data,safe=False)